@@ -0,0 +1,96 @@
+# benchmarks/import_time.py
+# Run:
+# python benchmarks/import_time.py
+# python benchmarks/import_time.py --max-ms 800 --output outputs/import_time.json
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Every pipeline step runs in its own process, so each pays for the
+# imports of its entry module. This measures them with -X importtime in
+# a fresh interpreter and checks that provider SDKs and tracing stay
+# out of startup (they are imported on first use).
+
+STAGE_MODULES = [
+    "main_runner",
+    "main_batch_runner",
+    "main_prune_runner",
+    "core.folder_graph_builder",
+    "core.global_description_builder",
+    "core.global_blueprint_yaml_builder",
+    "core.node_description_builder",
+    "core.function_spec_builder",
+]
+
+LAZY_MODULES = ["ollama", "httpx", "llama_cpp", "langsmith"]
+
+
+def measure(module: str) -> dict:
+    code = (
+        f"import {module}, sys, json; "
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    # Lines read "import time: self [us] | cumulative | imported package";
+    # top-level entries (not indented) add up to the full import cost
+    top_level = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "imported package" not in line:
+            cumulative_us, name = line.split("|")[1:3]
+            if not name[1:].startswith(" "):
+                top_level[name.strip()] = int(cumulative_us)
+
+    slowest = sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:8]
+
+    return {
+        "total_ms": round(sum(top_level.values()) / 1000, 1),
+        "slowest_ms": {name: round(us / 1000, 1) for name, us in slowest},
+        "eager_provider_modules": json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", nargs="*", default=STAGE_MODULES)
+    parser.add_argument("--max-ms", type=float, help="Fail if any module takes longer to import")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = {module: measure(module) for module in args.modules}
+
+    for module, data in report.items():
+        eager = ", ".join(data["eager_provider_modules"]) or "-"
+        print(f"{module:40s} {data['total_ms']:8.1f} ms   eager: {eager}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = [
+        m for m, d in report.items()
+        if d["eager_provider_modules"] or (args.max_ms and d["total_ms"] > args.max_ms)
+    ]
+
+    if failed:
+        print("Import-time regression in:", ", ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/llm_load_test.py
+# Run:
+# python benchmarks/llm_load_test.py --requests 200 --ttft 0.2 --tokens-per-second 40 --max-parallel 4 --error-rate 0.05
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from llm.fake_server import FakeLLMServer, FakeServerConfig, LatencyModel
+
+# Fires concurrent structured pruning decisions at an in-process fake
+# server and reports throughput and latency percentiles, so scheduling
+# changes can be compared on any machine without a real model.
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(n_requests: int, system_context: str):
+    from core.llm_structured import StructuredLLM
+    from core.schemas import PruneDecision
+
+    llm = StructuredLLM()
+    latencies = []
+    failures = 0
+
+    async def one(i):
+        nonlocal failures
+        prompt = (
+            "Leaf Node Metadata\n\n"
+            f"Name: file_{i}.ts\n"
+            f"Full Path: project/src/file_{i}.ts\n"
+            "Mandatory: no\n"
+        )
+        start = time.perf_counter()
+        try:
+            await llm.acall(prompt, PruneDecision, system_context=system_context)
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    wall = time.perf_counter() - start
+
+    return wall, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--provider", choices=["ollama", "nvidia"], default="ollama")
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--max-parallel", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    config = FakeServerConfig(
+        latency=LatencyModel(
+            ttft=args.ttft,
+            tokens_per_second=args.tokens_per_second,
+            prefill_tokens_per_second=args.prefill_tokens_per_second,
+            jitter=args.jitter,
+        ),
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        max_parallel=args.max_parallel,
+        seed=args.seed,
+    )
+
+    with FakeLLMServer(config=config) as server:
+        # Must be set before the LLM modules read their configuration
+        os.environ["LLM_PROVIDER"] = args.provider
+        os.environ["LLM_CACHE_MODE"] = "off"
+        os.environ["OLLAMA_HOST"] = server.url
+        os.environ["NVIDIA_BASE_URL"] = server.url + "/v1"
+        os.environ.setdefault("NVIDIA_API_KEY", "fake")
+
+        from llm.governor import governor_stats
+        from llm.single_flight import single_flight_stats
+
+        system_context = "You are an AI architecture pruning engine.\n" + "Shared context line.\n" * 200
+        wall, latencies, failures = asyncio.run(run_load(args.requests, system_context))
+
+        report = {
+            "requests": args.requests,
+            "succeeded": len(latencies),
+            "failed": failures,
+            "wall_seconds": round(wall, 3),
+            "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+            "latency_p50": round(percentile(latencies, 50), 3),
+            "latency_p95": round(percentile(latencies, 95), 3),
+            "latency_p99": round(percentile(latencies, 99), 3),
+            "latency_mean": round(statistics.mean(latencies), 3) if latencies else 0.0,
+            "server": dict(server.stats),
+            "governors": governor_stats(),
+            "single_flight": single_flight_stats(),
+        }
+
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/validation_bench.py
+# Run:
+# python benchmarks/validation_bench.py
+# python benchmarks/validation_bench.py --iterations 2000 --functions 40 --output outputs/validation_bench.json
+
+import gc
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.function_spec_builder import FileFunctionSpec
+from core.json_stream import IncrementalJSONParser, extract_json_object, validate_json
+from core.schemas import NodeDecision, PruneDecision
+from core.schemas_project_blueprint import ProjectBlueprint
+from llm.fake_server import _node_decision, _project_blueprint, tokenize
+
+# CPU cost of turning one raw LLM response into a validated model.
+# "legacy" is the original path (regex, json.loads, dict fix-ups,
+# schema(**parsed)); the others are what core/llm_structured.py does
+# now: a direct validation of the raw string, lenient extraction from
+# chatty output, and the streaming parser fed token by token.
+#
+# The streaming parser does most of its work while the model is still
+# generating; "stream tail" is what is left once the last token
+# arrives, i.e. what the caller actually waits for. It must not be
+# slower than the legacy parse of the finished response.
+
+
+def legacy(text: str, schema):
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    parsed = json.loads(match.group(0))
+    if "reason" in schema.model_fields and "reason" not in parsed:
+        parsed["reason"] = "No reason provided by model."
+    return schema(**parsed)
+
+
+def streamed(chunks: list, schema):
+    parser = IncrementalJSONParser(schema)
+    for chunk in chunks:
+        if parser.feed(chunk):
+            break
+    return parser.value()
+
+
+def stream_tail_us(chunks: list, schema, iterations: int, repeat: int = 5) -> float:
+    best = float("inf")
+
+    for _ in range(repeat):
+        parsers = []
+        for _ in range(iterations):
+            parser = IncrementalJSONParser(schema)
+            for chunk in chunks[:-1]:
+                parser.feed(chunk)
+            parsers.append(parser)
+
+        # The parsers held above would otherwise make every collection
+        # during the timed loop expensive
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for parser in parsers:
+                parser.feed(chunks[-1])
+                parser.value()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+
+    return round(best / iterations * 1e6, 1)
+
+
+def samples(functions: int) -> dict:
+    spec = {
+        "file": "src/services/order_service.ts",
+        "functions": [
+            {
+                "name": f"handle_{i}",
+                "parameters": [{"name": "input", "type": "OrderRequest"}, {"name": "ctx", "type": "Context"}],
+                "return_type": "OrderResponse",
+                "description": f"Handles step {i} of the order workflow.",
+            }
+            for i in range(functions)
+        ],
+    }
+    decision = _node_decision("USER REQUIREMENT\nA React web app\n\nAVAILABLE OPTIONS\n- React\n- Vue\n")
+
+    return {
+        "PruneDecision": (PruneDecision, {"decision": "KEEP", "reason": "Relevant to the selected stack.", "confidence": 0.8}),
+        "NodeDecision": (NodeDecision, decision),
+        "ProjectBlueprint": (ProjectBlueprint, _project_blueprint("")),
+        "FileFunctionSpec": (FileFunctionSpec, spec),
+    }
+
+
+def per_call_us(func, iterations: int, repeat: int = 5) -> float:
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        best = min(best, time.perf_counter() - start)
+
+    return round(best / iterations * 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--functions", type=int, default=25, help="Functions in the FileFunctionSpec sample")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = {}
+
+    for name, (schema, data) in samples(args.functions).items():
+        text = json.dumps(data, indent=2)
+        chatty = f"Here is the JSON:\n```json\n{text}\n```\nLet me know if you need changes."
+        chunks = tokenize(text)
+
+        # Every path must agree before it is timed
+        expected = legacy(text, schema)
+        assert validate_json(text, schema) == extract_json_object(chatty, schema) == streamed(chunks, schema) == expected
+
+        report[name] = {
+            "bytes": len(text),
+            "legacy_us": per_call_us(lambda: legacy(text, schema), args.iterations),
+            "validate_json_us": per_call_us(lambda: validate_json(text, schema), args.iterations),
+            "extract_chatty_us": per_call_us(lambda: extract_json_object(chatty, schema), args.iterations),
+            "stream_us": per_call_us(lambda: streamed(chunks, schema), args.iterations),
+            "stream_tail_us": stream_tail_us(chunks, schema, args.iterations),
+        }
+
+    print(
+        f"{'schema':18s} {'bytes':>7s} {'legacy':>9s} {'direct':>9s} {'chatty':>9s} {'stream':>9s} {'tail':>9s}"
+        "   (µs per response)"
+    )
+    for name, r in report.items():
+        print(
+            f"{name:18s} {r['bytes']:7d} {r['legacy_us']:9.1f} {r['validate_json_us']:9.1f} "
+            f"{r['extract_chatty_us']:9.1f} {r['stream_us']:9.1f} {r['stream_tail_us']:9.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    for name, r in report.items():
+        assert r["stream_tail_us"] <= r["legacy_us"], (
+            f"{name}: streaming leaves {r['stream_tail_us']}µs after the last token, "
+            f"legacy parsing takes {r['legacy_us']}µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
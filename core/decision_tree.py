@@ -0,0 +1,320 @@
+# core/decision_tree.py
+# Run:
+# python core/decision_tree.py --json-file data/Web_Dev_Only.json
+# python core/decision_tree.py --json-file data/Web_Dev_Only.json --find "Frontend"
+
+import os
+import sys
+import json
+import pickle
+import hashlib
+import argparse
+from array import array
+from collections import deque
+from typing import Any, Iterator
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, ".cache", "decision_trees")
+
+# Compiled form of a decision tree JSON (e.g. data/Web_Dev_Only.json).
+#
+# The source mixes shapes: dicts of subtrees, lists of leaf strings,
+# lists of single-key dicts. Compiling normalizes it once into a node
+# table, with ids in breadth-first order so every node's children are
+# one contiguous id range:
+#
+#   names[id]         option name shown to the model
+#   parents[id]       parent id (-1 for the root)
+#   first_child[id]   id of the first child; children are first_child .. first_child + child_count - 1
+#   child_count[id]
+#
+# plus a name index (same first match as the old recursive key search),
+# a (parent, name) → child index and a path index built on first use.
+# Lookups and child listing are O(1).
+#
+# The table is pickled under DECISION_TREE_CACHE_DIR (default
+# .cache/decision_trees) keyed by the source's location and the SHA-256
+# of its contents, so an edited tree is recompiled automatically.
+
+# Bump when the table layout changes so stale caches are ignored
+FORMAT_VERSION = 2
+
+_DICT, _LIST, _LEAF = 0, 1, 2
+
+
+def _children(value: Any) -> list:
+    """
+    (name, value, is_key) for each child of a raw JSON value. is_key is
+    True for names that are dict keys in the source.
+    """
+
+    if isinstance(value, dict):
+        return [(k, v, True) for k, v in value.items()]
+
+    if isinstance(value, list):
+        children = []
+        for item in value:
+            if isinstance(item, dict) and len(item) == 1:
+                key = next(iter(item))
+                children.append((key, item[key], True))
+            else:
+                children.append((str(item), item, False))
+        return children
+
+    return []
+
+
+def _kind(value: Any) -> int:
+    if isinstance(value, dict):
+        return _DICT
+    if isinstance(value, list):
+        return _LIST
+    return _LEAF
+
+
+class DecisionTree:
+
+    def __init__(self, names, parents, first_child, child_count, kinds, is_key, source_hash="",
+                 by_name=None, by_child=None):
+        self.names = names
+        self.parents = parents
+        self.first_child = first_child
+        self.child_count = child_count
+        self.kinds = kinds
+        self.is_key = is_key
+        self.source_hash = source_hash
+
+        self._by_name = by_name if by_name is not None else self._index_names()
+        self._by_child = by_child if by_child is not None else self._index_children()
+        self._by_path = None    # built on first node_at
+
+    # ------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------
+
+    @classmethod
+    def compile(cls, tree: Any, source_hash: str = "") -> "DecisionTree":
+        names = [""]
+        parents, first_child, child_count = array("i", [-1]), array("i", [0]), array("i", [0])
+        kinds, is_key = bytearray([_kind(tree)]), bytearray([0])
+
+        queue = deque([(0, tree)])
+
+        while queue:
+            node, value = queue.popleft()
+            children = _children(value)
+
+            first_child[node] = len(names)
+            child_count[node] = len(children)
+
+            for name, child, key in children:
+                queue.append((len(names), child))
+                names.append(name)
+                parents.append(node)
+                first_child.append(0)
+                child_count.append(0)
+                kinds.append(_kind(child))
+                is_key.append(key)
+
+        return cls(names, parents, first_child, child_count, kinds, is_key, source_hash)
+
+    def _index_names(self) -> dict:
+        """
+        name → id of the first dict key with that name, in the order
+        a depth-first search checks them: all keys of a dict before
+        anything below it, list items one at a time.
+        """
+
+        index = {}
+        stack = [0]
+
+        while stack:
+            node = stack.pop()
+            children = self.children(node)
+
+            if self.kinds[node] == _DICT:
+                for child in children:
+                    index.setdefault(self.names[child], child)
+                stack.extend(reversed(children))
+            else:
+                # A list item's key is checked right before its own subtree
+                for child in reversed(children):
+                    stack.append(child)
+                    if self.is_key[child]:
+                        stack.append(~child)
+
+            while stack and stack[-1] < 0:
+                child = ~stack.pop()
+                index.setdefault(self.names[child], child)
+
+        return index
+
+    def _index_children(self) -> dict:
+        # Duplicate sibling names resolve to the first
+        index = {}
+        for node in range(1, len(self.names)):
+            index.setdefault((self.parents[node], self.names[node]), node)
+        return index
+
+    def _index_paths(self) -> dict:
+        # Duplicate sibling names resolve to the first, like traversal does
+        # Parents come before their children in breadth-first order
+        paths = [()]
+        index = {(): 0}
+        for node in range(1, len(self.names)):
+            paths.append(paths[self.parents[node]] + (self.names[node],))
+            index.setdefault(paths[node], node)
+        return index
+
+    # ------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------
+
+    @property
+    def root(self) -> int:
+        return 0
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def find(self, name: str) -> int | None:
+        """
+        Id of the node a start-node name refers to, or None.
+        """
+        return self._by_name.get(name)
+
+    def node_at(self, path) -> int | None:
+        """
+        Id of the node at a tuple of names from the top of the tree.
+        """
+        if self._by_path is None:
+            self._by_path = self._index_paths()
+        return self._by_path.get(tuple(path))
+
+    def children(self, node: int) -> range:
+        start = self.first_child[node]
+        return range(start, start + self.child_count[node])
+
+    def child_names(self, node: int) -> list[str]:
+        return self.names[self.first_child[node]:self.first_child[node] + self.child_count[node]]
+
+    def child_named(self, node: int, name: str) -> int | None:
+        return self._by_child.get((node, name))
+
+    def is_leaf(self, node: int) -> bool:
+        return self.child_count[node] == 0
+
+    def path(self, node: int) -> tuple:
+        parts = []
+        while node > 0:
+            parts.append(self.names[node])
+            node = self.parents[node]
+        return tuple(reversed(parts))
+
+    def leaves(self, node: int = 0) -> Iterator[int]:
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if self.is_leaf(current):
+                yield current
+            else:
+                stack.extend(reversed(self.children(current)))
+
+    # ------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------
+
+    # Cached as plain containers, so the pickle does not depend on where
+    # this class was imported from (e.g. running this file as a script)
+
+    def to_state(self) -> tuple:
+        # The path index is rebuilt on demand
+        return (
+            FORMAT_VERSION, self.names, self.parents, self.first_child,
+            self.child_count, self.kinds, self.is_key, self.source_hash, self._by_name,
+            self._by_child,
+        )
+
+    @classmethod
+    def from_state(cls, state: tuple) -> "DecisionTree":
+        if state[0] != FORMAT_VERSION:
+            raise ValueError("Decision tree cache has an old format.")
+        return cls(*state[1:])
+
+
+def _cache_prefix(source: str) -> str:
+    # Same-named trees in different directories get separate entries
+    location = hashlib.sha256(os.path.abspath(source).encode("utf-8")).hexdigest()[:8]
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return f"{stem}-{location}-"
+
+
+def _cache_path(source: str, digest: str) -> str:
+    cache_dir = os.getenv("DECISION_TREE_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return os.path.join(cache_dir, f"{_cache_prefix(source)}{digest[:16]}.v{FORMAT_VERSION}.pickle")
+
+
+def load_decision_tree(path: str, use_cache: bool = True) -> DecisionTree:
+    """
+    Compiled tree for a decision tree JSON file, from the on-disk cache
+    when the file has not changed since it was last compiled.
+    """
+
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_path = _cache_path(path, digest)
+
+    if use_cache and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                return DecisionTree.from_state(pickle.load(f))
+        except (OSError, EOFError, ValueError, TypeError, IndexError, pickle.UnpicklingError):
+            pass    # recompiled below
+
+    tree = DecisionTree.compile(json.loads(raw), digest)
+
+    if use_cache:
+        _write_cache(cache_path, _cache_prefix(path), tree)
+
+    return tree
+
+
+def _write_cache(cache_path: str, prefix: str, tree: DecisionTree):
+    directory = os.path.dirname(cache_path)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+
+        # Older compilations of the same file are never read again
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name != os.path.basename(cache_path):
+                os.remove(os.path.join(directory, name))
+
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(tree.to_state(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except OSError as e:
+        print(f"[DecisionTree] Cache not written: {e}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Compile a decision tree JSON and report its size.")
+    parser.add_argument("--json-file", required=True)
+    parser.add_argument("--find", help="Print the path and options of a node")
+    args = parser.parse_args()
+
+    compiled = load_decision_tree(args.json_file)
+    leaves = sum(1 for _ in compiled.leaves())
+    print(f"{args.json_file}: {len(compiled) - 1} nodes, {leaves} leaves (sha256 {compiled.source_hash[:12]})")
+
+    if args.find:
+        node = compiled.find(args.find)
+        if node is None:
+            sys.exit(f"Node '{args.find}' not found.")
+        print(" → ".join(compiled.path(node)))
+        for name in compiled.child_names(node):
+            print(f"- {name}")
@@ -6,10 +6,13 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import yaml
 import json
+import asyncio
 from dotenv import load_dotenv
 from typing import List
 from pydantic import BaseModel
 from core.llm_structured import StructuredLLM
+from llm.deadlines import BUDGET_ERRORS
+from llm.usage import get_usage_tracker, track_stage, usage_node, write_usage_report
 
 load_dotenv()
 
@@ -58,6 +61,7 @@ def extract_key_functions_section(markdown_text: str) -> str:
 # Builder
 # -----------------------------
 
+@track_stage("functions")
 def build_function_specs(
     node_docs_dir: str,
     output_dir: str = "specs/function_specs"
@@ -66,6 +70,8 @@ def build_function_specs(
     llm = StructuredLLM()
     os.makedirs(output_dir, exist_ok=True)
 
+    jobs = []
+
     for root, _, files in os.walk(node_docs_dir):
         for file in files:
             if not file.endswith(".md"):
@@ -89,7 +95,9 @@ def build_function_specs(
 
             os.makedirs(os.path.dirname(yaml_output_path), exist_ok=True)
 
-            system_prompt = """
+            jobs.append((relative_path, key_section, yaml_output_path))
+
+    system_prompt = """
 You are converting conceptual function descriptions
 into strict machine-readable function specifications.
 
@@ -100,7 +108,9 @@ Rules:
 - Output strict JSON only.
 """
 
-            user_prompt = f"""
+    async def generate(relative_path, key_section, yaml_output_path):
+
+        user_prompt = f"""
 File Path:
 {relative_path.replace('.md','')}
 
@@ -127,15 +137,36 @@ Return JSON strictly matching this schema:
 }}
 """
 
-            spec: FileFunctionSpec = llm.call(
-                prompt=system_prompt + "\n\n" + user_prompt,
-                schema=FileFunctionSpec
-            )
-
-            with open(yaml_output_path, "w", encoding="utf-8") as f:
-                yaml.dump(spec.model_dump(), f, sort_keys=False)
-
-            print(f"Generated YAML for {relative_path}")
+        try:
+            with usage_node(relative_path):
+                spec: FileFunctionSpec = await llm.acall(
+                    prompt=user_prompt,
+                    schema=FileFunctionSpec,
+                    system_context=system_prompt
+                )
+        except BUDGET_ERRORS as e:
+            # Out of time or tokens: an empty spec marks the file for a rerun
+            print(f"Budget exhausted, writing empty spec for: {relative_path} ({e})")
+            get_usage_tracker().mark_degraded("functions", str(e), [relative_path])
+            spec = FileFunctionSpec(file=relative_path.replace(".md", ""), functions=[])
+            degraded = str(e)
+        else:
+            degraded = None
+
+        data = spec.model_dump()
+        if degraded:
+            data["degraded"] = degraded
+
+        with open(yaml_output_path, "w", encoding="utf-8") as f:
+            yaml.dump(data, f, sort_keys=False)
+
+        print(f"Generated YAML for {relative_path}")
+
+    async def generate_all():
+        # Requests overlap; llm/governor.py bounds concurrency per provider
+        await asyncio.gather(*(generate(*job) for job in jobs))
+
+    asyncio.run(generate_all())
 
     print("\nAll function specs generated successfully.")
 
@@ -150,4 +181,6 @@ if __name__ == "__main__":
     build_function_specs(
         node_docs_dir=args.node_docs,
         output_dir=args.output
-    )
\ No newline at end of file
+    )
+
+    write_usage_report()
\ No newline at end of file
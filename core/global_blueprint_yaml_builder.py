@@ -8,10 +8,41 @@ import json
 from dotenv import load_dotenv
 from core.llm_structured import StructuredLLM
 from core.schemas_project_blueprint import ProjectBlueprint
+from llm.deadlines import BUDGET_ERRORS
+from llm.usage import get_usage_tracker, track_stage, write_usage_report
 
 load_dotenv()
 
 
+def stub_blueprint(user_requirement: str, tech_stack: str) -> ProjectBlueprint:
+    """
+    Minimal valid blueprint written when the real one could not be
+    generated in time.
+    """
+
+    return ProjectBlueprint.model_validate({
+        "project_meta": {
+            "name": "",
+            "version": "",
+            "language": "",
+            "type": "",
+            "description": user_requirement,
+        },
+        "architecture": {
+            "pattern": "",
+            "entry_points": [],
+            "components": [],
+            "data_flow_summary": "",
+        },
+        "infrastructure": {"external_services": []},
+        "dependencies": {
+            "internal": [],
+            "external": [{"name": name.strip(), "purpose": "Selected tech stack"} for name in tech_stack.split("→")],
+        },
+    })
+
+
+@track_stage("blueprint")
 def build_project_blueprint(
     global_desc_path: str,
     stack_meta_path: str,
@@ -106,15 +137,29 @@ def build_project_blueprint(
     Do NOT rename keys.
     """
 
-    blueprint: ProjectBlueprint = llm.call(
-        prompt=system_prompt + "\n\n" + user_prompt,
-        schema=ProjectBlueprint
-    )
+    degraded = None
+
+    try:
+        blueprint: ProjectBlueprint = llm.call(
+            prompt=user_prompt,
+            schema=ProjectBlueprint,
+            system_context=system_prompt
+        )
+    except BUDGET_ERRORS as e:
+        # Out of time or tokens: a minimal blueprint marked for a rerun
+        print(f"Budget exhausted, writing minimal blueprint ({e})")
+        get_usage_tracker().mark_degraded("blueprint", str(e), [output_path])
+        blueprint = stub_blueprint(user_requirement, tech_stack)
+        degraded = str(e)
+
+    data = blueprint.model_dump()
+    if degraded:
+        data["degraded"] = degraded
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
     with open(output_path, "w", encoding="utf-8") as f:
-        yaml.dump(blueprint.model_dump(), f, sort_keys=False)
+        yaml.dump(data, f, sort_keys=False)
 
     print("Project blueprint YAML generated successfully.")
 
@@ -131,4 +176,6 @@ if __name__ == "__main__":
         global_desc_path=args.global_desc,
         stack_meta_path=args.meta,
         output_path=args.output
-    )
\ No newline at end of file
+    )
+
+    write_usage_report()
\ No newline at end of file
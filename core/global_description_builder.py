@@ -5,12 +5,36 @@ import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from llm.deadlines import BUDGET_ERRORS
 from llm.local_llama_client import call_llm
+from llm.usage import get_usage_tracker, track_stage, write_usage_report
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def stub_global_description(user_requirement: str, tech_stack_summary: str, reason: str) -> str:
+    """
+    Placeholder written when the description could not be generated in
+    time. Later stages still get the requirement and the stack.
+    """
+
+    return f"""# Project Description
+
+> Not generated: {reason}
+> Rerun the global description stage to replace this stub.
+
+## User Requirement
+
+{user_requirement}
+
+## Selected Tech Stack
+
+{tech_stack_summary}
+"""
+
+
+@track_stage("global")
 def build_global_description(
     pruned_structure_path: str,
     stack_meta_path: str,
@@ -59,9 +83,13 @@ FINAL PRUNED PROJECT STRUCTURE:
 Generate a complete global project description. Format the output in professional Markdown with clear headings and sections.
 """
 
-    full_prompt = system_prompt + "\n\n" + user_prompt
-
-    response = call_llm(full_prompt)
+    try:
+        response = call_llm(user_prompt, system=system_prompt)
+    except BUDGET_ERRORS as e:
+        # Out of time or tokens: the next stages can still run on a stub
+        print(f"Budget exhausted, writing stub global description ({e})")
+        get_usage_tracker().mark_degraded("global", str(e), [output_path])
+        response = stub_global_description(user_requirement, tech_stack_summary, str(e))
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
@@ -84,4 +112,6 @@ if __name__ == "__main__":
         pruned_structure_path=args.pruned,
         stack_meta_path=args.meta,
         output_path=args.output
-    )
\ No newline at end of file
+    )
+
+    write_usage_report()
\ No newline at end of file
@@ -0,0 +1,372 @@
+# core/json_stream.py
+
+import re
+import functools
+from typing import Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+
+# ============================================================
+# VALIDATION
+# ============================================================
+
+@functools.lru_cache(maxsize=None)
+def validator_for(schema) -> TypeAdapter:
+    """
+    Validator for a schema, built once and reused for every response.
+    """
+    return TypeAdapter(schema)
+
+
+def validate_json(text: str, schema, *, mode: str = "strict"):
+    """
+    Validate raw JSON text against schema without going through
+    json.loads and an intermediate dict.
+
+    - "strict": text is exactly one JSON value.
+    - "lenient": prose or fences may surround the object; the first
+      object that validates is returned (see extract_json_object).
+    - "partial": text may be cut off mid-object, as while streaming.
+      Fields that are not there yet are not reported; returns None
+      until every required field is present.
+    """
+
+    if mode == "lenient":
+        return extract_json_object(text, schema)
+
+    adapter = validator_for(schema)
+
+    if mode == "strict":
+        return adapter.validate_json(text)
+
+    if mode != "partial":
+        raise ValueError(f"Unknown validation mode: {mode}")
+
+    try:
+        return adapter.validate_json(text, experimental_allow_partial=True)
+    except ValidationError as e:
+        if all(err["type"] == "missing" for err in e.errors()):
+            return None
+        raise
+
+
+def _first_real_error(error: ValidationError) -> dict:
+    return next(err for err in error.errors() if err["type"] != "missing")
+
+
+# Skip plain text and whole string literals up to the next structural
+# character (a lone quote opens a string that continues in a later
+# chunk). Inside nested values commas do not matter and are skipped too.
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_TOP_LEVEL_TOKEN = re.compile(r'(?:[^"{}\[\],]+|' + _STRING + r')*(.)?', re.DOTALL)
+_NESTED_TOKEN = re.compile(r'(?:[^"{}\[\]]+|' + _STRING + r')*(.)?', re.DOTALL)
+_OBJECT_TOKEN = re.compile(r'["{}]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# Buffered text is scanned at least this often, so a bad member deep in
+# a long response still aborts it early
+_SCAN_BYTES = 256
+
+
+class SchemaPrefixError(ValueError):
+    """
+    Raised while streaming when a completed top-level field already
+    violates the target schema, so generation can be aborted early.
+    """
+
+
+class IncrementalJSONParser:
+    """
+    Consumes LLM output chunk by chunk and tracks the first top-level
+    JSON object.
+
+    - Text before the first "{" (chatter, ```json fences) is skipped.
+    - feed() returns True as soon as the object closes, so the caller
+      can stop generation instead of waiting for trailing prose.
+    - Chunks that cannot close the object or a top-level member are
+      only buffered; the text is scanned when one can (or every
+      _SCAN_BYTES), so most tokens cost a few substring checks.
+    - With a schema, each top-level "key": value member is validated
+      on its own (in partial mode) once it is complete, and
+      SchemaPrefixError is raised on the first violation. The complete
+      object is validated once more in full; value() returns the
+      result, so the response is never parsed again.
+    """
+
+    def __init__(self, schema: Type[BaseModel] | None = None):
+        self.schema = schema
+        self.complete = False
+
+        self.result = None
+        self.error = None
+
+        self._parts = []
+        self._length = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._member_start = 0
+        self._scanned = 0
+        self._scan_at = _SCAN_BYTES
+
+    @property
+    def text(self) -> str:
+        """
+        Object text seen so far (the full object once complete).
+        """
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, chunk: str) -> bool:
+        if self.complete:
+            return True
+
+        if not self._started:
+            start = chunk.find("{")
+            if start < 0:
+                return False
+            chunk = chunk[start:]
+            self._started = True
+
+        self._parts.append(chunk)
+        self._length += len(chunk)
+
+        # Only a closing bracket can end the object and only a top-level
+        # comma can end a member (and nothing but a quote can end an open
+        # string), so other chunks are buffered and scanned together
+        if self._in_string:
+            due = '"' in chunk
+        else:
+            due = "}" in chunk or "]" in chunk or ("," in chunk and self._depth <= 1)
+
+        if due or self._length >= self._scan_at:
+            return self._scan()
+        return False
+
+    def _scan(self) -> bool:
+        offset = self._scanned
+        text = self._slice(offset, self._length)
+
+        self._scanned = self._length
+        self._scan_at = self._length + _SCAN_BYTES
+        self._in_string = False
+        members = []
+
+        # Jump between structural characters, over whole string literals
+        # and nested values' commas, instead of stepping through every
+        # character
+        i = 0
+
+        while True:
+            token = _TOP_LEVEL_TOKEN if self._depth <= 1 else _NESTED_TOKEN
+            match = token.match(text, i)
+            ch = match.group(1)
+
+            if ch is None:
+                break
+
+            pos, i = offset + match.start(1), match.end()
+
+            if ch == '"':
+                # The string continues in a later chunk; scan it again
+                # from its opening quote once it closes
+                self._scanned = pos
+                self._in_string = True
+                break
+
+            if ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = pos + 1
+
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    # Drop whatever followed the closing brace. Members
+                    # closed in this scan are covered by the full check.
+                    end = pos + 1
+                    self._parts = [self.text[:end]]
+                    self._length = end
+                    self.complete = True
+                    self._finish()
+                    return True
+
+            else:
+                members.append((self._member_start, pos))
+                self._member_start = pos + 1
+
+        for start, end in members:
+            self._close_member(start, end)
+        return False
+
+    # ------------------------------------------------------------
+    # Prefix validation
+    # ------------------------------------------------------------
+
+    def _slice(self, start: int, end: int) -> str:
+        """
+        Text between two offsets, joined from the last parts only.
+        """
+
+        pieces = []
+        part_end = self._length
+
+        for part in reversed(self._parts):
+            if part_end <= start:
+                break
+            pieces.append(part)
+            part_end -= len(part)
+
+        joined = "".join(reversed(pieces))
+        return joined[start - part_end:end - part_end]
+
+    def _close_member(self, start: int, end: int):
+        if self.schema is None:
+            return
+
+        member = self._slice(start, end)
+
+        if not member.strip():
+            return
+
+        # Only the member that just closed is checked, as a one-member
+        # object (earlier members were checked when they closed), so a
+        # response costs one pass however many fields it has
+        try:
+            validate_json("{" + member + "}", self.schema, mode="partial")
+        except ValidationError as e:
+            err = _first_real_error(e)
+            field = ".".join(str(part) for part in err["loc"]) or "object"
+            raise SchemaPrefixError(
+                f"Field '{field}' violates {self.schema.__name__}: {err['msg']}"
+            ) from e
+
+    def _finish(self):
+        if self.schema is None:
+            return
+
+        try:
+            self.result = validate_json(self.text, self.schema)
+        except ValidationError as e:
+            self.error = e
+
+    def value(self):
+        """
+        The validated object. Raises JSONExtractionError (with the object
+        as candidate, so it can be repaired) if it did not validate.
+        """
+
+        if self.result is None:
+            raise JSONExtractionError(
+                f"JSON object does not match {self.schema.__name__}: {self.error}",
+                candidate=self.text,
+                error=self.error
+            )
+        return self.result
+
+
+# ============================================================
+# EXTRACTION FROM COMPLETE OUTPUT
+# ============================================================
+
+class JSONExtractionError(ValueError):
+    """
+    No JSON object in the output validates against the schema.
+    candidate is the first complete object found (None if there was
+    none) and error the reason it was rejected.
+    """
+
+    def __init__(self, message: str, candidate: str | None = None, error: Exception | None = None):
+        super().__init__(message)
+        self.candidate = candidate
+        self.error = error
+
+
+def iter_json_objects(text: str):
+    """
+    Yield every balanced top-level {...} span in text, in order.
+    Braces inside JSON strings are ignored; prose between objects is
+    skipped.
+    """
+
+    depth = 0
+    start = 0
+    i = 0
+    in_string = False
+
+    while True:
+
+        if depth == 0:
+            start = text.find("{", i)
+            if start < 0:
+                return
+            depth, i = 1, start + 1
+            continue
+
+        if in_string:
+            match = _STRING_SPECIAL.search(text, i)
+            if match is None:
+                return
+            if match.group() == "\\":
+                # Skip the escaped character
+                i = match.end() + 1
+            else:
+                in_string, i = False, match.end()
+            continue
+
+        match = _OBJECT_TOKEN.search(text, i)
+        if match is None:
+            return
+
+        ch, i = match.group(), match.end()
+
+        if ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                yield text[start:i]
+
+
+def extract_json_object(text: str, schema: Type[BaseModel]):
+    """
+    Return the first object in text that validates against schema.
+    """
+
+    # Fast path: everything from the first "{" to the last "}" is one
+    # object (bare JSON, or JSON wrapped in a fence or a sentence)
+    start, end = text.find("{"), text.rfind("}")
+    if 0 <= start < end:
+        candidate = text[start:end + 1]
+        try:
+            return validator_for(schema).validate_json(candidate)
+        except ValidationError as e:
+            if not any(err["type"] == "json_invalid" for err in e.errors()):
+                raise JSONExtractionError(
+                    f"No JSON object matches {schema.__name__}: {e}",
+                    candidate=candidate,
+                    error=e
+                )
+
+    first = None
+
+    for candidate in iter_json_objects(text):
+        try:
+            return validator_for(schema).validate_json(candidate)
+        except ValidationError as e:
+            if first is None:
+                first = (candidate, e)
+
+    if first is None:
+        raise JSONExtractionError("No JSON object found in LLM output.")
+
+    candidate, error = first
+    raise JSONExtractionError(
+        f"No JSON object matches {schema.__name__}: {error}",
+        candidate=candidate,
+        error=error
+    )
@@ -17,6 +17,7 @@ class LangGraphRecorder:
         self.edge_prompts: Dict[Tuple[str, str], List[str]] = {}        # dictionary: key → (from_node, to_node) (tuple for immutability) & value → list of prompts
         self.choice_rationales: Dict[Tuple[str, str], Dict[str, str]] = {}
         self.node_choices = {}
+        self.pruned_edges = set()       # explored by beam search but not on a kept path
         # {(parent_node, choice): {"rationale": "...", "purpose": "..."}}
 
     def add_choice_rationale(self, parent_node: str, choice: str, rationale: str, purpose: str):
@@ -43,6 +44,9 @@ class LangGraphRecorder:
         self.add_node(to_node)
         self.edges.append((from_node, to_node))
 
+    def mark_pruned(self, from_node: str, to_node: str):
+        self.pruned_edges.add((from_node, to_node))
+
     def add_prompt_to_edge(self, from_node: str, to_node: str, prompt: str):
         key = (from_node, to_node)
         self.edge_prompts.setdefault(key, []).append(prompt)
@@ -89,7 +93,10 @@ class LangGraphRecorder:
             else:
                 label = ""
 
-            dot.edge(a, b, label=label)
+            if (a, b) in self.pruned_edges:
+                dot.edge(a, b, label=label, style="dashed", color="grey")
+            else:
+                dot.edge(a, b, label=label)
 
         outpath = dot.render(filename, cleanup=True)
         print(f"LangGraph saved to {outpath}")
@@ -1,8 +1,11 @@
 # core/llm_structured.py
 
-import re
 import json
-from typing import Type, TypeVar
+import atexit
+import hashlib
+import functools
+from collections import Counter
+from typing import Callable, Type, TypeVar
 from pydantic import BaseModel, ValidationError
 import sys
 import os
@@ -12,8 +15,20 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from llm.local_llama_client import call_llm
-from langsmith import traceable
+from llm.local_llama_client import acall_llm, default_model
+from llm.profiles import GenerationProfile, profile_for
+from llm.providers import resolve_provider
+from core.json_stream import (
+    IncrementalJSONParser,
+    JSONExtractionError,
+    SchemaPrefixError,
+    extract_json_object,
+)
+from llm.routing import get_routing_stats, min_confidence, resolve_route
+from llm.runtime import run_on_llm_loop, run_sync
+from llm.single_flight import single_flight_group
+from llm.usage import current_stage
+from llm.tracing import traceable
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,18 +36,66 @@ load_dotenv()
 T = TypeVar("T", bound=BaseModel)
 
 
+class StructuredOutputError(RuntimeError):
+    """
+    The model never produced output matching the schema.
+    """
+
+
+# How structured answers were obtained: "direct" when the response was
+# the bare JSON object (what constrained decoding produces), "fallback"
+# when it had to be extracted from surrounding text, plus retries and
+# failed attempts. Only touched from the LLM loop thread.
+_parse_stats = Counter()
+
+
+def structured_stats() -> dict:
+    return dict(_parse_stats)
+
+
+def _report_structured_stats():
+    if _parse_stats["fallback"] or _parse_stats["failed_attempts"]:
+        print(
+            f"[StructuredLLM] direct={_parse_stats['direct']} fallback={_parse_stats['fallback']} "
+            f"retries={_parse_stats['retries']} repairs={_parse_stats['repairs']} "
+            f"failed_attempts={_parse_stats['failed_attempts']}"
+        )
+
+
+atexit.register(_report_structured_stats)
+
+# Identical concurrent structured calls share one run of the retry loop
+_flights = single_flight_group("structured")
+
+
+@functools.lru_cache(maxsize=None)
+def json_schema_for(schema: Type[BaseModel]) -> dict:
+    """
+    JSON schema sent to providers for constrained decoding.
+    """
+    return schema.model_json_schema()
+
+
 class StructuredLLM:
-    def __init__(self, model: str = None):
+    def __init__(self, model: str = None, stream: bool = None, constrained: bool = None):
 
-        provider = os.getenv("LLM_PROVIDER", "ollama")
+        # An explicit model pins every call to it; otherwise llm/routing.py
+        # may try a smaller model first
+        self.routed = model is None
 
-        if model:
-            self.model = model
-        else:
-            if provider == "nvidia":
-                self.model = os.getenv("NVIDIA_DEFAULT_MODEL", "meta/llama3-70b-instruct")
-            else:
-                self.model = os.getenv("OLLAMA_DEFAULT_MODEL", "mistral")
+        # Stream and stop at the end of the JSON object (LLM_STREAMING=0 disables)
+        if stream is None:
+            stream = os.getenv("LLM_STREAMING", "1").lower() not in ("0", "false", "no")
+        self.stream = stream
+
+        # Send the schema so the provider can only emit matching JSON
+        # (LLM_CONSTRAINED_DECODING=0 falls back to prompt-only enforcement)
+        if constrained is None:
+            constrained = os.getenv("LLM_CONSTRAINED_DECODING", "1").lower() not in ("0", "false", "no")
+        self.constrained = constrained
+
+        # None: the default model of the stage's provider, resolved per call
+        self.model = model
 
     @traceable(name="Structured LLM Call")
     def call(
@@ -41,12 +104,125 @@ class StructuredLLM:
             schema: Type[T],
             *,
             system_context: str | None = None,
-            max_retries: int = 2
+            max_retries: int = 2,
+            validate: Callable[[T], T] | None = None
     ) -> T:
         """
         Structured LLM call that enforces strict JSON output
         and parses it into the provided schema.
+        validate may check or normalise the parsed answer; raising
+        ValueError escalates to the next model in the route (or fails
+        the call on the last one).
+        Blocking wrapper around acall.
+        """
+
+        return run_sync(self._acall(prompt, schema, system_context, max_retries, validate))
+
+    @traceable(name="Async Structured LLM Call")
+    async def acall(
+            self,
+            prompt: str,
+            schema: Type[T],
+            *,
+            system_context: str | None = None,
+            max_retries: int = 2,
+            validate: Callable[[T], T] | None = None
+    ) -> T:
         """
+        Awaitable version of call, so independent calls can overlap.
+        """
+
+        return await run_on_llm_loop(
+            self._acall(prompt, schema, system_context, max_retries, validate)
+        )
+
+    async def _acall(
+            self,
+            prompt: str,
+            schema: Type[T],
+            system_context: str | None,
+            max_retries: int,
+            validate: Callable[[T], T] | None
+    ) -> T:
+
+        if self.routed:
+            provider = resolve_provider()
+            route = resolve_route(schema.__name__, current_stage(), default_model(provider), provider)
+        else:
+            route = [self.model]
+
+        stats = get_routing_stats()
+
+        # Every model but the last gets one attempt; any doubt escalates
+        for model in route[:-1]:
+            try:
+                result = await self._shared_acall_model(model, prompt, schema, system_context, 0)
+                if validate:
+                    result = validate(result)
+            except (StructuredOutputError, ValueError) as e:
+                reason = "invalid" if isinstance(e, ValueError) else "schema"
+                print(f"[StructuredLLM] {model} escalated ({reason}): {e}")
+                stats.escalate(schema.__name__, model, reason)
+                continue
+
+            confidence = getattr(result, "confidence", None)
+            if confidence is not None and confidence < min_confidence():
+                print(f"[StructuredLLM] {model} escalated (confidence {confidence})")
+                stats.escalate(schema.__name__, model, "confidence")
+                continue
+
+            stats.accept(schema.__name__, model)
+            return result
+
+        model = route[-1]
+        result = await self._shared_acall_model(model, prompt, schema, system_context, max_retries)
+        if validate:
+            result = validate(result)
+
+        stats.accept(schema.__name__, model)
+        return result
+
+    async def _shared_acall_model(
+            self,
+            model: str,
+            prompt: str,
+            schema: Type[T],
+            system_context: str | None,
+            max_retries: int
+    ) -> T:
+
+        # Output cap, temperature and context size for this schema
+        profile = profile_for(schema.__name__, current_stage())
+
+        key = hashlib.sha256(json.dumps([
+            model,
+            schema.__module__,
+            schema.__qualname__,
+            prompt,
+            system_context,
+            max_retries,
+            self.stream,
+            self.constrained,
+            repr(profile),
+        ]).encode("utf-8")).hexdigest()
+
+        result, _ = await _flights.do(
+            key,
+            lambda: self._acall_model(model, prompt, schema, system_context, max_retries, profile)
+        )
+
+        # Every caller gets its own copy; validate hooks may modify it
+        return result.model_copy(deep=True)
+
+    async def _acall_model(
+            self,
+            model: str,
+            prompt: str,
+            schema: Type[T],
+            system_context: str | None,
+            max_retries: int,
+            profile: GenerationProfile
+    ) -> T:
 
         json_enforcer = """
     You must respond ONLY with valid JSON.
@@ -56,41 +232,101 @@ class StructuredLLM:
     Only output the final JSON object.
     """
 
-        # Build full prompt
+        # Static instructions and context go into the system message so
+        # every call with the same system_context shares one cacheable prefix
         if system_context:
-            full_prompt = (
-                f"{system_context}\n\n"
-                f"{json_enforcer}\n\n"
-                f"{prompt}"
-            )
+            system_prompt = f"{system_context}\n\n{json_enforcer}"
         else:
-            full_prompt = f"{json_enforcer}\n\n{prompt}"
+            system_prompt = json_enforcer
+
+        json_schema = json_schema_for(schema) if self.constrained else None
+
+        # Set when an attempt produced a complete object that failed
+        # validation; the next attempt then only asks for a fix
+        repair = None
 
         # Retry loop
         for attempt in range(max_retries + 1):
-            raw_output = call_llm(full_prompt, model=self.model)
+            parser = IncrementalJSONParser(schema) if self.stream else None
+            stream_error = None
+
+            if attempt:
+                _parse_stats["retries"] += 1
+
+            if repair:
+                _parse_stats["repairs"] += 1
+                call_prompt, call_system = _repair_prompt(schema, *repair), REPAIR_SYSTEM
+            else:
+                call_prompt, call_system = prompt, system_prompt
 
             try:
-                # Extract first JSON object from response
-                json_match = re.search(r"\{.*\}", raw_output, re.DOTALL)
+                # Retries must not be answered by the cached (failed) response
+                raw_output = await acall_llm(
+                    call_prompt,
+                    model=model,
+                    system=call_system,
+                    refresh=attempt > 0,
+                    on_token=parser.feed if parser else None,
+                    json_schema=json_schema,
+                    profile=profile
+                )
+            except SchemaPrefixError as e:
+                # Generation was aborted mid-stream
+                raw_output, stream_error = parser.text, e
 
-                if not json_match:
-                    raise ValueError("No JSON object found in LLM output.")
+            try:
+                if stream_error:
+                    raise stream_error
 
-                json_str = json_match.group(0)
+                if parser and parser.complete:
+                    # Already validated while streaming
+                    result = parser.value()
+                else:
+                    result = extract_json_object(raw_output, schema)
 
-                parsed = json.loads(json_str)
-                if "reason" not in parsed:
-                    parsed["reason"] = "No reason provided by model."
+                _parse_stats["direct" if raw_output.lstrip().startswith("{") else "fallback"] += 1
 
-                return schema(**parsed)     # ** is used for dictionary unpacking
+                return result
 
             except Exception as e:
+                _parse_stats["failed_attempts"] += 1
                 print(f"[StructuredLLM] Attempt {attempt} failed")
                 print("Raw output:", raw_output)
                 print("Error:", str(e))
 
+                # Only a complete but invalid object can be repaired;
+                # anything else is generated again from the full prompt
+                if isinstance(e, JSONExtractionError) and e.candidate:
+                    repair = (e.candidate, e.error)
+                else:
+                    repair = None
+
                 if attempt == max_retries:
-                    raise RuntimeError(
+                    raise StructuredOutputError(
                         f"Structured LLM failed after {max_retries} retries."
-                    )
\ No newline at end of file
+                    )
+
+
+REPAIR_SYSTEM = """
+    You repair JSON so that it matches a JSON schema.
+    Keep every value that is already valid.
+    Respond ONLY with the corrected JSON object.
+    """
+
+
+def _repair_prompt(schema: Type[BaseModel], bad_output: str, error: Exception) -> str:
+    """
+    Short follow-up that carries only the rejected object and the
+    validation error instead of the full original context.
+    """
+
+    return f"""JSON schema:
+{json.dumps(json_schema_for(schema))}
+
+Invalid JSON:
+{bad_output}
+
+Validation error:
+{error}
+
+Return the corrected JSON object."""
@@ -4,8 +4,11 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import json
+import asyncio
 from dotenv import load_dotenv
-from llm.local_llama_client import call_llm
+from llm.deadlines import BUDGET_ERRORS
+from llm.local_llama_client import acall_llm
+from llm.usage import get_usage_tracker, track_stage, usage_node, write_usage_report
 
 load_dotenv()
 
@@ -40,8 +43,26 @@ def extract_all_nodes(tree, parents=None):
     return results
 
 
+def stub_description(node, reason: str) -> str:
+    """
+    Placeholder written when a node could not be described in time.
+    It has no Key Functions section, so no function spec is generated.
+    """
+
+    return f"""# {node['full_path']}
+
+> Not generated: {reason}
+> Rerun the node description stage to replace this stub.
+
+## Purpose
+
+{node['description'] or 'No description available.'}
+"""
+
+
 # Main Builder
 
+@track_stage("nodes")
 def build_node_descriptions(
     pruned_structure_path: str,
     stack_meta_path: str,
@@ -67,49 +88,46 @@ def build_node_descriptions(
 
     os.makedirs(output_base_dir, exist_ok=True)
 
-    for node in all_nodes:
-
-        parent_text = ""
-        for p in node["parents"]:
-            parent_text += f"- {p['name']} ({p['type']})\n"
+    instructions = """
+    You are a senior software architect documenting a project.
 
-        system_prompt = """
-        You are a senior software architect documenting a project.
+    Strict Rules:
+    - Remain fully consistent with the provided global architecture.
+    - Do NOT introduce new architectural layers.
+    - Do NOT change tech stack.
+    - You MAY introduce internal helper functions and utilities
+      if they align with the architecture.
+    - Do NOT implement full code.
+    - Do NOT output raw JSON.
+    - Output must be clean, structured Markdown.
 
-        Strict Rules:
-        - Remain fully consistent with the provided global architecture.
-        - Do NOT introduce new architectural layers.
-        - Do NOT change tech stack.
-        - You MAY introduce internal helper functions and utilities
-          if they align with the architecture.
-        - Do NOT implement full code.
-        - Do NOT output raw JSON.
-        - Output must be clean, structured Markdown.
+    You MUST follow this exact structure:
 
-        You MUST follow this exact structure:
+    # <Full Path>
 
-        # <Full Path>
+    ## Purpose
 
-        ## Purpose
+    ## Responsibilities
 
-        ## Responsibilities
+    ## Key Functions (Conceptual)
 
-        ## Key Functions (Conceptual)
+    For each function:
+    - Provide a clear function name.
+    - Provide conceptual parameters (names only).
+    - Provide conceptual return value.
+    - Provide short description of responsibility.
+    - Do NOT implement code.
+    - Do NOT invent functions outside architectural scope.
 
-        For each function:
-        - Provide a clear function name.
-        - Provide conceptual parameters (names only).
-        - Provide conceptual return value.
-        - Provide short description of responsibility.
-        - Do NOT implement code.
-        - Do NOT invent functions outside architectural scope.
+    ## Interactions
 
-        ## Interactions
+    ## Future Extensibility
+    """
 
-        ## Future Extensibility
-        """
+    # Everything that is identical for every node forms one stable system
+    # prefix, so the provider can reuse its KV cache across nodes
+    system_prompt = f"""{instructions}
 
-        user_prompt = f"""
 USER REQUIREMENT:
 {user_requirement}
 
@@ -118,7 +136,15 @@ TECH STACK:
 
 GLOBAL ARCHITECTURE:
 {global_description}
+"""
+
+    async def describe(node):
+
+        parent_text = ""
+        for p in node["parents"]:
+            parent_text += f"- {p['name']} ({p['type']})\n"
 
+        user_prompt = f"""
 CURRENT NODE:
 Name: {node['name']}
 Type: {node['type']}
@@ -142,11 +168,16 @@ Important:
 - Do NOT redefine architecture.
 """
 
-        full_prompt = system_prompt + "\n\n" + user_prompt
-
         print(f"Generating description for: {node['full_path']}")
 
-        response = call_llm(full_prompt)
+        try:
+            with usage_node(node["full_path"]):
+                response = await acall_llm(user_prompt, system=system_prompt)
+        except BUDGET_ERRORS as e:
+            # Out of time or tokens: keep going with a stub for this node
+            print(f"Budget exhausted, writing stub for: {node['full_path']} ({e})")
+            get_usage_tracker().mark_degraded("nodes", str(e), [node["full_path"]])
+            response = stub_description(node, str(e))
 
         # Build output file path
         safe_path = node["full_path"].replace("\\", "/")
@@ -157,6 +188,12 @@ Important:
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(response)
 
+    async def describe_all():
+        # Requests overlap; llm/governor.py bounds concurrency per provider
+        await asyncio.gather(*(describe(node) for node in all_nodes))
+
+    asyncio.run(describe_all())
+
     print("\nAll node descriptions generated successfully.")
 
 # CLI
@@ -176,4 +213,6 @@ if __name__ == "__main__":
         stack_meta_path=args.meta,
         global_description_path=args.global_desc,
         output_base_dir=args.output_dir
-    )
\ No newline at end of file
+    )
+
+    write_usage_report()
\ No newline at end of file
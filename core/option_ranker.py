@@ -0,0 +1,94 @@
+# core/option_ranker.py
+
+import os
+import re
+import math
+from collections import Counter
+
+from core.decision_tree import DecisionTree
+
+# Bounded prompts for wide decision nodes.
+#
+# A node with more than OPTION_SHORTLIST_K options (default 24) is
+# pre-ranked locally with BM25 against the requirement and the path so
+# far, and only the top K reach the model. An option's text is its name
+# (counted twice) plus the names of its own sub-options, so "Node.js"
+# also matches a requirement that only mentions "Express".
+# When the shortlist is longer than OPTION_TOURNAMENT_CHUNK (default
+# 12), main_runner runs a tournament: the candidates are split into
+# chunks that are decided in parallel, and the winners play again until
+# one chunk is left. No prompt lists more than max(K, chunk) options.
+
+_STOPWORDS = frozenset("a an and for in of on or the to with".split())
+
+K1 = 1.2
+B = 0.75
+
+
+def shortlist_size() -> int:
+    return max(2, int(os.getenv("OPTION_SHORTLIST_K", "24")))
+
+
+def tournament_chunk() -> int:
+    return max(2, int(os.getenv("OPTION_TOURNAMENT_CHUNK", "12")))
+
+
+def _tokens(text: str) -> list[str]:
+    return [w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in _STOPWORDS]
+
+
+def rank_options(tree: DecisionTree, node_id: int, query: str) -> list[int]:
+    """
+    Child ids of node_id, best BM25 match for query first. Ties keep
+    the tree order.
+    """
+
+    children = list(tree.children(node_id))
+    docs = []
+
+    for child in children:
+        name = _tokens(tree.names[child])
+        docs.append(Counter(name * 2 + _tokens(" ".join(tree.child_names(child)))))
+
+    terms = set(_tokens(query))
+    avg_length = sum(sum(doc.values()) for doc in docs) / len(docs) if docs else 0.0
+    df = Counter(term for doc in docs for term in terms if term in doc)
+
+    def score(doc: Counter) -> float:
+        length = sum(doc.values())
+        total = 0.0
+        for term in terms:
+            tf = doc.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - df[term] + 0.5) / (df[term] + 0.5))
+            total += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / (avg_length or 1.0)))
+        return total
+
+    scores = [score(doc) for doc in docs]
+    order = sorted(range(len(children)), key=lambda i: -scores[i])
+
+    return [children[i] for i in order]
+
+
+def shortlist_options(tree: DecisionTree, node_id: int, query: str, keep: tuple = (), ranked: bool = False) -> list[str]:
+    """
+    Option names to show the model for node_id: all of them for a
+    normal node, the top K (plus any names in keep) for a wide one.
+    Returned in tree order so the ranking does not bias the model, or
+    best match first with ranked (the tournament spreads that order
+    across its chunks).
+    """
+
+    if tree.child_count[node_id] <= shortlist_size():
+        return tree.child_names(node_id)
+
+    order = rank_options(tree, node_id, query)
+    top = order[:shortlist_size()]
+    selected = top + [child for child in order[shortlist_size():] if tree.names[child] in keep]
+
+    if ranked:
+        return [tree.names[child] for child in selected]
+
+    selected = set(selected)
+    return [tree.names[child] for child in tree.children(node_id) if child in selected]
@@ -1,13 +1,14 @@
 # core/schemas.py
 
 from pydantic import BaseModel, field_validator
-from typing import List
+from typing import List, Optional
 
 # Node Decision Schema (Single Choice Mode)
 class NodeDecision(BaseModel):
     choice: str
     rationale: str
     purpose: str
+    confidence: Optional[float] = None      # self-reported, 0-1; used for model routing
 
     @field_validator("choice")
     def validate_choice(cls, v):
@@ -15,12 +16,52 @@ class NodeDecision(BaseModel):
             raise ValueError("choice must be non-empty string")
         return v.strip()
 
+    @field_validator("confidence")
+    def validate_confidence(cls, v):
+        return _normalize_confidence(v)
+
+# Several consecutive decisions in one answer (lookahead traversal)
+class PathDecision(BaseModel):
+    steps: List[NodeDecision]
+
+    @field_validator("steps")
+    def validate_steps(cls, v):
+        if not v:
+            raise ValueError("steps must contain at least one choice")
+        return v
+
+# Best options first, with confidences (beam traversal)
+class OptionRanking(BaseModel):
+    ranking: List[NodeDecision]
+
+    @field_validator("ranking")
+    def validate_ranking(cls, v):
+        if not v:
+            raise ValueError("ranking must contain at least one option")
+        return v
+
 class PruneDecision(BaseModel):
     decision: str
-    reason: str
+    reason: str = "No reason provided by model."
+    confidence: Optional[float] = None
 
     @field_validator("decision")
     def validate_decision(cls, v):
         if v.upper() not in ("KEEP", "PRUNE"):
             raise ValueError("decision must be KEEP or PRUNE")
-        return v.upper()
\ No newline at end of file
+        return v.upper()
+
+    @field_validator("confidence")
+    def validate_confidence(cls, v):
+        return _normalize_confidence(v)
+
+
+def _normalize_confidence(v):
+    if v is None:
+        return v
+    # Some models answer in percent
+    if 1 < v <= 100:
+        v = v / 100
+    if not 0 <= v <= 1:
+        raise ValueError("confidence must be between 0 and 1")
+    return v
@@ -0,0 +1,351 @@
+# core/stack_index.py
+# Run:
+# python core/stack_index.py --add data/stack_meta.json outputs/batch/*/stack_meta.json
+# python core/stack_index.py --query "backend for a cake store"
+
+import os
+import re
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import glob
+import json
+import math
+import atexit
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from core.decision_tree import DecisionTree
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, ".cache", "stack_index.json")
+
+# Reuse of earlier stack selections for near-duplicate requirements.
+#
+# Every finished traversal is added to a local TF-IDF index of
+# requirements (no external services). With reuse on, traverse looks up
+# the most similar past requirement and, above the threshold, walks its
+# stored path instead of asking the model at every level. A stored
+# decision is only asked again when the new requirement contradicts it:
+# a term that is new compared to the stored requirement names one of
+# the other options at that level. If the model then picks something
+# else, the rest of the path is chosen normally.
+#
+# Settings:
+#   STACK_REUSE=1                turn reuse on (also --reuse on the runners)
+#   STACK_REMEMBER=1             add finished selections to the index without
+#                                reusing (also --remember); reuse implies it
+#   STACK_REUSE_THRESHOLD        cosine similarity needed to reuse a path (default 0.6)
+#   STACK_REUSE_INDEX            index file (default .cache/stack_index.json)
+
+_STOPWORDS = frozenset("""
+a an and app application are as at be build building by create for from i in is it
+me my need of on or our platform project should that the this to using we web
+website which will with want
+""".split())
+
+
+def tokenize(text: str) -> list[str]:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    # Cheap plural folding: "shops" and "shop" are the same term
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+            for w in words if w not in _STOPWORDS]
+
+
+def reuse_enabled() -> bool:
+    return os.getenv("STACK_REUSE", "0") == "1"
+
+
+def remember_enabled(reuse: bool | None = None) -> bool:
+    """
+    Whether finished selections are added to the index. Plain runs
+    leave it alone, so they do not change later runs.
+    """
+    if reuse or (reuse is None and reuse_enabled()):
+        return True
+    return os.getenv("STACK_REMEMBER", "0") == "1"
+
+
+def reuse_threshold() -> float:
+    return float(os.getenv("STACK_REUSE_THRESHOLD", "0.6"))
+
+
+@dataclass
+class StoredPath:
+    requirement: str
+    start_node: str
+    hops: list              # [{"choice", "rationale", "purpose"}], root to leaf
+
+
+@dataclass
+class Proposal:
+    stored: StoredPath
+    similarity: float
+    contested: set          # levels whose stored decision must be asked again
+
+
+class StackIndex:
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: list[StoredPath] = []
+        self._terms: list[Counter] = []
+        self._postings = {}         # term → entry indexes
+        self._norms = None          # per-entry TF-IDF norms, reset when entries change
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for entry in json.load(f)["entries"]:
+                        self._add(StoredPath(**entry))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"[StackReuse] Index {path} not loaded: {e}")
+
+    # ------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------
+
+    def _add(self, stored: StoredPath):
+        index = len(self.entries)
+        terms = Counter(tokenize(stored.requirement))
+
+        self.entries.append(stored)
+        self._terms.append(terms)
+        for term in terms:
+            self._postings.setdefault(term, []).append(index)
+        self._norms = None
+
+    def add(self, requirement: str, start_node: str, tech_stack: list, choices: dict):
+        """
+        Store a finished traversal. choices maps (parent, choice) to its
+        rationale and purpose, as in LangGraphRecorder.choice_rationales.
+        """
+
+        hops = []
+        parent = start_node
+        for choice in tech_stack:
+            data = choices.get((parent, choice), {})
+            hops.append({"choice": choice, "rationale": data.get("rationale", ""), "purpose": data.get("purpose", "")})
+            parent = choice
+
+        with self._lock:
+            # A requirement seen again replaces its older path
+            for entry in self.entries:
+                if entry.requirement == requirement and entry.start_node == start_node:
+                    entry.hops = hops
+                    return
+            self._add(StoredPath(requirement, start_node, hops))
+
+    def add_stack_meta(self, path: str) -> bool:
+        """
+        Import a stack_meta.json written by main_runner or the batch runner.
+        """
+
+        with open(path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        stack = meta.get("tech_stack") or []
+        if not stack:
+            return False
+
+        choices = {}
+        for key, data in meta.get("technology_choices", {}).items():
+            parent, _, choice = key.partition(" -> ")
+            choices[(parent, choice)] = data
+
+        # The start node is the parent of the first choice
+        start_node = next((p for (p, c) in choices if c == stack[0]), None)
+        if start_node is None:
+            return False
+
+        self.add(meta["user_initial_prompt"], start_node, stack, choices)
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+
+        with self._lock:
+            data = {"entries": [entry.__dict__ for entry in self.entries]}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    # ------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self.entries)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _entry_norms(self) -> list:
+        if self._norms is None:
+            self._norms = [
+                math.sqrt(sum((n * self._idf(t)) ** 2 for t, n in terms.items())) or 1.0
+                for terms in self._terms
+            ]
+        return self._norms
+
+    def most_similar(self, requirement: str, start_node: str) -> tuple[StoredPath | None, float]:
+        query = Counter(tokenize(requirement))
+
+        with self._lock:
+            if not query or not self.entries:
+                return None, 0.0
+
+            norms = self._entry_norms()
+            weights = {t: n * self._idf(t) for t, n in query.items()}
+            query_norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+
+            # Only entries sharing a term can score above zero
+            scores = Counter()
+            for term, weight in weights.items():
+                idf = self._idf(term)
+                for i in self._postings.get(term, ()):
+                    scores[i] += weight * self._terms[i][term] * idf
+
+            best, best_score = None, 0.0
+            for i, score in scores.items():
+                if self.entries[i].start_node != start_node:
+                    continue
+                similarity = score / (norms[i] * query_norm)
+                if similarity > best_score:
+                    best, best_score = self.entries[i], similarity
+
+        return best, best_score
+
+    def propose(self, requirement: str, start_node: str, tree: DecisionTree) -> Proposal | None:
+        """
+        Stored path to reuse for requirement, or None below the threshold.
+        """
+
+        stored, similarity = self.most_similar(requirement, start_node)
+        get_reuse_stats().lookup(stored is not None and similarity >= reuse_threshold())
+
+        if stored is None or similarity < reuse_threshold():
+            return None
+
+        return Proposal(stored, similarity, contested_levels(tree, stored, requirement))
+
+
+def contested_levels(tree: DecisionTree, stored: StoredPath, requirement: str) -> set:
+    """
+    Levels where a term that the new requirement adds over the stored
+    one names a different option than the stored choice.
+    """
+
+    new_terms = set(tokenize(requirement)) - set(tokenize(stored.requirement))
+    contested = set()
+
+    node = tree.find(stored.start_node)
+
+    for level, hop in enumerate(stored.hops):
+        if node is None or not new_terms:
+            break
+
+        chosen = set(tokenize(hop["choice"]))
+        for child in tree.children(node):
+            name = tree.names[child]
+            if name != hop["choice"] and (set(tokenize(name)) - chosen) & new_terms:
+                contested.add(level)
+                break
+
+        node = tree.child_named(node, hop["choice"])
+
+    return contested
+
+
+class ReuseStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.reused = 0             # decisions taken from a stored path without a call
+        self.revalidated = 0        # contested decisions asked again
+        self.diverged = 0           # re-asked decisions that changed the stored choice
+
+    def lookup(self, hit: bool):
+        with self._lock:
+            self.lookups += 1
+            self.hits += int(hit)
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "reused_decisions": self.reused,
+                "revalidated": self.revalidated,
+                "diverged": self.diverged,
+            }
+
+
+_stats = ReuseStats()
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_reuse_stats() -> ReuseStats:
+    return _stats
+
+
+def get_stack_index() -> StackIndex:
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            _index = StackIndex(os.getenv("STACK_REUSE_INDEX", DEFAULT_INDEX_PATH))
+        return _index
+
+
+def _report_reuse_stats():
+    s = _stats.stats()
+    if s["lookups"]:
+        print(
+            f"[StackReuse] lookups={s['lookups']} hits={s['hits']} ({s['hit_rate']:.0%}) "
+            f"reused_decisions={s['reused_decisions']} revalidated={s['revalidated']} diverged={s['diverged']}"
+        )
+
+
+atexit.register(_report_reuse_stats)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Build or query the stack reuse index.")
+    parser.add_argument("--add", nargs="*", default=[], help="stack_meta.json files (globs allowed)")
+    parser.add_argument("--query", help="Show the closest stored requirement")
+    parser.add_argument("--start-node", default="Core Application & Web Stacks")
+    args = parser.parse_args()
+
+    index = get_stack_index()
+
+    added = 0
+    for pattern in args.add:
+        for path in glob.glob(pattern) or [pattern]:
+            added += int(index.add_stack_meta(path))
+    if args.add:
+        index.save()
+        print(f"Added {added} stack selections; index has {len(index.entries)} ({index.path})")
+
+    if args.query:
+        stored, similarity = index.most_similar(args.query, args.start_node)
+        if stored is None:
+            print("No similar requirement.")
+        else:
+            print(f"{similarity:.2f}  {stored.requirement}")
+            print(" → ".join(hop["choice"] for hop in stored.hops))
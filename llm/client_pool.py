@@ -0,0 +1,105 @@
+# llm/client_pool.py
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+    import ollama
+
+# Long-lived provider clients, one per Ollama model or HTTP endpoint.
+# They are only ever used from the LLM event loop (llm/runtime.py),
+# so their keep-alive connections are reused across calls.
+# Provider SDKs are imported when the first client is created, so a
+# process only pays for the provider it actually uses.
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _keepalive_limits() -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "32")),
+        max_keepalive_connections=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "16")),
+        keepalive_expiry=float(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", "120")),
+    )
+
+
+def _timeout() -> "httpx.Timeout":
+    import httpx
+
+    # Longest silence allowed between bytes; whole-call deadlines are in llm/deadlines.py
+    return httpx.Timeout(float(os.getenv("LLM_HTTP_TIMEOUT", "300")), connect=10.0)
+
+
+def get_ollama_client(model: str) -> "ollama.AsyncClient":
+    key = ("ollama", model)
+
+    with _lock:
+        client = _clients.get(key)
+
+        if client is None:
+            import ollama
+
+            client = ollama.AsyncClient(
+                host=os.getenv("OLLAMA_HOST"),
+                limits=_keepalive_limits(),
+                timeout=_timeout(),
+            )
+            _clients[key] = client
+
+        return client
+
+
+def get_http_client(base_url: str, api_key: str | None = None) -> "httpx.AsyncClient":
+    """
+    Keep-alive HTTP client for an OpenAI-compatible endpoint.
+    """
+
+    key = ("http", base_url.rstrip("/"), api_key)
+
+    with _lock:
+        client = _clients.get(key)
+
+        if client is None:
+            import httpx
+
+            headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+            client = httpx.AsyncClient(
+                base_url=base_url.rstrip("/") + "/",
+                headers=headers,
+                limits=_keepalive_limits(),
+                timeout=_timeout(),
+            )
+            _clients[key] = client
+
+        return client
+
+
+def pooled_clients() -> dict:
+    with _lock:
+        return dict(_clients)
+
+
+async def aclose_clients():
+    """
+    Close pooled connections. Must run on the LLM event loop.
+    """
+
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+
+    if not clients:
+        return
+
+    import httpx
+
+    for client in clients:
+        inner = client if isinstance(client, httpx.AsyncClient) else getattr(client, "_client", None)
+        if isinstance(inner, httpx.AsyncClient):
+            await inner.aclose()
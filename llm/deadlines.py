@@ -0,0 +1,98 @@
+# llm/deadlines.py
+
+import os
+import time
+import asyncio
+
+from llm.usage import BudgetExceeded, stage_elapsed
+
+# Bounded latency for LLM calls.
+#
+# - Every call_llm has a deadline covering retries, hedges and
+#   failovers. When it passes, the request is cancelled (streams are
+#   closed, which stops generation server-side) and DeadlineExceeded
+#   is raised.
+# - A stage can have a wall-clock budget, counted from when the stage
+#   started. Calls are cut off at the end of the budget and no new
+#   provider calls start afterwards (cached answers are still served).
+#
+# Stages catch BUDGET_ERRORS to fall back to a degraded result instead
+# of failing the run; see UsageTracker.mark_degraded.
+#
+# Settings:
+#   LLM_CALL_TIMEOUT          seconds per call (default 0 = no limit)
+#   LLM_TIME_BUDGET_<STAGE>   seconds for a stage, e.g. LLM_TIME_BUDGET_PRUNING=600
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    An LLM call ran past its deadline and was cancelled.
+    """
+
+
+class StageTimeExceeded(DeadlineExceeded):
+    """
+    The stage has used up its wall-clock budget.
+    """
+
+
+# Budgets that trigger a stage's fallback path
+BUDGET_ERRORS = (BudgetExceeded, DeadlineExceeded)
+
+
+def call_timeout() -> float | None:
+    value = float(os.getenv("LLM_CALL_TIMEOUT", "0"))
+    return value if value > 0 else None
+
+
+def stage_time_budget(stage: str) -> float | None:
+    value = os.getenv(f"LLM_TIME_BUDGET_{stage.upper()}")
+    return float(value) if value else None
+
+
+def stage_time_left(stage: str) -> float | None:
+    budget = stage_time_budget(stage)
+    if budget is None:
+        return None
+    return budget - stage_elapsed(stage)
+
+
+def check_time_budget(stage: str):
+    left = stage_time_left(stage)
+    if left is not None and left <= 0:
+        raise StageTimeExceeded(
+            f"Stage '{stage}' used up its time budget of {stage_time_budget(stage):.0f}s."
+        )
+
+
+async def run_with_deadline(awaitable, stage: str):
+    """
+    Await an LLM request within the call deadline and whatever is left
+    of the stage's time budget, cancelling it if either runs out.
+    """
+
+    check_time_budget(stage)
+
+    timeout = call_timeout()
+    left = stage_time_left(stage)
+    stage_bound = left is not None and (timeout is None or left < timeout)
+    if stage_bound:
+        timeout = left
+
+    if timeout is None:
+        return await awaitable
+
+    start = time.monotonic()
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        # A timeout raised inside the request itself is not ours
+        if time.monotonic() - start < timeout:
+            raise
+
+        if stage_bound:
+            raise StageTimeExceeded(
+                f"Stage '{stage}' used up its time budget of {stage_time_budget(stage):.0f}s."
+            ) from None
+        raise DeadlineExceeded(f"LLM call exceeded its {timeout:.0f}s deadline.") from None
@@ -0,0 +1,727 @@
+# llm/fake_server.py
+# Run:
+# python -m llm.fake_server --port 11435 --ttft 0.3 --tokens-per-second 40 --jitter 0.2 --error-rate 0.05
+# then point the pipeline at it:
+#   LLM_PROVIDER=ollama OLLAMA_HOST=http://127.0.0.1:11435
+#   LLM_PROVIDER=nvidia NVIDIA_BASE_URL=http://127.0.0.1:11435/v1 NVIDIA_API_KEY=fake
+
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Stand-in LLM server for offline benchmarks and load tests.
+# Speaks the Ollama chat API (/api/chat, /api/generate) and the
+# OpenAI-compatible API (/v1/chat/completions, /v1/models), and returns
+# schema-valid, rule-generated answers for the pipeline's prompts.
+
+
+@dataclass
+class LatencyModel:
+    ttft: float = 0.2                       # seconds before the first token
+    tokens_per_second: float = 50.0         # decode speed (0 = instant)
+    prefill_tokens_per_second: float = 0.0  # extra TTFT per prompt token (0 = off)
+    jitter: float = 0.0                     # ± fraction applied to every delay
+
+
+@dataclass
+class FakeServerConfig:
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0         # fraction of requests answered with error_status
+    error_status: int = 503
+    malformed_rate: float = 0.0     # fraction of structured answers with broken JSON
+    chatter: bool = True            # append prose after JSON answers, like real models do
+    max_parallel: int = 4           # concurrent generations; the rest queue (OLLAMA_NUM_PARALLEL)
+    prefix_cache: bool = True       # repeated system messages skip prefill, like a KV prefix cache
+    seed: int | None = None
+
+
+# ============================================================
+# ANSWER GENERATION
+# ============================================================
+
+def _words(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _section(text: str, header: str) -> str:
+    """
+    Text following a header line, up to the next blank line.
+    """
+    match = re.search(re.escape(header) + r"[^\n]*\n+(.*?)(\n\s*\n|$)", text, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+def _stable_fraction(text: str) -> float:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+def detect_schema(prompt: str, schema_name: str | None = None) -> str:
+    if schema_name:
+        return schema_name
+
+    if "OPTIONS TREE" in prompt:
+        return "PathDecision"
+    if "OPTIONS TO RANK" in prompt:
+        return "OptionRanking"
+    if "AVAILABLE OPTIONS" in prompt:
+        return "NodeDecision"
+    if "Leaf Node Metadata" in prompt or "pruning engine" in prompt:
+        return "PruneDecision"
+    if '"project_meta"' in prompt:
+        return "ProjectBlueprint"
+    if "Conceptual Function Section" in prompt:
+        return "FileFunctionSpec"
+    if "CURRENT NODE" in prompt:
+        return "node_markdown"
+
+    return "markdown"
+
+
+def _node_decision(prompt: str) -> dict:
+    block = prompt.split("AVAILABLE OPTIONS", 1)[1]
+    options = [
+        line.strip()[2:].strip()
+        for line in block.splitlines()
+        if line.strip().startswith("- ")
+    ]
+
+    requirement = _words(_section(prompt, "USER REQUIREMENT"))
+
+    # Most lexical overlap with the requirement, first option on ties
+    choice = max(options, key=lambda o: len(_words(o) & requirement)) if options else ""
+
+    return {
+        "choice": choice,
+        "rationale": f"{choice} fits the stated requirement.",
+        "purpose": f"Provides the {choice} layer of the stack.",
+        # Unsure when nothing in the requirement mentions the option
+        "confidence": 0.9 if _words(choice) & requirement else 0.4,
+    }
+
+
+def _option_ranking(prompt: str) -> dict:
+    block = prompt.split("OPTIONS TO RANK", 1)[1]
+    options = [
+        line.strip()[2:].strip()
+        for line in block.splitlines()
+        if line.strip().startswith("- ")
+    ]
+
+    requirement = _words(_section(prompt, "USER REQUIREMENT"))
+
+    # Same preference as _node_decision, every option in order
+    ranked = sorted(options, key=lambda o: -len(_words(o) & requirement))
+
+    return {
+        "ranking": [
+            {
+                "choice": choice,
+                "rationale": f"{choice} fits the stated requirement.",
+                "purpose": f"Provides the {choice} layer of the stack.",
+                "confidence": max(0.05, round((0.9 if _words(choice) & requirement else 0.4) - 0.05 * i, 2)),
+            }
+            for i, choice in enumerate(ranked)
+        ]
+    }
+
+
+def _path_decision(prompt: str) -> dict:
+    block = prompt.split("OPTIONS TREE", 1)[1].split("\n", 1)[1]
+    requirement = _words(_section(prompt, "USER REQUIREMENT"))
+
+    # (indent, name) for the outline lines
+    outline = []
+    for line in block.splitlines():
+        match = re.match(r"(\s*)- (.+)", line)
+        if match:
+            outline.append((len(match.group(1)), match.group(2).strip()))
+        elif outline and not line.strip():
+            break
+
+    steps = []
+    start, indent = 0, outline[0][0] if outline else 0
+
+    # Walk down one level at a time, picking like _node_decision
+    while start < len(outline):
+        options = []
+        for i in range(start, len(outline)):
+            if outline[i][0] < indent:
+                break
+            if outline[i][0] == indent:
+                options.append(i)
+
+        best = max(options, key=lambda i: len(_words(outline[i][1]) & requirement))
+        choice = outline[best][1]
+        steps.append({
+            "choice": choice,
+            "rationale": f"{choice} fits the stated requirement.",
+            "purpose": f"Provides the {choice} layer of the stack.",
+            "confidence": 0.9 if _words(choice) & requirement else 0.4,
+        })
+
+        if best + 1 >= len(outline) or outline[best + 1][0] <= indent:
+            break
+        start, indent = best + 1, outline[best + 1][0]
+
+    return {"steps": steps}
+
+
+def _prune_decision(prompt: str) -> dict:
+    path_match = re.search(r"Full Path:\s*(\S+)", prompt)
+    path = path_match.group(1) if path_match else prompt
+
+    if re.search(r"Mandatory:\s*yes", prompt, re.IGNORECASE):
+        return {"decision": "KEEP", "reason": "Mandatory node.", "confidence": 1.0}
+
+    # Deterministic per path so reruns agree
+    if _stable_fraction(path) < 0.7:
+        return {"decision": "KEEP", "reason": "Relevant to the selected stack.", "confidence": 0.8}
+
+    return {"decision": "PRUNE", "reason": "Not needed for this requirement.", "confidence": 0.7}
+
+
+def _project_blueprint(prompt: str) -> dict:
+    return {
+        "project_meta": {
+            "name": "generated-project",
+            "version": "0.1.0",
+            "language": "TypeScript",
+            "type": "web",
+            "description": "Project generated by the fake LLM server.",
+        },
+        "architecture": {
+            "pattern": "layered",
+            "entry_points": [{"name": "main", "type": "http", "description": "Application entry point."}],
+            "components": [{"name": "api", "responsibility": "Serve HTTP requests."}],
+            "data_flow_summary": "Requests flow from the API layer to services and storage.",
+        },
+        "infrastructure": {
+            "external_services": [{"name": "database", "role": "storage", "purpose": "Persist data."}]
+        },
+        "dependencies": {
+            "internal": [{"name": "core", "purpose": "Shared domain logic."}],
+            "external": [{"name": "express", "version": "4.x", "purpose": "HTTP server."}],
+        },
+    }
+
+
+def _file_function_spec(prompt: str) -> dict:
+    path = _section(prompt, "File Path:").splitlines()[0] if _section(prompt, "File Path:") else "unknown"
+    section = prompt.split("Conceptual Function Section:", 1)[1]
+
+    names = re.findall(r"`?([A-Za-z_][A-Za-z0-9_]*)\(", section)
+    names = list(dict.fromkeys(names)) or ["main"]
+
+    return {
+        "file": path,
+        "functions": [
+            {
+                "name": name,
+                "parameters": [{"name": "input", "type": "any"}],
+                "return_type": "any",
+                "description": f"Implements {name}.",
+            }
+            for name in names
+        ],
+    }
+
+
+def _node_markdown(prompt: str) -> str:
+    path_match = re.search(r"Full Path:\s*(\S+)", prompt)
+    path = path_match.group(1) if path_match else "node"
+    name = re.sub(r"[^A-Za-z0-9]", "_", path.split("/")[-1]) or "node"
+
+    return f"""# {path}
+
+## Purpose
+
+Holds the {path} part of the project.
+
+## Responsibilities
+
+- Keep {path} consistent with the global architecture.
+
+## Key Functions (Conceptual)
+
+- `init_{name}(config)` → returns ready state. Initialises the module.
+- `handle_{name}(request)` → returns response. Handles the main responsibility.
+
+## Interactions
+
+Used by its parent module.
+
+## Future Extensibility
+
+Can be extended with additional handlers.
+"""
+
+
+def _global_markdown(prompt: str) -> str:
+    return """# Project Overview
+
+## Architecture
+
+A layered architecture with an API layer, services and persistence.
+
+## Responsibilities
+
+Each top-level folder owns one layer.
+
+## Scalability
+
+Stateless services scale horizontally.
+"""
+
+
+def generate_answer(prompt: str, schema_name: str | None = None) -> tuple[str, bool]:
+    """
+    Return (answer text, is_structured).
+    """
+
+    kind = detect_schema(prompt, schema_name)
+
+    builders = {
+        "NodeDecision": _node_decision,
+        "PathDecision": _path_decision,
+        "OptionRanking": _option_ranking,
+        "PruneDecision": _prune_decision,
+        "ProjectBlueprint": _project_blueprint,
+        "FileFunctionSpec": _file_function_spec,
+    }
+
+    if kind in builders:
+        return json.dumps(builders[kind](prompt), indent=2), True
+    if kind == "node_markdown":
+        return _node_markdown(prompt), False
+
+    return _global_markdown(prompt), False
+
+
+def tokenize(text: str) -> list:
+    # Word-ish pieces keep streaming realistic without a real tokenizer
+    return re.findall(r"\s*\S+|\s+", text) or [""]
+
+
+# ============================================================
+# SERVER
+# ============================================================
+
+class FakeLLMServer:
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: FakeServerConfig | None = None):
+        self.config = config or FakeServerConfig()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(self.config.max_parallel, 1))
+        self._prefixes = set()
+
+        self.stats = {"requests": 0, "errors": 0, "malformed": 0, "completion_tokens": 0}
+        self._stats_lock = threading.Lock()
+
+        server = self
+
+        class Handler(_Handler):
+            fake = server
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------
+
+    def random(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def jittered(self, seconds: float) -> float:
+        j = self.config.latency.jitter
+        if j <= 0 or seconds <= 0:
+            return max(seconds, 0.0)
+        return max(0.0, seconds * (1 + (self.random() * 2 - 1) * j))
+
+    def count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def cached_prefix_tokens(self, model: str, prefix: str) -> int:
+        """
+        Prompt tokens served from the emulated prefix cache.
+        """
+        if not self.config.prefix_cache or not prefix:
+            return 0
+
+        key = (model, hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+
+        with self._stats_lock:
+            if key in self._prefixes:
+                return len(prefix) // 4
+            self._prefixes.add(key)
+            return 0
+
+    def build_answer(self, prompt: str, schema_name: str | None) -> str:
+        answer, structured = generate_answer(prompt, schema_name)
+
+        if structured and self.config.malformed_rate and self.random() < self.config.malformed_rate:
+            self.count("malformed")
+            answer = answer.replace('"', "'", 2).rstrip("}")
+
+        if structured and self.config.chatter:
+            answer += "\n\nI chose this because it best matches the requirement. Let me know if you need changes."
+
+        return answer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fake: FakeLLMServer = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    # ------------------------------------------------------------
+    # Plumbing
+    # ------------------------------------------------------------
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b"{}"
+        return json.loads(body or b"{}")
+
+    def _send_json(self, payload: dict, status: int = 200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _inject_error(self) -> bool:
+        fake = self.fake
+        if fake.config.error_rate and fake.random() < fake.config.error_rate:
+            fake.count("errors")
+            status = fake.config.error_status
+            self._send_json({"error": f"injected error {status}", "status": status}, status=status)
+            return True
+        return False
+
+    def _generate(self, prompt: str, schema_name: str | None, emit, model: str = "fake", prefix: str = ""):
+        """
+        Sleep through the latency model and emit(token) per token.
+        Returns (prompt_tokens, cached_tokens, completion_tokens, seconds).
+        """
+        fake = self.fake
+        latency = fake.config.latency
+        start = time.monotonic()
+
+        prompt_tokens = len(prompt) // 4 + 1
+        cached_tokens = fake.cached_prefix_tokens(model, prefix)
+        answer = fake.build_answer(prompt, schema_name)
+        tokens = tokenize(answer)
+
+        with fake._slots:
+            ttft = latency.ttft
+            if latency.prefill_tokens_per_second > 0:
+                ttft += (prompt_tokens - cached_tokens) / latency.prefill_tokens_per_second
+            time.sleep(fake.jittered(ttft))
+
+            per_token = 1.0 / latency.tokens_per_second if latency.tokens_per_second > 0 else 0.0
+
+            for i, tok in enumerate(tokens):
+                if i and per_token:
+                    time.sleep(fake.jittered(per_token))
+                emit(tok)
+                # Counted as sent, so streams cut by the client are measured too
+                fake.count("completion_tokens")
+        return prompt_tokens, cached_tokens, len(tokens), time.monotonic() - start
+
+    # ------------------------------------------------------------
+    # Routes
+    # ------------------------------------------------------------
+
+    def do_GET(self):
+        if self.path.startswith("/v1/models"):
+            self._send_json({
+                "object": "list",
+                "data": [{"id": m, "object": "model", "owned_by": "fake"} for m in _known_models()],
+            })
+        elif self.path.startswith("/api/tags"):
+            self._send_json({"models": [{"name": m, "model": m} for m in _known_models()]})
+        elif self.path.startswith("/api/version"):
+            self._send_json({"version": "0.0.0-fake"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        self.fake.count("requests")
+
+        try:
+            body = self._read_json()
+        except json.JSONDecodeError:
+            self._send_json({"error": "invalid json"}, status=400)
+            return
+
+        if self._inject_error():
+            return
+
+        try:
+            if self.path.startswith("/api/chat"):
+                self._ollama_chat(body)
+            elif self.path.startswith("/api/generate"):
+                self._ollama_generate(body)
+            elif self.path.startswith("/v1/chat/completions"):
+                self._openai_chat(body)
+            else:
+                self._send_json({"error": "not found"}, status=404)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading (e.g. stream cut at the closing brace)
+            pass
+
+    # Ollama ------------------------------------------------------
+
+    def _ollama_chat(self, body: dict):
+        messages = body.get("messages", [])
+        prompt = "\n\n".join(m.get("content", "") for m in messages)
+        prefix = _system_prefix(messages)
+        schema_name = _schema_title(body.get("format"))
+        model = body.get("model", "fake")
+
+        if body.get("stream", True):
+            self._start_stream("application/x-ndjson")
+
+            def emit(tok):
+                line = {"model": model, "created_at": _now(), "message": {"role": "assistant", "content": tok}, "done": False}
+                self._write_chunk((json.dumps(line) + "\n").encode("utf-8"))
+
+            prompt_tokens, cached_tokens, completion_tokens, seconds = self._generate(prompt, schema_name, emit, model, prefix)
+
+            final = {
+                "model": model, "created_at": _now(),
+                "message": {"role": "assistant", "content": ""},
+                "done": True, "done_reason": "stop",
+                **_ollama_counts(prompt_tokens - cached_tokens, completion_tokens, seconds),
+            }
+            self._write_chunk((json.dumps(final) + "\n").encode("utf-8"))
+            self._end_stream()
+            return
+
+        parts = []
+        prompt_tokens, cached_tokens, completion_tokens, seconds = self._generate(prompt, schema_name, parts.append, model, prefix)
+
+        self._send_json({
+            "model": model, "created_at": _now(),
+            "message": {"role": "assistant", "content": "".join(parts)},
+            "done": True, "done_reason": "stop",
+            **_ollama_counts(prompt_tokens - cached_tokens, completion_tokens, seconds),
+        })
+
+    def _ollama_generate(self, body: dict):
+        model = body.get("model", "fake")
+
+        # Empty prompt = load/unload request (warm-up)
+        if not body.get("prompt"):
+            self._send_json({"model": model, "created_at": _now(), "response": "", "done": True, "done_reason": "load"})
+            return
+
+        parts = []
+        prompt_tokens, _, completion_tokens, seconds = self._generate(body["prompt"], _schema_title(body.get("format")), parts.append, model)
+
+        self._send_json({
+            "model": model, "created_at": _now(), "response": "".join(parts),
+            "done": True, "done_reason": "stop",
+            **_ollama_counts(prompt_tokens, completion_tokens, seconds),
+        })
+
+    # OpenAI-compatible -------------------------------------------
+
+    def _openai_chat(self, body: dict):
+        messages = body.get("messages", [])
+        prompt = "\n\n".join(_content_text(m.get("content", "")) for m in messages)
+        prefix = _system_prefix(messages)
+        schema_name = _schema_title(body.get("response_format")) or _schema_title(body.get("guided_json"))
+        model = body.get("model", "fake")
+        created = int(time.time())
+        completion_id = "chatcmpl-fake-" + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+
+        if body.get("stream"):
+            self._start_stream("text/event-stream")
+
+            def emit(tok):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": tok}, "finish_reason": None}],
+                }
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+            prompt_tokens, cached_tokens, completion_tokens, _ = self._generate(prompt, schema_name, emit, model, prefix)
+
+            final = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "usage": _openai_usage(prompt_tokens, cached_tokens, completion_tokens),
+            }
+            self._write_chunk(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._end_stream()
+            return
+
+        parts = []
+        prompt_tokens, cached_tokens, completion_tokens, _ = self._generate(prompt, schema_name, parts.append, model, prefix)
+
+        self._send_json({
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(parts)},
+                "finish_reason": "stop",
+            }],
+            "usage": _openai_usage(prompt_tokens, cached_tokens, completion_tokens),
+        })
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _known_models() -> list:
+    return ["mistral", "meta/llama3-70b-instruct", "meta/llama3-8b-instruct", "fake"]
+
+
+def _content_text(content) -> str:
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def _system_prefix(messages: list) -> str:
+    if messages and messages[0].get("role") == "system":
+        return _content_text(messages[0].get("content", ""))
+    return ""
+
+
+def _schema_title(fmt) -> str | None:
+    """
+    Schema name from an Ollama `format` / OpenAI `response_format` payload.
+    """
+    if not isinstance(fmt, dict):
+        return None
+    if "json_schema" in fmt:
+        inner = fmt["json_schema"] or {}
+        return (inner.get("schema") or {}).get("title") or inner.get("name")
+    return fmt.get("title")
+
+
+def _ollama_counts(prompt_tokens: int, completion_tokens: int, seconds: float) -> dict:
+    ns = int(seconds * 1e9)
+    return {
+        "total_duration": ns,
+        "load_duration": 0,
+        "prompt_eval_count": prompt_tokens,
+        "prompt_eval_duration": 0,
+        "eval_count": completion_tokens,
+        "eval_duration": ns,
+    }
+
+
+def _openai_usage(prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> dict:
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama / OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--no-chatter", action="store_true")
+    parser.add_argument("--max-parallel", type=int, default=4)
+    parser.add_argument("--no-prefix-cache", action="store_true")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = FakeServerConfig(
+        latency=LatencyModel(
+            ttft=args.ttft,
+            tokens_per_second=args.tokens_per_second,
+            prefill_tokens_per_second=args.prefill_tokens_per_second,
+            jitter=args.jitter,
+        ),
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        malformed_rate=args.malformed_rate,
+        chatter=not args.no_chatter,
+        max_parallel=args.max_parallel,
+        prefix_cache=not args.no_prefix_cache,
+        seed=args.seed,
+    )
+
+    server = FakeLLMServer(args.host, args.port, config)
+    print(f"Fake LLM server listening on {server.url}")
+
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
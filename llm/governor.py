@@ -0,0 +1,346 @@
+# llm/governor.py
+
+import os
+import re
+import time
+import random
+import asyncio
+import threading
+
+# Per (provider, model) admission control for LLM requests:
+#
+# - token buckets for requests/s and tokens/min (hard provider quotas)
+# - AIMD concurrency limit: grows by ~1 per round trip while latency
+#   stays near the observed baseline, shrinks multiplicatively on
+#   429 / 5xx / timeouts or when latency inflates (backend saturated)
+# - retries with full-jitter exponential backoff for retryable errors
+#
+# All coroutines run on the LLM event loop (llm/runtime.py).
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Classic token bucket. rate <= 0 means unlimited.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+
+        self._refill()
+
+        # Never ask for more than the bucket can ever hold
+        amount = min(amount, self.capacity)
+
+        if self.tokens >= amount:
+            return 0.0
+
+        return (amount - self.tokens) / self.rate
+
+    async def acquire(self, amount: float = 1.0):
+        if self.rate <= 0:
+            return
+
+        while True:
+            delay = self.wait_time(amount)
+            if delay <= 0:
+                self.tokens -= min(amount, self.capacity)
+                return
+            await asyncio.sleep(delay)
+
+    def charge(self, amount: float):
+        """
+        Debit tokens after the fact (may go negative, delaying later calls).
+        """
+        if self.rate <= 0:
+            return
+
+        self._refill()
+        self.tokens -= amount
+
+
+class Governor:
+
+    def __init__(
+            self,
+            name: str,
+            *,
+            requests_per_second: float = 0.0,
+            tokens_per_minute: float = 0.0,
+            min_concurrency: int = 1,
+            max_concurrency: int = 8,
+            initial_concurrency: int = 2,
+            latency_tolerance: float = 2.0,
+            max_retries: int = 4,
+            backoff_base: float = 0.5,
+            backoff_cap: float = 30.0
+    ):
+        self.name = name
+
+        self.request_bucket = TokenBucket(requests_per_second, max(requests_per_second, 1.0))
+        self.token_bucket = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = float(max(min_concurrency, min(initial_concurrency, max_concurrency)))
+
+        self.latency_tolerance = latency_tolerance
+        self.baseline_latency = None    # best latency seen (per output token)
+        self.smoothed_latency = None    # EWMA of latency (per output token)
+
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.errors = 0
+        self.retries = 0
+
+        self._condition = None
+
+    # ------------------------------------------------------------
+    # Slots
+    # ------------------------------------------------------------
+
+    def _cond(self) -> asyncio.Condition:
+        # Created lazily so it binds to the LLM event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def _acquire(self, tokens: float):
+        self.queue_depth += 1
+        try:
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(tokens)
+
+            cond = self._cond()
+            async with cond:
+                await cond.wait_for(lambda: self.in_flight < int(self.limit))
+                self.in_flight += 1
+        finally:
+            self.queue_depth -= 1
+
+    async def _release(self):
+        cond = self._cond()
+        async with cond:
+            self.in_flight -= 1
+            cond.notify_all()
+
+    # ------------------------------------------------------------
+    # AIMD
+    # ------------------------------------------------------------
+
+    def on_success(self, latency: float, completion_tokens: int | None = None):
+        self.completed += 1
+
+        # Normalise by output length so long answers don't look like congestion
+        sample = latency / max(completion_tokens or 1, 1)
+
+        if self.baseline_latency is None or sample < self.baseline_latency:
+            self.baseline_latency = sample
+
+        if self.smoothed_latency is None:
+            self.smoothed_latency = sample
+        else:
+            self.smoothed_latency = 0.8 * self.smoothed_latency + 0.2 * sample
+
+        if self.smoothed_latency > self.baseline_latency * self.latency_tolerance:
+            # Queueing inside the backend: back off gently
+            self.limit = max(self.min_concurrency, self.limit * 0.9)
+        else:
+            # Additive increase of ~1 slot per round trip
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+
+    def on_error(self, retryable: bool):
+        self.errors += 1
+        if retryable:
+            self.limit = max(self.min_concurrency, self.limit * 0.5)
+
+    def backoff_delay(self, attempt: int, retry_after: float | None = None) -> float:
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.backoff_base)
+
+        # Full jitter
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    # ------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------
+
+    async def run(self, make_call, *, tokens: float = 0.0, can_retry=None):
+        """
+        Run make_call() (a coroutine factory) under this governor, retrying
+        retryable errors with jittered backoff while can_retry() allows it.
+        """
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(tokens)
+            start = time.monotonic()
+
+            try:
+                result = await make_call()
+
+            except asyncio.CancelledError:
+                # Hedged losers and expired deadlines must give their slot back
+                await asyncio.shield(self._release())
+                raise
+
+            except Exception as e:
+                await self._release()
+
+                retryable = is_retryable(e)
+                self.on_error(retryable)
+
+                if (
+                        not retryable
+                        or attempt == self.max_retries
+                        or (can_retry is not None and not can_retry())
+                ):
+                    raise
+
+                self.retries += 1
+                delay = self.backoff_delay(attempt, retry_after_of(e))
+                print(f"[Governor] {self.name}: {e.__class__.__name__} ({status_code_of(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            await self._release()
+
+            completion_tokens = getattr(result, "completion_tokens", None)
+            self.on_success(time.monotonic() - start, completion_tokens)
+
+            if completion_tokens:
+                self.token_bucket.charge(completion_tokens)
+
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "concurrency_limit": round(self.limit, 2),
+            "completed": self.completed,
+            "errors": self.errors,
+            "retries": self.retries,
+        }
+
+
+# ============================================================
+# ERROR CLASSIFICATION
+# ============================================================
+
+def status_code_of(exc: Exception) -> int | None:
+    code = getattr(exc, "status_code", None)
+    if isinstance(code, int) and code > 0:
+        return code
+
+    response = getattr(exc, "response", None)
+    code = getattr(response, "status_code", None)
+    if isinstance(code, int):
+        return code
+
+    # Some SDKs raise plain Exceptions formatted as "[429] Too Many Requests"
+    match = re.match(r"\s*\[(\d{3})\]", str(exc))
+    if match:
+        return int(match.group(1))
+
+    return None
+
+
+def retry_after_of(exc: Exception) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    code = status_code_of(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+
+    # Connection resets, read timeouts, refused connections
+    if isinstance(exc, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+
+    try:
+        import httpx
+        if isinstance(exc, httpx.TransportError):
+            return True
+    except ImportError:
+        pass
+
+    return False
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+_governors = {}
+_lock = threading.Lock()
+
+
+def _setting(provider: str, name: str, default: str) -> str:
+    # OLLAMA_MAX_CONCURRENCY overrides LLM_MAX_CONCURRENCY, etc.
+    return os.getenv(f"{provider.upper()}_{name}", os.getenv(f"LLM_{name}", default))
+
+
+# Conservative starting points; AIMD adapts concurrency from there
+_PROVIDER_DEFAULTS = {
+    "ollama": {"RPS": "0", "TPM": "0", "MAX_CONCURRENCY": "4"},
+    "nvidia": {"RPS": "0.6", "TPM": "0", "MAX_CONCURRENCY": "8"},
+    # One generation at a time per in-process model
+    "llamacpp": {"RPS": "0", "TPM": "0", "MAX_CONCURRENCY": "1", "INITIAL_CONCURRENCY": "1"},
+}
+
+
+def get_governor(provider: str, model: str) -> Governor:
+    key = (provider, model)
+
+    with _lock:
+        governor = _governors.get(key)
+
+        if governor is None:
+            defaults = _PROVIDER_DEFAULTS.get(provider, {})
+
+            governor = Governor(
+                f"{provider}:{model}",
+                requests_per_second=float(_setting(provider, "RPS", defaults.get("RPS", "0"))),
+                tokens_per_minute=float(_setting(provider, "TPM", defaults.get("TPM", "0"))),
+                min_concurrency=int(_setting(provider, "MIN_CONCURRENCY", "1")),
+                max_concurrency=int(_setting(provider, "MAX_CONCURRENCY", defaults.get("MAX_CONCURRENCY", "8"))),
+                initial_concurrency=int(_setting(provider, "INITIAL_CONCURRENCY", defaults.get("INITIAL_CONCURRENCY", "2"))),
+                max_retries=int(_setting(provider, "MAX_RETRIES", "4")),
+            )
+            _governors[key] = governor
+
+        return governor
+
+
+def governor_stats() -> dict:
+    """
+    Queue depth, in-flight count and current limit per provider:model.
+    """
+    with _lock:
+        return {g.name: g.stats() for g in _governors.values()}
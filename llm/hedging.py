@@ -0,0 +1,242 @@
+# llm/hedging.py
+
+import os
+import time
+import atexit
+import asyncio
+import threading
+from collections import deque
+
+# Tail-latency protection for single LLM calls.
+#
+# - Hedging: when a call has not produced anything by the configured
+#   percentile of recent latency (time to first token when streaming),
+#   a duplicate is sent to the alternate target and whichever answers
+#   first wins; the other is cancelled.
+# - Failover: when the primary fails before anything was streamed, the
+#   alternate target is tried right away.
+# - Circuit breakers: a provider with repeated failures is skipped for a
+#   cool-down period, then given one trial request to close again.
+#
+# Settings:
+#   LLM_FALLBACK_PROVIDER / LLM_FALLBACK_MODEL   alternate target
+#   LLM_HEDGE_PERCENTILE      e.g. 95 (0 = no hedging, default)
+#   LLM_HEDGE_MIN_SAMPLES     latency samples needed before hedging (default 20)
+#   LLM_BREAKER_FAILURES      consecutive failures that open a breaker (default 5)
+#   LLM_BREAKER_COOLDOWN      seconds a breaker stays open (default 30)
+
+
+def hedge_percentile() -> float:
+    return float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+
+
+# ============================================================
+# LATENCY WINDOW
+# ============================================================
+
+class LatencyWindow:
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+# ============================================================
+# CIRCUIT BREAKER
+# ============================================================
+
+class CircuitBreaker:
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, *, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """
+        True if a request may go to this provider now. After the
+        cool-down one trial request is let through (half-open).
+        """
+
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            return True
+
+        return False
+
+    def on_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def on_failure(self):
+        self.failures += 1
+
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+                print(f"[Breaker] {self.name} open for {self.cooldown:.0f}s after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+# ============================================================
+# RACE
+# ============================================================
+
+class HedgedRace:
+    """
+    Runs a primary attempt and, if needed, one alternate attempt.
+
+    Attempts are coroutine factories taking the attempt name. A
+    streaming attempt calls claim(name) before forwarding its first
+    chunk; the first claimant wins and the other attempt is cancelled,
+    so the caller never sees chunks from two responses.
+    """
+
+    def __init__(self):
+        self.winner = None
+        self._tasks = {}
+
+    def claim(self, name: str) -> bool:
+        if self.winner is None:
+            self.winner = name
+            for other, task in self._tasks.items():
+                if other != name:
+                    task.cancel()
+        return self.winner == name
+
+    def _start(self, name: str, factory):
+        self._tasks[name] = asyncio.ensure_future(factory(name))
+
+    async def run(self, primary, alternate=None, hedge_after: float | None = None):
+        stats = _stats
+        self._start("primary", primary)
+
+        try:
+            done = set()
+
+            if alternate and hedge_after is not None:
+                done, _ = await asyncio.wait(self._tasks.values(), timeout=hedge_after)
+                if not done and self.winner is None:
+                    stats["hedges"] += 1
+                    self._start("alternate", alternate)
+
+            errors = []
+
+            while True:
+                # Also handles a primary that finished before hedge_after
+                for name, task in self._tasks.items():
+                    if task not in done or task.cancelled():
+                        continue
+
+                    if task.exception() is None:
+                        self.winner = self.winner or name
+                        if name == "alternate":
+                            stats["alternate_wins"] += 1
+                        return task.result()
+
+                    errors.append(task.exception())
+
+                pending = [t for t in self._tasks.values() if not t.done()]
+
+                if not pending:
+                    # Everything failed; fail over if nothing was streamed yet
+                    if alternate and "alternate" not in self._tasks and self.winner is None:
+                        stats["failovers"] += 1
+                        self._start("alternate", alternate)
+                        done = set()
+                        continue
+                    raise errors[0] if errors else asyncio.CancelledError()
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+_lock = threading.Lock()
+_breakers = {}
+_windows = {}
+_stats = {"hedges": 0, "failovers": 0, "alternate_wins": 0}
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    with _lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                provider,
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                cooldown=float(os.getenv("LLM_BREAKER_COOLDOWN", "30")),
+            )
+            _breakers[provider] = breaker
+        return breaker
+
+
+def get_latency_window(provider: str, model: str, streaming: bool) -> LatencyWindow:
+    key = (provider, model, streaming)
+    with _lock:
+        window = _windows.get(key)
+        if window is None:
+            window = _windows[key] = LatencyWindow()
+        return window
+
+
+def hedge_delay(provider: str, model: str, streaming: bool) -> float | None:
+    """
+    Seconds to wait before hedging, or None while hedging is off or
+    there are too few samples to know what slow means.
+    """
+
+    pct = hedge_percentile()
+    if pct <= 0:
+        return None
+
+    window = get_latency_window(provider, model, streaming)
+    if len(window.samples) < int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")):
+        return None
+
+    return window.percentile(pct)
+
+
+def hedging_stats() -> dict:
+    with _lock:
+        return {
+            **_stats,
+            "breakers": {name: b.state for name, b in _breakers.items()},
+        }
+
+
+def _report_hedging_stats():
+    if _stats["hedges"] or _stats["failovers"]:
+        print(
+            f"[Hedging] hedges={_stats['hedges']} failovers={_stats['failovers']} "
+            f"alternate_wins={_stats['alternate_wins']}"
+        )
+
+
+atexit.register(_report_hedging_stats)
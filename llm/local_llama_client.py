@@ -1,63 +1,316 @@
 # llm/local_llama_client.py
 
 import os
+import time
+from typing import Callable
 from dotenv import load_dotenv
 load_dotenv()
 
-import ollama
-from langchain_nvidia_ai_endpoints import ChatNVIDIA
-from langsmith import traceable
+from llm.tracing import traceable
 
-# Global Config
+from llm.deadlines import run_with_deadline
+from llm.governor import get_governor, is_retryable
+from llm.hedging import HedgedRace, get_breaker, get_latency_window, hedge_delay, hedge_percentile
+from llm.prefix_reuse import get_prefix_tracker
+from llm.profiles import GenerationProfile, profile_for
+from llm.providers import LLMResult, Provider, get_provider, resolve_provider
+from llm.response_cache import CacheMiss, get_response_cache
+from llm.runtime import run_on_llm_loop, run_sync
+from llm.single_flight import single_flight_group
+from llm.usage import UsageRecord, current_node, current_stage, get_usage_tracker
+import llm.warmup  # noqa: F401  registers the stage warm-up hook
 
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama")
-# options: "ollama" or "nvidia"
+# The provider is chosen per call from LLM_PROVIDER / LLM_PROVIDER_<STAGE>
+# (see llm/providers.py)
+
+# Identical concurrent requests (same cache key) share one provider call
+_flights = single_flight_group("llm")
 
 
 # Unified call_llm
 @traceable(name="LLM Call")
-def call_llm(prompt: str, model: str = "mistral") -> str:
+def call_llm(
+        prompt: str,
+        model: str | None = None,
+        *,
+        system: str | None = None,
+        refresh: bool = False,
+        on_token: Callable[[str], bool] | None = None,
+        json_schema: dict | None = None,
+        profile: GenerationProfile | None = None
+) -> str:
     """
     Unified LLM call.
-    Switch provider using LLM_PROVIDER env variable.
+    Switch provider using the LLM_PROVIDER env variable, or per stage
+    with LLM_PROVIDER_<STAGE>. model defaults to the provider's default.
     Returns plain string output.
-    No streaming.
+    system is sent as a separate system message. Keep it identical
+    across calls (static instructions and context only) so providers
+    can reuse its KV cache instead of prefilling it again.
+    Without on_token the full completion is fetched in one response.
+    With on_token the completion is streamed; every chunk is passed to
+    on_token and generation stops once it returns True. The text
+    received up to that point is returned.
+    Responses are served from the on-disk response cache when the
+    provider, model, generation parameters and prompt all match.
+    refresh=True skips the cache lookup (but still stores the new
+    response), e.g. when retrying after an unusable answer.
+    json_schema constrains decoding to that schema on providers that
+    support it (Ollama format, OpenAI-compatible response_format).
+    profile sets the output cap, temperature, stop sequences and
+    context size; by default the current stage's profile is used
+    (llm/profiles.py).
+    Raises DeadlineExceeded when the call outlives LLM_CALL_TIMEOUT or
+    the stage's time budget (llm/deadlines.py).
+    Blocking wrapper around acall_llm.
     """
 
-    if LLM_PROVIDER == "ollama":
-        return _call_ollama(prompt, model)
+    return run_sync(_acall_llm(prompt, model, system, refresh, on_token, json_schema, profile))
+
+
+@traceable(name="Async LLM Call")
+async def acall_llm(
+        prompt: str,
+        model: str | None = None,
+        *,
+        system: str | None = None,
+        refresh: bool = False,
+        on_token: Callable[[str], bool] | None = None,
+        json_schema: dict | None = None,
+        profile: GenerationProfile | None = None
+) -> str:
+    """
+    Awaitable call_llm. Safe to use from any event loop; the request
+    itself runs on the shared LLM loop with pooled provider clients.
+    """
+
+    return await run_on_llm_loop(
+        _acall_llm(prompt, model, system, refresh, on_token, json_schema, profile)
+    )
 
-    elif LLM_PROVIDER == "nvidia":
-        return _call_nvidia(prompt, model)
 
-    else:
-        raise ValueError(f"Unknown LLM_PROVIDER: {LLM_PROVIDER}")
+async def _acall_llm(
+        prompt: str,
+        model: str | None,
+        system: str | None,
+        refresh: bool,
+        on_token: Callable[[str], bool] | None,
+        json_schema: dict | None = None,
+        profile: GenerationProfile | None = None
+) -> str:
 
-# Ollama (Non-streaming)
+    stage = current_stage()
+    provider_name = resolve_provider(stage)
+    backend = get_provider(provider_name)
+    model = model or backend.default_model()
+    profile = profile or profile_for(stage=stage)
+    prompt_estimate = estimate_tokens(prompt) + estimate_tokens(system or "")
 
-def _call_ollama(prompt: str, model: str) -> str:
-    response = ollama.chat(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
+    def request_extra(provider: Provider) -> dict:
+        return {
+            **provider.profile_params(profile, prompt_estimate),
+            **provider.schema_params(json_schema),
+        }
+
+    cache = get_response_cache()
+    key = cache.make_key(
+        provider_name,
+        model,
+        {**backend.generation_params, **request_extra(backend)},
+        prompt,
+        system=system
     )
+    usage = get_usage_tracker()
+
+    if not refresh or cache.read_only:
+        cached = cache.get(key)
+        if cached is not None:
+            usage.record(UsageRecord(
+                stage=stage,
+                node=current_node(),
+                provider=provider_name,
+                model=model,
+                prompt_tokens=0,
+                completion_tokens=0,
+                estimated=False,
+                seconds=0.0,
+                cache_hit=True
+            ))
+            if on_token:
+                on_token(cached)
+            return cached
+
+    if cache.read_only:
+        raise CacheMiss(
+            f"No cached response for model '{model}' in replay mode (key {key[:12]})."
+        )
+
+    messages = _build_messages(prompt, system)
+
+    def attempt(provider: str, target_model: str, race: HedgedRace):
+
+        async def run(name: str) -> str:
+            target = get_provider(provider)
+            target_extra = request_extra(target)
+            latency = get_latency_window(provider, target_model, on_token is not None)
+            start = time.perf_counter()
+
+            def forward(text: str) -> bool:
+                # The first attempt to stream wins; the other one is cancelled
+                if race.winner is None:
+                    latency.add(time.perf_counter() - start)
+                if not race.claim(name):
+                    return True
+                return on_token(text)
+
+            def make_call():
+                if on_token:
+                    return target.astream(messages, target_model, forward, target_extra)
+                return target.acomplete(messages, target_model, target_extra)
+
+            breaker = get_breaker(provider)
+
+            try:
+                # A stream can only be retried before its first chunk reached on_token
+                result = await get_governor(provider, target_model).run(
+                    make_call,
+                    tokens=prompt_estimate,
+                    can_retry=lambda: race.winner is None
+                )
+            except Exception as e:
+                if is_retryable(e):
+                    breaker.on_failure()
+                raise
+
+            breaker.on_success()
+
+            seconds = time.perf_counter() - start
+            if on_token is None:
+                latency.add(seconds)
+
+            reused = _record_prefix_reuse(target, target_model, system, prompt, result)
+
+            usage.record(UsageRecord(
+                stage=stage,
+                node=current_node(),
+                provider=provider,
+                model=target_model,
+                prompt_tokens=result.prompt_tokens if result.prompt_tokens is not None else prompt_estimate,
+                completion_tokens=(
+                    result.completion_tokens if result.completion_tokens is not None
+                    else estimate_tokens(result.text)
+                ),
+                estimated=result.prompt_tokens is None or result.completion_tokens is None,
+                seconds=seconds,
+                load_seconds=result.load_seconds or 0.0,
+                reused_prefix_tokens=reused
+            ))
+
+            return result.text
+
+        return run
+
+    async def fetch() -> str:
+        # Cache hits and shared flights are free, so only calls that
+        # reach the provider are blocked
+        usage.check_budget(stage)
+
+        primary, alternate = _choose_targets(provider_name, model)
+        race = HedgedRace()
 
-    return response["message"]["content"]
+        text = await race.run(
+            attempt(*primary, race),
+            attempt(*alternate, race) if alternate else None,
+            hedge_after=hedge_delay(*primary, on_token is not None)
+        )
 
+        cache.put(key, text, provider=provider_name, model=model)
 
-# NVIDIA (Non-streaming)
+        return text
 
-def _call_nvidia(prompt: str, model: str) -> str:
-    api_key = os.getenv("NVIDIA_API_KEY")
-    if not api_key:
-        raise ValueError("NVIDIA_API_KEY missing in .env")
+    # Cancelled (and the provider request dropped) once the call
+    # deadline or the stage's time budget runs out
+    text, shared = await run_with_deadline(_flights.do(key, fetch), stage)
 
-    llm = ChatNVIDIA(
-        model=model,
-        api_key=api_key,
-        temperature=0.0,
-        max_tokens=4096,
+    if shared:
+        # Another caller's request produced this; it was never streamed to us
+        usage.record(UsageRecord(
+            stage=stage,
+            node=current_node(),
+            provider=provider_name,
+            model=model,
+            prompt_tokens=0,
+            completion_tokens=0,
+            estimated=False,
+            seconds=0.0,
+            shared=True
+        ))
+        if on_token:
+            on_token(text)
+
+    return text
+
+
+def default_model(provider: str) -> str:
+    return get_provider(provider).default_model()
+
+
+def _choose_targets(provider: str, model: str) -> tuple[tuple[str, str], tuple[str, str] | None]:
+    """
+    (primary, alternate) provider/model pairs for one call. The
+    alternate receives hedged duplicates and failovers; without a
+    configured fallback, hedges go to the primary again.
+    """
+
+    primary = (provider, model)
+
+    fallback_provider = os.getenv("LLM_FALLBACK_PROVIDER")
+    if not fallback_provider:
+        return primary, (primary if hedge_percentile() > 0 else None)
+
+    fallback = (
+        fallback_provider,
+        os.getenv("LLM_FALLBACK_MODEL") or default_model(fallback_provider)
     )
 
-    response = llm.invoke(prompt)
+    # Skip a provider whose breaker is open until its cool-down has passed
+    if not get_breaker(provider).allow():
+        return fallback, None
+
+    return primary, fallback
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough chars-per-token ratio for English prose and code
+    return len(text) // 4 + 1
 
-    return response.content
\ No newline at end of file
+
+def _build_messages(prompt: str, system: str | None) -> list:
+    messages = []
+
+    if system:
+        messages.append({"role": "system", "content": system})
+
+    messages.append({"role": "user", "content": prompt})
+
+    return messages
+
+
+def _record_prefix_reuse(provider: Provider, model: str, system: str | None, prompt: str, result: LLMResult) -> int:
+    """
+    Count the call's reused prefix and return its reused token count.
+    """
+
+    tracker = get_prefix_tracker()
+
+    if provider.prompt_tokens_exclude_cache:
+        # e.g. Ollama's prompt_eval_count excludes tokens served from its KV cache
+        return tracker.record(model, system, prompt, evaluated_tokens=result.prompt_tokens)
+
+    return tracker.record(
+        model,
+        system,
+        prompt,
+        cached_tokens=result.cached_prompt_tokens,
+        prompt_tokens=result.prompt_tokens
+    )
@@ -0,0 +1,107 @@
+# llm/prefix_reuse.py
+
+import atexit
+import hashlib
+import threading
+
+# Tracks how many prompt tokens of each call were served from the
+# provider's prefix / KV cache instead of being prefilled again.
+#
+# - OpenAI-compatible servers report it directly (cached_tokens).
+# - Ollama only reports prompt_eval_count, the tokens it actually
+#   evaluated. The first call with a given system prefix is treated as
+#   cold and calibrates chars-per-token for that model; later calls
+#   estimate reuse as expected prompt tokens minus evaluated tokens.
+
+
+class PrefixReuseTracker:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen_prefixes = {}        # (model, prefix hash) → estimated prefix tokens
+        self._chars_per_token = {}      # model → calibrated ratio
+
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.reused_tokens = 0
+
+    @staticmethod
+    def prefix_hash(system: str) -> str:
+        return hashlib.sha256(system.encode("utf-8")).hexdigest()[:16]
+
+    def record(
+            self,
+            model: str,
+            system: str | None,
+            prompt: str,
+            *,
+            evaluated_tokens: int | None = None,
+            cached_tokens: int | None = None,
+            prompt_tokens: int | None = None
+    ) -> int:
+        """
+        Record one provider call and return its reused-prefix token count.
+        """
+
+        with self._lock:
+            self.calls += 1
+
+            if cached_tokens is not None:
+                reused = cached_tokens
+                total = prompt_tokens or 0
+
+            elif evaluated_tokens is None or not system:
+                reused = 0
+                total = prompt_tokens or evaluated_tokens or 0
+
+            else:
+                key = (model, self.prefix_hash(system))
+                chars = len(system) + len(prompt)
+
+                if key not in self._seen_prefixes:
+                    # Cold call: everything was evaluated
+                    ratio = chars / max(evaluated_tokens, 1)
+                    self._chars_per_token[model] = ratio
+                    self._seen_prefixes[key] = int(len(system) / ratio)
+                    reused = 0
+                    total = evaluated_tokens
+                else:
+                    ratio = self._chars_per_token.get(model, 4.0)
+                    total = int(chars / ratio)
+                    reused = min(
+                        max(total - evaluated_tokens, 0),
+                        self._seen_prefixes[key]
+                    )
+
+            self.prompt_tokens += total
+            self.reused_tokens += reused
+
+            return reused
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "reused_prefix_tokens": self.reused_tokens,
+                "reuse_rate": (self.reused_tokens / self.prompt_tokens) if self.prompt_tokens else 0.0,
+            }
+
+
+_tracker = PrefixReuseTracker()
+
+
+def get_prefix_tracker() -> PrefixReuseTracker:
+    return _tracker
+
+
+def _report_prefix_stats():
+    s = _tracker.stats()
+    if s["calls"]:
+        print(
+            f"[PrefixReuse] calls={s['calls']} prompt_tokens={s['prompt_tokens']} "
+            f"reused={s['reused_prefix_tokens']} ({s['reuse_rate']:.0%})"
+        )
+
+
+atexit.register(_report_prefix_stats)
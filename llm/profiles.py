@@ -0,0 +1,88 @@
+# llm/profiles.py
+
+import os
+import json
+from dataclasses import dataclass, replace
+
+# Generation settings sized to what a call actually produces. A
+# PruneDecision is ~60 tokens; an architecture document is thousands.
+# Capping output stops runaway generations early, and sizing the
+# context window to the prompt keeps Ollama's KV cache small.
+#
+# A call uses the profile of its schema, else of its usage stage,
+# else "default". Any profile can be overridden with JSON:
+#
+#   LLM_PROFILE_<KEY>   e.g. LLM_PROFILE_PRUNEDECISION='{"max_tokens": 128}'
+#                            LLM_PROFILE_NODES='{"temperature": 0.3, "stop": ["\n# "]}'
+#
+# Context windows are rounded up to a power of two between
+# LLM_NUM_CTX_MIN (default 2048) and LLM_NUM_CTX_MAX (default 32768) so
+# Ollama does not reload the model for every slightly different size.
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    max_tokens: int | None = None       # output cap (None: provider default)
+    temperature: float | None = None    # None: provider default
+    stop: tuple[str, ...] = ()
+    size_context: bool = True           # set num_ctx from the prompt (Ollama)
+
+
+PROFILES = {
+    # Structured decisions: a short object, deterministic
+    "NodeDecision": GenerationProfile(max_tokens=256, temperature=0.0),
+    "PathDecision": GenerationProfile(max_tokens=1024, temperature=0.0),
+    "OptionRanking": GenerationProfile(max_tokens=1024, temperature=0.0),
+    "PruneDecision": GenerationProfile(max_tokens=192, temperature=0.0),
+
+    # Structured documents
+    "ProjectBlueprint": GenerationProfile(max_tokens=4096, temperature=0.0),
+    "FileFunctionSpec": GenerationProfile(max_tokens=3072, temperature=0.0),
+
+    # Markdown stages (call_llm without a schema)
+    "global": GenerationProfile(max_tokens=4096),
+    "nodes": GenerationProfile(max_tokens=2048),
+
+    "default": GenerationProfile(max_tokens=4096),
+}
+
+
+def _override(key: str, profile: GenerationProfile | None) -> GenerationProfile | None:
+    raw = os.getenv(f"LLM_PROFILE_{key.upper()}")
+    if not raw:
+        return profile
+
+    fields = json.loads(raw)
+    if "stop" in fields:
+        fields["stop"] = tuple(fields["stop"])
+
+    return replace(profile or GenerationProfile(), **fields)
+
+
+def profile_for(schema_name: str | None = None, stage: str | None = None) -> GenerationProfile:
+    for key in (schema_name, stage):
+        if key:
+            profile = _override(key, PROFILES.get(key))
+            if profile is not None:
+                return profile
+
+    return _override("default", PROFILES["default"])
+
+
+def context_size(prompt_tokens: int, profile: GenerationProfile) -> int:
+    """
+    Context window for a prompt of about prompt_tokens tokens plus the
+    profile's output cap.
+    """
+
+    low = int(os.getenv("LLM_NUM_CTX_MIN", "2048"))
+    high = int(os.getenv("LLM_NUM_CTX_MAX", "32768"))
+
+    # Token estimates are rough; leave headroom for the chat template too
+    needed = int(prompt_tokens * 1.25) + (profile.max_tokens or 2048) + 64
+
+    size = low
+    while size < needed and size < high:
+        size *= 2
+
+    return min(size, high)
@@ -0,0 +1,590 @@
+# llm/providers.py
+
+import os
+import json
+import time
+import asyncio
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+from llm.client_pool import get_http_client, get_ollama_client
+from llm.profiles import GenerationProfile, context_size
+from llm.runtime import run_sync
+from llm.usage import current_stage
+
+# LLM backends behind one interface. call_llm (llm/local_llama_client.py)
+# handles caching, budgets, hedging and usage; a provider only turns
+# chat messages into an LLMResult, streamed or not.
+#
+# Built-in providers:
+#   ollama     Ollama HTTP API (OLLAMA_HOST)
+#   nvidia     NVIDIA API catalog / NIM (NVIDIA_BASE_URL, NVIDIA_API_KEY)
+#   openai     any OpenAI-compatible server: vLLM, llama.cpp server, ...
+#              (OPENAI_BASE_URL, OPENAI_API_KEY, OPENAI_DEFAULT_MODEL)
+#   llamacpp   in-process llama.cpp via llama-cpp-python, no HTTP at all
+#              (LLAMACPP_MODEL_PATH, LLAMACPP_N_CTX, LLAMACPP_THREADS,
+#              LLAMACPP_GPU_LAYERS)
+#
+# Selection:
+#   LLM_PROVIDER            default provider (default "ollama")
+#   LLM_PROVIDER_<STAGE>    provider for one usage stage, e.g.
+#                           LLM_PROVIDER_PRUNING=llamacpp
+#
+# Other backends are added with register_provider(), or by naming a
+# "package.module:ClassName" in LLM_PROVIDER.
+
+
+@dataclass
+class LLMResult:
+    text: str
+    prompt_tokens: int | None = None            # prompt tokens reported by the provider
+    completion_tokens: int | None = None
+    cached_prompt_tokens: int | None = None     # prefix tokens served from the provider cache
+    load_seconds: float | None = None           # time spent loading the model, when reported
+
+
+class Provider:
+    """
+    Base class for LLM backends.
+
+    Subclasses implement acomplete and astream; the blocking complete
+    and stream run them on the shared LLM loop. extra holds per-request
+    options from profile_params and schema_params and overrides
+    generation_params, which are sent with every request. Both are part
+    of the response-cache key.
+    """
+
+    name = ""
+
+    # Ollama reports only the prompt tokens it had to evaluate
+    prompt_tokens_exclude_cache = False
+
+    def __init__(self):
+        self.generation_params = {}
+
+    def default_model(self) -> str:
+        raise NotImplementedError
+
+    def profile_params(self, profile: GenerationProfile, prompt_tokens: int) -> dict:
+        """
+        Request options for a generation profile (OpenAI-style names).
+        """
+
+        params = {}
+        if profile.max_tokens is not None:
+            params["max_tokens"] = profile.max_tokens
+        if profile.temperature is not None:
+            params["temperature"] = profile.temperature
+        if profile.stop:
+            params["stop"] = list(profile.stop)
+        return params
+
+    def schema_params(self, json_schema: dict | None) -> dict:
+        """
+        Request options that constrain decoding to json_schema.
+        """
+        return {}
+
+    async def acomplete(self, messages: list, model: str, extra: dict) -> LLMResult:
+        raise NotImplementedError
+
+    async def astream(
+            self,
+            messages: list,
+            model: str,
+            on_token: Callable[[str], bool],
+            extra: dict
+    ) -> LLMResult:
+        """
+        Pass each chunk to on_token and stop generating once it returns True.
+        """
+        raise NotImplementedError
+
+    async def warm(self, model: str, keep_alive: str | None = None) -> float | None:
+        """
+        Load model ahead of its first call and keep it resident for
+        keep_alive. Returns the load time in seconds, or None when the
+        backend does not manage residency (remote servers).
+        """
+        return None
+
+    async def release(self, model: str):
+        """
+        Let the backend unload model to free memory for another one.
+        """
+
+    def complete(self, messages: list, model: str, extra: dict | None = None) -> LLMResult:
+        return run_sync(self.acomplete(messages, model, extra or {}))
+
+    def stream(
+            self,
+            messages: list,
+            model: str,
+            on_token: Callable[[str], bool],
+            extra: dict | None = None
+    ) -> LLMResult:
+        return run_sync(self.astream(messages, model, on_token, extra or {}))
+
+
+# ============================================================
+# OLLAMA
+# ============================================================
+
+class OllamaProvider(Provider):
+
+    name = "ollama"
+    prompt_tokens_exclude_cache = True
+
+    def __init__(self):
+        super().__init__()
+        # Keep the model (and its KV cache for the shared prefix) loaded between calls
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+    def default_model(self) -> str:
+        return os.getenv("OLLAMA_DEFAULT_MODEL", "mistral")
+
+    def profile_params(self, profile: GenerationProfile, prompt_tokens: int) -> dict:
+        options = {}
+        if profile.max_tokens is not None:
+            options["num_predict"] = profile.max_tokens
+        if profile.temperature is not None:
+            options["temperature"] = profile.temperature
+        if profile.stop:
+            options["stop"] = list(profile.stop)
+        if profile.size_context:
+            options["num_ctx"] = context_size(prompt_tokens, profile)
+        return {"options": options} if options else {}
+
+    def schema_params(self, json_schema: dict | None) -> dict:
+        return {"format": json_schema} if json_schema else {}
+
+    async def acomplete(self, messages: list, model: str, extra: dict) -> LLMResult:
+        client = get_ollama_client(model)
+
+        response = await client.chat(
+            model=model,
+            messages=messages,
+            keep_alive=self.keep_alive,
+            **{**self.generation_params, **extra},
+        )
+
+        return LLMResult(
+            text=response["message"]["content"],
+            prompt_tokens=response.get("prompt_eval_count"),
+            completion_tokens=response.get("eval_count"),
+            load_seconds=_ns_to_seconds(response.get("load_duration")),
+        )
+
+    async def astream(
+            self,
+            messages: list,
+            model: str,
+            on_token: Callable[[str], bool],
+            extra: dict
+    ) -> LLMResult:
+        client = get_ollama_client(model)
+
+        stream = await client.chat(
+            model=model,
+            messages=messages,
+            stream=True,
+            keep_alive=self.keep_alive,
+            **{**self.generation_params, **extra},
+        )
+
+        result = LLMResult(text="")
+
+        def read(part):
+            # Token counts only arrive on the final (done) chunk
+            if part.get("done"):
+                result.prompt_tokens = part.get("prompt_eval_count")
+                result.completion_tokens = part.get("eval_count")
+                result.load_seconds = _ns_to_seconds(part.get("load_duration"))
+            return part["message"]["content"]
+
+        result.text, chunks = await consume_stream(stream, read, on_token)
+
+        if result.completion_tokens is None:
+            # Stopped before the final chunk: one chunk ≈ one token
+            result.completion_tokens = chunks
+
+        return result
+
+    async def warm(self, model: str, keep_alive: str | None = None) -> float | None:
+        # An empty prompt only loads the model
+        response = await get_ollama_client(model).generate(
+            model=model,
+            prompt="",
+            keep_alive=keep_alive or self.keep_alive,
+        )
+        return _ns_to_seconds(response.get("load_duration")) or 0.0
+
+    async def release(self, model: str):
+        await get_ollama_client(model).generate(model=model, prompt="", keep_alive=0)
+
+
+def _ns_to_seconds(value: int | None) -> float | None:
+    return value / 1e9 if value is not None else None
+
+
+# ============================================================
+# OPENAI-COMPATIBLE
+# ============================================================
+
+class OpenAICompatibleProvider(Provider):
+    """
+    /chat/completions over a pooled keep-alive HTTP client. Settings
+    are read per call from <PREFIX>_BASE_URL, <PREFIX>_API_KEY,
+    <PREFIX>_DEFAULT_MODEL and <PREFIX>_SCHEMA_FORMAT.
+    """
+
+    name = "openai"
+    env_prefix = "OPENAI"
+    default_base_url = "http://127.0.0.1:8000/v1"
+    fallback_model = "default"
+    requires_api_key = False
+
+    def __init__(self):
+        super().__init__()
+        self.generation_params = {"temperature": 0.0, "max_tokens": 4096}
+
+    def _env(self, name: str, default: str | None = None) -> str | None:
+        return os.getenv(f"{self.env_prefix}_{name}", default)
+
+    def default_model(self) -> str:
+        return self._env("DEFAULT_MODEL", self.fallback_model)
+
+    def schema_params(self, json_schema: dict | None) -> dict:
+        # "response_format" (OpenAI json_schema), "guided_json" (vLLM / NIM) or "off"
+        schema_format = self._env("SCHEMA_FORMAT", "response_format")
+
+        if not json_schema or schema_format == "off":
+            return {}
+
+        if schema_format == "guided_json":
+            return {"guided_json": json_schema}
+
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": json_schema.get("title", "response"),
+                    "schema": json_schema,
+                },
+            }
+        }
+
+    def _client(self):
+        api_key = self._env("API_KEY")
+        if self.requires_api_key and not api_key:
+            raise ValueError(f"{self.env_prefix}_API_KEY missing in .env")
+
+        return get_http_client(self._env("BASE_URL", self.default_base_url), api_key)
+
+    def _payload(self, messages: list, model: str, extra: dict) -> dict:
+        return {"model": model, "messages": messages, **self.generation_params, **extra}
+
+    async def acomplete(self, messages: list, model: str, extra: dict) -> LLMResult:
+        response = await self._client().post(
+            "chat/completions",
+            json=self._payload(messages, model, extra),
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        result = LLMResult(text=data["choices"][0]["message"].get("content") or "")
+        read_openai_usage(data.get("usage"), result)
+
+        return result
+
+    async def astream(
+            self,
+            messages: list,
+            model: str,
+            on_token: Callable[[str], bool],
+            extra: dict
+    ) -> LLMResult:
+        payload = {
+            **self._payload(messages, model, extra),
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+
+        result = LLMResult(text="")
+
+        def read(chunk):
+            # Usage arrives on a final chunk without choices
+            read_openai_usage(chunk.get("usage"), result)
+            choices = chunk.get("choices") or []
+            return (choices[0].get("delta") or {}).get("content") if choices else ""
+
+        async with self._client().stream("POST", "chat/completions", json=payload) as response:
+            response.raise_for_status()
+            result.text, chunks = await consume_stream(_sse_events(response), read, on_token)
+
+        if result.completion_tokens is None:
+            result.completion_tokens = chunks
+
+        return result
+
+
+class NvidiaProvider(OpenAICompatibleProvider):
+
+    name = "nvidia"
+    env_prefix = "NVIDIA"
+    default_base_url = "https://integrate.api.nvidia.com/v1"
+    fallback_model = "meta/llama3-70b-instruct"
+    requires_api_key = True
+
+
+async def _sse_events(response):
+    """
+    JSON payloads of a server-sent event stream, up to [DONE].
+    """
+
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+
+        yield json.loads(data)
+
+
+def read_openai_usage(usage: dict | None, result: LLMResult):
+    if not usage:
+        return
+
+    result.prompt_tokens = usage.get("prompt_tokens")
+    result.completion_tokens = usage.get("completion_tokens")
+
+    # Servers with prefix caching report cached prompt tokens
+    details = usage.get("prompt_tokens_details") or {}
+    if details.get("cached_tokens") is not None:
+        result.cached_prompt_tokens = details["cached_tokens"]
+
+
+# ============================================================
+# IN-PROCESS LLAMA.CPP
+# ============================================================
+
+class LlamaCppProvider(Provider):
+    """
+    Runs a GGUF model inside this process with llama-cpp-python. The
+    model name is the path to the .gguf file. Generation runs in a
+    worker thread; one call at a time per model, which also lets
+    llama.cpp reuse the KV cache of the previous prompt's prefix.
+    """
+
+    name = "llamacpp"
+
+    def __init__(self):
+        super().__init__()
+        self.generation_params = {"temperature": 0.0, "max_tokens": 4096}
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def default_model(self) -> str:
+        return os.getenv("LLAMACPP_MODEL_PATH", "")
+
+    def schema_params(self, json_schema: dict | None) -> dict:
+        # llama-cpp-python compiles the schema to a grammar
+        return {"response_format": {"type": "json_object", "schema": json_schema}} if json_schema else {}
+
+    def _load(self, model: str):
+        with self._lock:
+            llm = self._models.get(model)
+
+            if llm is None:
+                try:
+                    from llama_cpp import Llama
+                except ImportError as e:
+                    raise ImportError(
+                        "The llamacpp provider needs llama-cpp-python (pip install llama-cpp-python)"
+                    ) from e
+
+                if not model or not os.path.isfile(model):
+                    raise ValueError(f"llama.cpp model file not found: '{model}' (set LLAMACPP_MODEL_PATH)")
+
+                threads = os.getenv("LLAMACPP_THREADS")
+
+                llm = Llama(
+                    model_path=model,
+                    n_ctx=int(os.getenv("LLAMACPP_N_CTX", "8192")),
+                    n_threads=int(threads) if threads else None,
+                    n_gpu_layers=int(os.getenv("LLAMACPP_GPU_LAYERS", "0")),
+                    verbose=False,
+                )
+                self._models[model] = llm
+                self._locks[model] = threading.Lock()
+
+            return llm, self._locks[model]
+
+    async def warm(self, model: str, keep_alive: str | None = None) -> float | None:
+        loaded = model in self._models
+        start = time.perf_counter()
+        await asyncio.to_thread(self._load, model)
+        return 0.0 if loaded else time.perf_counter() - start
+
+    async def release(self, model: str):
+        # Freed once in-flight calls drop their reference
+        with self._lock:
+            self._models.pop(model, None)
+
+    async def acomplete(self, messages: list, model: str, extra: dict) -> LLMResult:
+        llm, lock = await asyncio.to_thread(self._load, model)
+
+        def generate():
+            with lock:
+                return llm.create_chat_completion(messages=messages, **{**self.generation_params, **extra})
+
+        data = await asyncio.to_thread(generate)
+
+        result = LLMResult(text=data["choices"][0]["message"].get("content") or "")
+        read_openai_usage(data.get("usage"), result)
+
+        return result
+
+    async def astream(
+            self,
+            messages: list,
+            model: str,
+            on_token: Callable[[str], bool],
+            extra: dict
+    ) -> LLMResult:
+        llm, lock = await asyncio.to_thread(self._load, model)
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                with lock:
+                    chunks = llm.create_chat_completion(
+                        messages=messages, stream=True, **{**self.generation_params, **extra}
+                    )
+                    for chunk in chunks:
+                        # Leaving the loop stops generation
+                        if stop.is_set():
+                            break
+                        loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        async def chunks():
+            loop.run_in_executor(None, produce)
+            try:
+                while (item := await queue.get()) is not done:
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                stop.set()
+
+        result = LLMResult(text="")
+
+        def read(chunk):
+            choices = chunk.get("choices") or []
+            return (choices[0].get("delta") or {}).get("content") if choices else ""
+
+        result.text, count = await consume_stream(chunks(), read, on_token)
+        result.completion_tokens = count
+
+        return result
+
+
+# ============================================================
+# STREAMS
+# ============================================================
+
+async def consume_stream(stream, get_text, on_token: Callable[[str], bool]) -> tuple[str, int]:
+    """
+    Forward an async chunk stream to on_token until it returns True.
+    Returns (text, chunk count).
+    """
+
+    parts = []
+
+    try:
+        async for item in stream:
+            text = get_text(item) or ""
+            parts.append(text)
+
+            if on_token(text):
+                break
+    finally:
+        # Closing the stream drops the HTTP response, which stops generation server-side
+        await stream.aclose()
+
+    return "".join(parts), len(parts)
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+_factories: dict[str, Callable[[], Provider]] = {
+    "ollama": OllamaProvider,
+    "nvidia": NvidiaProvider,
+    "openai": OpenAICompatibleProvider,
+    "llamacpp": LlamaCppProvider,
+}
+_instances: dict[str, Provider] = {}
+_lock = threading.Lock()
+
+
+def register_provider(name: str, factory: Callable[[], Provider]):
+    """
+    Make a backend available as LLM_PROVIDER=<name>. Replaces an
+    existing provider of that name.
+    """
+
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def provider_names() -> list[str]:
+    with _lock:
+        return sorted(_factories)
+
+
+def get_provider(name: str) -> Provider:
+    with _lock:
+        provider = _instances.get(name)
+        if provider is not None:
+            return provider
+
+        factory = _factories.get(name)
+
+        if factory is None and ":" in name:
+            # "package.module:ClassName"
+            module_name, _, attr = name.partition(":")
+            factory = _factories[name] = getattr(importlib.import_module(module_name), attr)
+
+        if factory is None:
+            raise ValueError(f"Unknown LLM_PROVIDER: {name} (available: {', '.join(sorted(_factories))})")
+
+        provider = _instances[name] = factory()
+        if not provider.name:
+            provider.name = name
+
+        return provider
+
+
+def resolve_provider(stage: str | None = None) -> str:
+    """
+    Provider name for a stage (default: the current usage stage).
+    """
+
+    stage = stage or current_stage()
+    return os.getenv(f"LLM_PROVIDER_{stage.upper()}") or os.getenv("LLM_PROVIDER", "ollama")
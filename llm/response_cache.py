@@ -0,0 +1,290 @@
+# llm/response_cache.py
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, ".cache", "llm_responses.sqlite")
+
+CACHE_MODES = ("on", "off", "replay")
+# on     → read and write
+# off    → cache disabled
+# replay → read-only, a miss is an error (offline / reproducible reruns)
+
+
+class CacheMiss(LookupError):
+    """
+    Raised in replay mode when a prompt has no stored response.
+    """
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed store of raw LLM responses.
+
+    Entries are keyed by provider, model, generation parameters and
+    prompt hash, and evicted by age (created_at) and then least recently
+    used (accessed_at) until the store fits in max_bytes.
+    """
+
+    def __init__(
+            self,
+            path: str = DEFAULT_CACHE_PATH,
+            *,
+            mode: str = "on",
+            max_bytes: int = 512 * 1024 * 1024,
+            max_age_seconds: float = 30 * 24 * 3600
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}. Must be one of {CACHE_MODES}")
+
+        self.path = path
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if self.enabled:
+            self._open()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def read_only(self) -> bool:
+        return self.mode == "replay"
+
+    # ------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def make_key(
+            provider: str,
+            model: str,
+            params: dict,
+            prompt: str,
+            *,
+            system: str | None = None
+    ) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+        fields = {
+            "provider": provider,
+            "model": model,
+            "params": params or {},
+            "prompt": prompt_hash,
+        }
+
+        if system:
+            fields["system"] = hashlib.sha256(system.encode("utf-8")).hexdigest()
+
+        material = json.dumps(fields, sort_keys=True, default=str)
+
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One shared connection, serialised by self._lock
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        if not self.enabled:
+            return None
+
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row and self.max_age_seconds and now - row[1] > self.max_age_seconds:
+                # Expired entries are misses; replay mode never deletes
+                if not self.read_only:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self.evictions += 1
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+            if not self.read_only:
+                self._conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                    (now, key)
+                )
+                self._conn.commit()
+
+            return row[0]
+
+    def put(self, key: str, response: str, *, provider: str = "", model: str = ""):
+        if not self.enabled or self.read_only:
+            return
+
+        now = time.time()
+        size = len(response.encode("utf-8"))
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (key, provider, model, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, provider, model, response, size, now, now)
+            )
+            self.writes += 1
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def evict(self):
+        if not self.enabled or self.read_only:
+            return
+
+        with self._lock:
+            self._evict_locked(time.time())
+            self._conn.commit()
+
+    def _evict_locked(self, now: float):
+        # STEP 1 — age based
+        if self.max_age_seconds:
+            cur = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.max_age_seconds,)
+            )
+            self.evictions += max(cur.rowcount, 0)
+
+        # STEP 2 — size based, least recently used first
+        if not self.max_bytes:
+            return
+
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        if not self.enabled or self.read_only:
+            return
+
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+# ============================================================
+# PROCESS-WIDE CACHE
+# ============================================================
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Lazily build the process-wide cache from environment variables:
+    LLM_CACHE_MODE (on | off | replay), LLM_CACHE_PATH,
+    LLM_CACHE_MAX_MB and LLM_CACHE_MAX_AGE_DAYS.
+    """
+
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                mode=os.getenv("LLM_CACHE_MODE", "on").lower(),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024),
+                max_age_seconds=float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600,
+            )
+            atexit.register(_report_cache_stats)
+
+        return _cache
+
+
+def _report_cache_stats():
+    if _cache is None or not _cache.enabled:
+        return
+
+    s = _cache.stats()
+    if s["hits"] or s["misses"]:
+        print(
+            f"[LLMCache] mode={s['mode']} hits={s['hits']} misses={s['misses']} "
+            f"writes={s['writes']} evictions={s['evictions']} hit_rate={s['hit_rate']:.0%}"
+        )
@@ -0,0 +1,92 @@
+# llm/routing.py
+
+import os
+import atexit
+import threading
+
+# Model cascade for structured calls. Cheap, high-volume decisions
+# (KEEP/PRUNE, pick-one-option) go to a small model first and only
+# escalate to the next model on schema failure, an invalid answer or
+# low self-reported confidence. Long-form stages keep the default model.
+#
+# Routes are comma-separated model lists, smallest first:
+#
+#   LLM_ROUTE_SCHEMA_<SCHEMA>   e.g. LLM_ROUTE_SCHEMA_PRUNEDECISION=qwen2.5:3b,mistral
+#   LLM_ROUTE_STAGE_<STAGE>     e.g. LLM_ROUTE_STAGE_TRAVERSAL=llama3.2:3b,mistral
+#
+# A schema route wins over a stage route. Without either, decision
+# schemas use <PROVIDER>_SMALL_MODEL (when set) followed by the default
+# model; everything else uses the default model alone.
+
+DECISION_SCHEMAS = ("NodeDecision", "PruneDecision")
+
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+
+def _split(value: str) -> list[str]:
+    return [m.strip() for m in value.split(",") if m.strip()]
+
+
+def resolve_route(schema_name: str, stage: str, default_model: str, provider: str) -> list[str]:
+    """
+    Models to try in order for one structured call.
+    """
+
+    for name in (f"LLM_ROUTE_SCHEMA_{schema_name.upper()}", f"LLM_ROUTE_STAGE_{stage.upper()}"):
+        value = os.getenv(name)
+        if value:
+            return _split(value) or [default_model]
+
+    small = os.getenv(f"{provider.upper()}_SMALL_MODEL")
+
+    if schema_name in DECISION_SCHEMAS and small and small != default_model:
+        return [small, default_model]
+
+    return [default_model]
+
+
+def min_confidence() -> float:
+    return float(os.getenv("LLM_ROUTE_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE))
+
+
+class RoutingStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.answered = {}          # (schema, model) → accepted answers
+        self.escalations = {}       # (schema, model, reason) → count
+
+    def accept(self, schema_name: str, model: str):
+        with self._lock:
+            key = (schema_name, model)
+            self.answered[key] = self.answered.get(key, 0) + 1
+
+    def escalate(self, schema_name: str, model: str, reason: str):
+        with self._lock:
+            key = (schema_name, model, reason)
+            self.escalations[key] = self.escalations.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "answered": {f"{s}:{m}": n for (s, m), n in self.answered.items()},
+                "escalations": {f"{s}:{m}:{r}": n for (s, m, r), n in self.escalations.items()},
+            }
+
+
+_stats = RoutingStats()
+
+
+def get_routing_stats() -> RoutingStats:
+    return _stats
+
+
+def _report_routing_stats():
+    s = _stats.stats()
+    if s["escalations"]:
+        answered = ", ".join(f"{k}={v}" for k, v in s["answered"].items())
+        escalated = ", ".join(f"{k}={v}" for k, v in s["escalations"].items())
+        print(f"[Routing] answered: {answered} | escalated: {escalated}")
+
+
+atexit.register(_report_routing_stats)
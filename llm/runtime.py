@@ -0,0 +1,86 @@
+# llm/runtime.py
+
+import asyncio
+import threading
+import contextvars
+
+# All LLM requests run on one long-lived event loop in a daemon thread.
+# Pooled async clients are bound to this loop, so sync callers, threads
+# and callers running their own event loop all share the same connections.
+
+_loop: asyncio.AbstractEventLoop | None = None
+_thread: threading.Thread | None = None
+_lock = threading.Lock()
+
+
+def get_llm_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever,
+                name="llm-event-loop",
+                daemon=True
+            )
+            _thread.start()
+
+        return _loop
+
+
+def on_llm_loop() -> bool:
+    """
+    True when called from code already running on the LLM loop thread.
+    """
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def run_sync(coro):
+    """
+    Run a coroutine on the LLM loop and block until it finishes.
+    """
+
+    if on_llm_loop():
+        coro.close()
+        raise RuntimeError(
+            "Blocking LLM call made from the LLM event loop; await the async API instead."
+        )
+
+    future = asyncio.run_coroutine_threadsafe(_with_context(coro), get_llm_loop())
+    return future.result()
+
+
+def submit(coro):
+    """
+    Start a coroutine on the LLM loop without waiting for it.
+    Returns a concurrent.futures.Future.
+    """
+
+    return asyncio.run_coroutine_threadsafe(_with_context(coro), get_llm_loop())
+
+
+async def run_on_llm_loop(coro):
+    """
+    Await a coroutine on the LLM loop from any event loop.
+    """
+
+    if on_llm_loop():
+        return await coro
+
+    future = asyncio.run_coroutine_threadsafe(_with_context(coro), get_llm_loop())
+    return await asyncio.wrap_future(future)
+
+
+def _with_context(coro):
+    """
+    Carry the caller's context variables (stage tags, deadlines, trace
+    parents) over to the task that runs on the LLM loop.
+    """
+
+    ctx = contextvars.copy_context()
+
+    async def runner():
+        return await asyncio.get_running_loop().create_task(coro, context=ctx)
+
+    return runner()
@@ -0,0 +1,95 @@
+# llm/single_flight.py
+
+import atexit
+import asyncio
+
+# Collapses identical concurrent requests into one. The first caller
+# for a key starts the work; callers arriving while it is in flight
+# await the same task and receive its result (or exception). The work
+# runs as its own task, so one caller being cancelled does not cancel
+# it for the others; it is only cancelled once nobody is waiting.
+#
+# Only used from the LLM event loop, so no locking is needed.
+
+
+class _Flight:
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: dict[str, _Flight] = {}
+
+        self.started = 0        # requests that did the work
+        self.shared = 0         # requests served by another caller's flight
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, make_coro) -> tuple[object, bool]:
+        """
+        Run make_coro() once per key among concurrent callers.
+        Returns (result, shared) where shared is True for callers that
+        joined an existing flight.
+        """
+
+        flight = self._flights.get(key)
+        shared = flight is not None
+
+        if shared:
+            self.shared += 1
+        else:
+            self.started += 1
+            flight = _Flight(asyncio.ensure_future(make_coro()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> dict:
+        total = self.started + self.shared
+        return {
+            "started": self.started,
+            "shared": self.shared,
+            "hit_rate": (self.shared / total) if total else 0.0,
+            "in_flight": self.in_flight(),
+        }
+
+
+_groups: list[SingleFlight] = []
+
+
+def single_flight_group(name: str) -> SingleFlight:
+    group = SingleFlight(name)
+    _groups.append(group)
+    return group
+
+
+def single_flight_stats() -> dict:
+    return {g.name: g.stats() for g in _groups}
+
+
+def _report_single_flight_stats():
+    for g in _groups:
+        if g.shared:
+            s = g.stats()
+            print(f"[SingleFlight] {g.name}: started={s['started']} shared={s['shared']} ({s['hit_rate']:.0%})")
+
+
+atexit.register(_report_single_flight_stats)
@@ -0,0 +1,436 @@
+# llm/tracing.py
+
+import os
+import json
+import time
+import uuid
+import atexit
+import queue
+import random
+import asyncio
+import hashlib
+import inspect
+import datetime
+import functools
+import threading
+import contextvars
+
+# Lightweight tracing for the @traceable hot paths (call_llm,
+# StructuredLLM.call, choose_option, traverse).
+#
+# - Head sampling: the decision is made once at the root span and
+#   inherited by every nested span, so a trace is either complete or
+#   absent and unsampled calls cost one context-variable lookup.
+# - Payloads are truncated (or replaced by a hash) before export, so a
+#   span stays small however large the prompt is.
+# - Finished spans go to buffered sinks that flush in batches: a local
+#   JSONL file and/or LangSmith. Batches are written by a background
+#   thread per sink, never by the thread that ends the span (for
+#   acall_llm that is the shared LLM loop). Nothing is imported or sent
+#   when no sink is configured.
+#
+# Settings:
+#   LLM_TRACE_SINKS        comma list of "jsonl", "langsmith" (default:
+#                          "langsmith" when LANGSMITH_TRACING is on, else none)
+#   LLM_TRACE_SAMPLE_RATE  fraction of root spans kept (default 1.0)
+#   LLM_TRACE_PAYLOAD      "truncate" (default), "hash" or "full"
+#   LLM_TRACE_MAX_CHARS    kept characters per string when truncating (default 1000)
+#   LLM_TRACE_PATH         JSONL file (default outputs/traces.jsonl)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TRACE_PATH = os.path.join(BASE_DIR, "outputs", "traces.jsonl")
+
+# Current span, or _UNSAMPLED inside a trace that was not sampled
+_current = contextvars.ContextVar("trace_span", default=None)
+_UNSAMPLED = object()
+
+
+def tracing_enabled() -> bool:
+    for name in ("LANGSMITH_TRACING", "LANGCHAIN_TRACING_V2"):
+        if os.getenv(name, "").lower() in ("1", "true", "yes"):
+            return True
+    return False
+
+
+# ============================================================
+# PAYLOADS
+# ============================================================
+
+def summarize(value, mode: str = "truncate", max_chars: int = 1000, _depth: int = 0):
+    """
+    JSON-safe, size-bounded copy of a traced input or output.
+    """
+
+    if isinstance(value, str):
+        if mode == "full" or (mode == "truncate" and len(value) <= max_chars):
+            return value
+
+        digest = hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+        if mode == "hash":
+            return {"sha256": digest, "chars": len(value)}
+        return f"{value[:max_chars]}… [{len(value)} chars, sha256:{digest}]"
+
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+
+    if _depth >= 4:
+        return summarize(repr(value), mode, max_chars)
+
+    if hasattr(value, "model_dump"):
+        value = value.model_dump()
+
+    if isinstance(value, dict):
+        return {
+            str(k): summarize(v, mode, max_chars, _depth + 1)
+            for k, v in list(value.items())[:50]
+        }
+
+    if isinstance(value, (list, tuple, set)):
+        return [summarize(v, mode, max_chars, _depth + 1) for v in list(value)[:50]]
+
+    if isinstance(value, type):
+        return value.__name__
+
+    return summarize(repr(value), mode, max_chars)
+
+
+# ============================================================
+# SINKS
+# ============================================================
+
+class TraceSink:
+    """
+    Receives finished spans. Implementations buffer and export in
+    batches; write() runs on the sink's flusher thread.
+    """
+
+    def __init__(self, batch_size: int = 200, flush_interval: float = 5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def export(self, span: dict):
+        with self._lock:
+            self._buffer.append(span)
+            due = (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            batch = self._take() if due else None
+
+        if batch:
+            self._enqueue(batch)
+
+    def flush(self):
+        """
+        Write everything exported so far and wait until it is written.
+        """
+
+        with self._lock:
+            batch = self._take()
+
+        if batch:
+            self._enqueue(batch)
+        if self._thread is not None:
+            self._queue.join()
+
+    def _take(self) -> list[dict]:
+        # Caller holds self._lock
+        batch, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        return batch
+
+    def _enqueue(self, batch: list[dict]):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"trace-{type(self).__name__}",
+                    daemon=True
+                )
+                self._thread.start()
+
+        self._queue.put(batch)
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                self.write(batch)
+            except Exception as e:
+                # Tracing must never break the pipeline
+                print(f"[Tracing] {type(self).__name__} batch dropped: {e}")
+            finally:
+                self._queue.task_done()
+
+    def write(self, batch: list[dict]):
+        raise NotImplementedError
+
+
+class JSONLSink(TraceSink):
+
+    def __init__(self, path: str = DEFAULT_TRACE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._write_lock = threading.Lock()
+
+    def write(self, batch: list[dict]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        lines = "".join(json.dumps(span, default=str) + "\n" for span in batch)
+
+        with self._write_lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+class LangSmithSink(TraceSink):
+    """
+    Uploads spans as LangSmith runs with batch ingestion.
+    """
+
+    def __init__(self, project: str | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.project = project or os.getenv("LANGSMITH_PROJECT") or os.getenv("LANGCHAIN_PROJECT")
+        self._client = None
+        self._failed = False
+
+    def write(self, batch: list[dict]):
+        if self._failed:
+            return
+
+        try:
+            if self._client is None:
+                from langsmith import Client
+                self._client = Client()
+
+            runs = []
+            for span in batch:
+                run = {k: v for k, v in span.items() if k != "duration_ms"}
+                if self.project:
+                    run["session_name"] = self.project
+                runs.append(run)
+
+            self._client.batch_ingest_runs(create=runs)
+
+        except Exception as e:
+            # Tracing must never break the pipeline
+            self._failed = True
+            print(f"[Tracing] LangSmith export disabled: {e}")
+
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+class _Config:
+
+    def __init__(self, sinks, sample_rate, payload, max_chars):
+        self.sinks = sinks
+        self.sample_rate = sample_rate
+        self.payload = payload
+        self.max_chars = max_chars
+
+
+_config: _Config | None = None
+_config_lock = threading.Lock()
+_stats = {"sampled_traces": 0, "skipped_traces": 0, "spans": 0}
+
+
+def configure_tracing(
+        sinks: list[TraceSink] | None = None,
+        *,
+        sample_rate: float = 1.0,
+        payload: str = "truncate",
+        max_chars: int = 1000
+):
+    """
+    Replace the environment-based configuration (flushes the old sinks).
+    """
+
+    global _config
+
+    with _config_lock:
+        old, _config = _config, _Config(sinks or [], sample_rate, payload, max_chars)
+
+    if old:
+        for sink in old.sinks:
+            sink.flush()
+
+
+def _get_config() -> _Config:
+    global _config
+
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                default = "langsmith" if tracing_enabled() else ""
+                names = [n.strip() for n in os.getenv("LLM_TRACE_SINKS", default).split(",") if n.strip()]
+
+                sinks = []
+                for name in names:
+                    if name == "jsonl":
+                        sinks.append(JSONLSink(os.getenv("LLM_TRACE_PATH", DEFAULT_TRACE_PATH)))
+                    elif name == "langsmith":
+                        sinks.append(LangSmithSink())
+                    else:
+                        raise ValueError(f"Unknown trace sink: {name}")
+
+                _config = _Config(
+                    sinks,
+                    float(os.getenv("LLM_TRACE_SAMPLE_RATE", "1.0")),
+                    os.getenv("LLM_TRACE_PAYLOAD", "truncate"),
+                    int(os.getenv("LLM_TRACE_MAX_CHARS", "1000")),
+                )
+
+    return _config
+
+
+def flush_traces():
+    config = _config
+    if config:
+        for sink in config.sinks:
+            sink.flush()
+
+
+def tracing_stats() -> dict:
+    return dict(_stats)
+
+
+atexit.register(flush_traces)
+
+
+# ============================================================
+# SPANS
+# ============================================================
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _start_span(name: str, run_type: str, parent: dict | None, inputs: dict, config: _Config) -> dict:
+    span_id = str(uuid.uuid4())
+    start = _now()
+    order = start.strftime("%Y%m%dT%H%M%S%fZ") + span_id
+
+    return {
+        "id": span_id,
+        "trace_id": parent["trace_id"] if parent else span_id,
+        "parent_run_id": parent["id"] if parent else None,
+        "dotted_order": f"{parent['dotted_order']}.{order}" if parent else order,
+        "name": name,
+        "run_type": run_type,
+        "start_time": start,
+        "inputs": summarize(inputs, config.payload, config.max_chars),
+        "_t0": time.perf_counter(),
+    }
+
+
+def _end_span(span: dict, config: _Config, output=None, error: BaseException | None = None):
+    span["end_time"] = _now()
+    span["duration_ms"] = round((time.perf_counter() - span.pop("_t0")) * 1000, 2)
+
+    if error is not None:
+        span["error"] = f"{error.__class__.__name__}: {error}"
+    else:
+        span["outputs"] = {"output": summarize(output, config.payload, config.max_chars)}
+
+    _stats["spans"] += 1
+    for sink in config.sinks:
+        sink.export(span)
+
+
+def _bind_inputs(signature: inspect.Signature | None, args, kwargs) -> dict:
+    if signature is None:
+        return {"args": args, "kwargs": kwargs}
+
+    try:
+        arguments = signature.bind_partial(*args, **kwargs).arguments
+    except TypeError:
+        return {"args": args, "kwargs": kwargs}
+
+    return {k: v for k, v in arguments.items() if k not in ("self", "cls")}
+
+
+def traceable(name: str | None = None, run_type: str = "chain", **options):
+    """
+    Drop-in for langsmith.traceable backed by the sinks above.
+    """
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        try:
+            signature = inspect.signature(func)
+        except (TypeError, ValueError):
+            signature = None
+
+        def enter(args, kwargs):
+            """
+            Returns (config, span, token); span is None when not traced.
+            """
+
+            parent = _current.get()
+            if parent is _UNSAMPLED:
+                return None, None, None
+
+            config = _get_config()
+            if not config.sinks:
+                return config, None, None
+
+            if parent is None and random.random() >= config.sample_rate:
+                _stats["skipped_traces"] += 1
+                return config, None, _current.set(_UNSAMPLED)
+
+            if parent is None:
+                _stats["sampled_traces"] += 1
+
+            span = _start_span(span_name, run_type, parent, _bind_inputs(signature, args, kwargs), config)
+            return config, span, _current.set(span)
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                config, span, token = enter(args, kwargs)
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    if span is not None:
+                        _end_span(span, config, error=e)
+                    raise
+                finally:
+                    if token is not None:
+                        _current.reset(token)
+
+                if span is not None:
+                    _end_span(span, config, output=result)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            config, span, token = enter(args, kwargs)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                if span is not None:
+                    _end_span(span, config, error=e)
+                raise
+            finally:
+                if token is not None:
+                    _current.reset(token)
+
+            if span is not None:
+                _end_span(span, config, output=result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,347 @@
+# llm/usage.py
+
+import os
+import json
+import time
+import functools
+import threading
+import contextvars
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_REPORT_PATH = os.path.join(BASE_DIR, "outputs", "usage_report.json")
+
+STAGES = ("traversal", "pruning", "global", "blueprint", "nodes", "functions")
+
+# Tags for the current call, set by the pipeline stages
+_stage = contextvars.ContextVar("llm_stage", default="untagged")
+_node = contextvars.ContextVar("llm_node", default=None)
+
+# When each stage was first entered in this process (time.monotonic)
+_stage_started = {}
+
+# Context-manager factories run around every tracked stage (see add_stage_hook)
+_stage_hooks = []
+
+
+class BudgetExceeded(RuntimeError):
+    """
+    Raised before a call when its stage has used up its hard token budget.
+    """
+
+
+@dataclass
+class UsageRecord:
+    stage: str
+    node: str | None
+    provider: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    estimated: bool         # True when the provider did not report token counts
+    seconds: float
+    cache_hit: bool = False
+    shared: bool = False    # served by an identical in-flight request
+    load_seconds: float = 0.0   # part of seconds spent loading the model
+    reused_prefix_tokens: int = 0   # prompt tokens served from the provider's prefix cache
+
+
+# ============================================================
+# TAGGING
+# ============================================================
+
+def current_stage() -> str:
+    return _stage.get()
+
+
+def current_node() -> str | None:
+    return _node.get()
+
+
+def stage_elapsed(stage: str) -> float:
+    """
+    Seconds since the stage was first entered in this process.
+    """
+
+    started = _stage_started.setdefault(stage, time.monotonic())
+    return time.monotonic() - started
+
+
+@contextmanager
+def usage_stage(stage: str):
+    _stage_started.setdefault(stage, time.monotonic())
+    token = _stage.set(stage)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+@contextmanager
+def usage_node(node_path: str):
+    token = _node.set(node_path)
+    try:
+        yield
+    finally:
+        _node.reset(token)
+
+
+def add_stage_hook(hook):
+    """
+    Register hook(stage) -> context manager, entered around every
+    function decorated with track_stage (e.g. model warm-up).
+    """
+
+    if hook not in _stage_hooks:
+        _stage_hooks.append(hook)
+
+
+def track_stage(stage: str):
+    """
+    Decorator tagging every LLM call made inside the function with stage.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with ExitStack() as stack:
+                # Hooks run once per stage, not for nested tracked calls
+                if current_stage() != stage:
+                    for hook in list(_stage_hooks):
+                        stack.enter_context(hook(stage))
+                stack.enter_context(usage_stage(stage))
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+# ============================================================
+# TRACKER
+# ============================================================
+
+class UsageTracker:
+
+    def __init__(self, budgets: dict | None = None, prices: dict | None = None):
+        self._lock = threading.Lock()
+        self.records: list[UsageRecord] = []
+        self._stage_tokens = {}             # stage → tokens so far, kept by record()
+        self.budgets = budgets or {}        # stage → {"soft": tokens, "hard": tokens}
+        self.prices = prices or {}          # model → {"prompt": $/1M tokens, "completion": $/1M tokens}
+        self._warned = set()
+        self.degraded = {}                  # stage → {"reasons": [...], "items": [...]}
+        self.loads = []                     # (stage, provider, model, seconds) from warm-ups
+
+    def stage_tokens(self, stage: str) -> int:
+        with self._lock:
+            return self._stage_tokens.get(stage, 0)
+
+    def check_budget(self, stage: str):
+        hard = (self.budgets.get(stage) or {}).get("hard")
+        if hard and self.stage_tokens(stage) >= hard:
+            raise BudgetExceeded(
+                f"Stage '{stage}' exceeded its hard token budget of {hard}."
+            )
+
+    def record(self, rec: UsageRecord):
+        with self._lock:
+            self.records.append(rec)
+            self._stage_tokens[rec.stage] = (
+                self._stage_tokens.get(rec.stage, 0) + rec.prompt_tokens + rec.completion_tokens
+            )
+
+        soft = (self.budgets.get(rec.stage) or {}).get("soft")
+        if soft and rec.stage not in self._warned and self.stage_tokens(rec.stage) >= soft:
+            self._warned.add(rec.stage)
+            print(f"[Usage] WARNING: stage '{rec.stage}' passed its soft token budget of {soft}.")
+
+    def record_load(self, stage: str, provider: str, model: str, seconds: float):
+        """
+        Model load time spent outside any call (warm-up).
+        """
+
+        with self._lock:
+            self.loads.append((stage, provider, model, seconds))
+
+    def mark_degraded(self, stage: str, reason: str, items=()):
+        """
+        Record that a stage fell back to a degraded result (e.g. a time
+        or token budget ran out) for the given nodes.
+        """
+
+        with self._lock:
+            entry = self.degraded.setdefault(stage, {"reasons": [], "items": []})
+            if reason not in entry["reasons"]:
+                entry["reasons"].append(reason)
+            entry["items"].extend(items)
+
+    def cost(self, rec: UsageRecord) -> float:
+        price = self.prices.get(rec.model)
+        if not price:
+            return 0.0
+        return (
+            rec.prompt_tokens * price.get("prompt", 0.0)
+            + rec.completion_tokens * price.get("completion", 0.0)
+        ) / 1_000_000
+
+    def summary(self) -> dict:
+        with self._lock:
+            records = list(self.records)
+            degraded = {stage: dict(d) for stage, d in self.degraded.items()}
+            loads = list(self.loads)
+
+        def empty():
+            return {
+                "calls": 0,
+                "cache_hits": 0,
+                "shared_calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "reused_prefix_tokens": 0,
+                "estimated_calls": 0,
+                "seconds": 0.0,
+                "load_seconds": 0.0,
+                "warmups": 0,
+                "cost_usd": 0.0,
+                "nodes": {},
+            }
+
+        stages = {}
+
+        for r in records:
+            s = stages.setdefault(r.stage, empty())
+
+            s["calls"] += 1
+            s["cache_hits"] += int(r.cache_hit)
+            s["shared_calls"] += int(r.shared)
+            s["prompt_tokens"] += r.prompt_tokens
+            s["completion_tokens"] += r.completion_tokens
+            s["reused_prefix_tokens"] += r.reused_prefix_tokens
+            s["estimated_calls"] += int(r.estimated)
+            s["seconds"] += r.seconds
+            s["load_seconds"] += r.load_seconds
+            s["cost_usd"] += self.cost(r)
+
+            if r.node:
+                n = s["nodes"].setdefault(r.node, {"calls": 0, "tokens": 0, "seconds": 0.0})
+                n["calls"] += 1
+                n["tokens"] += r.prompt_tokens + r.completion_tokens
+                n["seconds"] += r.seconds
+
+        for stage, _, _, seconds in loads:
+            s = stages.setdefault(stage, empty())
+            s["warmups"] += 1
+            s["load_seconds"] += seconds
+
+        for stage, s in stages.items():
+            # Call time minus in-call model loads; warm-ups are not call time
+            in_call_load = sum(r.load_seconds for r in records if r.stage == stage)
+            s["inference_seconds"] = round(s["seconds"] - in_call_load, 3)
+            s["load_seconds"] = round(s["load_seconds"], 3)
+            s["seconds"] = round(s["seconds"], 3)
+            s["cost_usd"] = round(s["cost_usd"], 6)
+            s["total_tokens"] = s["prompt_tokens"] + s["completion_tokens"]
+            s["budget"] = self.budgets.get(stage, {})
+
+        for stage, d in degraded.items():
+            s = stages.setdefault(stage, {
+                **empty(), "total_tokens": 0, "inference_seconds": 0.0, "budget": self.budgets.get(stage, {})
+            })
+            s["degraded"] = {"reasons": d["reasons"], "items": sorted(set(d["items"]))}
+
+        return stages
+
+
+def _load_budgets() -> dict:
+    """
+    LLM_BUDGET_<STAGE>_SOFT / LLM_BUDGET_<STAGE>_HARD in total tokens.
+    """
+    budgets = {}
+
+    for stage in STAGES:
+        for kind in ("soft", "hard"):
+            value = os.getenv(f"LLM_BUDGET_{stage.upper()}_{kind.upper()}")
+            if value:
+                budgets.setdefault(stage, {})[kind] = int(value)
+
+    return budgets
+
+
+def _load_prices() -> dict:
+    """
+    LLM_PRICES='{"meta/llama3-70b-instruct": {"prompt": 0.6, "completion": 0.8}}' ($ per 1M tokens)
+    """
+    raw = os.getenv("LLM_PRICES")
+    return json.loads(raw) if raw else {}
+
+
+_tracker = UsageTracker(budgets=_load_budgets(), prices=_load_prices())
+
+
+def get_usage_tracker() -> UsageTracker:
+    return _tracker
+
+
+# ============================================================
+# REPORT
+# ============================================================
+
+def write_usage_report(path: str = DEFAULT_REPORT_PATH, tracker: UsageTracker | None = None) -> dict:
+    """
+    Merge this process's stages into the JSON report. Each pipeline
+    stage runs in its own process, so stages from earlier processes are
+    kept and a restarted stage replaces its previous entry.
+    """
+
+    tracker = tracker or _tracker
+    summary = tracker.summary()
+    report = {"stages": {}}
+
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    stages = report.setdefault("stages", {})
+
+    for stage, data in summary.items():
+        data["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        stages[stage] = data
+
+    report["totals"] = {
+        key: sum(s.get(key, 0) for s in stages.values())
+        for key in (
+            "calls", "cache_hits", "shared_calls", "prompt_tokens", "completion_tokens",
+            "total_tokens", "reused_prefix_tokens"
+        )
+    }
+    for key in ("seconds", "load_seconds", "inference_seconds"):
+        report["totals"][key] = round(sum(s.get(key, 0.0) for s in stages.values()), 3)
+    report["totals"]["cost_usd"] = round(sum(s.get("cost_usd", 0.0) for s in stages.values()), 6)
+
+    # Stages that fell back to partial results because a budget ran out
+    report["degraded"] = sorted(stage for stage, s in stages.items() if s.get("degraded"))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for stage, data in summary.items():
+        print(
+            f"[Usage] {stage}: calls={data['calls']} prompt={data['prompt_tokens']} "
+            f"completion={data['completion_tokens']} time={data['seconds']}s "
+            f"(load {data['load_seconds']}s)"
+        )
+        if data.get("degraded"):
+            print(
+                f"[Usage] {stage}: DEGRADED ({len(data['degraded']['items'])} nodes): "
+                + "; ".join(data["degraded"]["reasons"])
+            )
+
+    return report
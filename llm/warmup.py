@@ -0,0 +1,157 @@
+# llm/warmup.py
+# Run:
+# python -m llm.warmup
+# python -m llm.warmup --stages traversal pruning --keep-alive 1h
+
+import os
+import argparse
+from contextlib import contextmanager
+
+from llm.providers import get_provider, resolve_provider
+from llm.response_cache import get_response_cache
+from llm.routing import resolve_route
+from llm.runtime import run_sync, submit
+from llm.usage import STAGES, add_stage_hook, get_usage_tracker
+
+# Model residency across pipeline stages.
+#
+# Loading a model (Ollama, llama.cpp) takes seconds to minutes, and it
+# used to happen inside the first call of every stage, where it counted
+# against the call deadline and skewed latency stats. Each stage runs
+# in its own process, so:
+#
+# - On entering a stage, its models are loaded before the first call.
+# - On leaving a stage, the next stage's models are loaded with a
+#   keep_alive long enough to survive the process switch.
+# - `python -m llm.warmup` loads every stage's models once at pipeline
+#   start (see run_full_pipeline.bat).
+#
+# Load times are reported separately from inference in the usage
+# report (load_seconds / inference_seconds). Warm-up never fails a run:
+# errors are printed and the first call loads the model as before.
+#
+# Settings:
+#   LLM_WARMUP=0                no warm-up at stage boundaries
+#   LLM_WARMUP_KEEP_ALIVE       residency after a warm-up (default: the provider's, e.g. OLLAMA_KEEP_ALIVE)
+#   LLM_PREWARM_NEXT_STAGE=1    also load the next stage's models while this stage runs
+#                               (only when both fit in memory together)
+#   LLM_RELEASE_UNUSED=1        unload this stage's models on exit unless the next stage uses them
+
+# Schema whose route decides the models of a structured stage; the
+# markdown stages (global, nodes) use the provider's default model
+STAGE_SCHEMAS = {
+    "traversal": "NodeDecision",
+    "pruning": "PruneDecision",
+    "blueprint": "ProjectBlueprint",
+    "functions": "FileFunctionSpec",
+}
+
+
+def _flag(name: str, default: str = "0") -> bool:
+    return os.getenv(name, default) == "1"
+
+
+def stage_models(stage: str) -> list[tuple[str, str]]:
+    """
+    (provider, model) pairs a stage will call, in route order.
+    """
+
+    provider = resolve_provider(stage)
+    default_model = get_provider(provider).default_model()
+    schema = STAGE_SCHEMAS.get(stage)
+
+    models = resolve_route(schema, stage, default_model, provider) if schema else [default_model]
+
+    return list(dict.fromkeys((provider, model) for model in models))
+
+
+def next_stage(stage: str) -> str | None:
+    if stage not in STAGES:
+        return None
+    index = STAGES.index(stage) + 1
+    return STAGES[index] if index < len(STAGES) else None
+
+
+async def warm_models(stage: str, pairs: list, keep_alive: str | None = None) -> dict:
+    """
+    Load the models one after another (loading two at once only makes
+    them compete for memory bandwidth). Returns {model: seconds}.
+    """
+
+    keep_alive = keep_alive or os.getenv("LLM_WARMUP_KEEP_ALIVE") or None
+    tracker = get_usage_tracker()
+    loaded = {}
+
+    for provider, model in pairs:
+        try:
+            seconds = await get_provider(provider).warm(model, keep_alive)
+        except Exception as e:
+            print(f"[Warmup] {provider}:{model} not loaded ({type(e).__name__}: {e})")
+            continue
+
+        if seconds is None:
+            # Remote backend: nothing to load
+            continue
+
+        tracker.record_load(stage, provider, model, seconds)
+        loaded[model] = seconds
+        print(f"[Warmup] {stage}: {provider}:{model} ready ({seconds:.1f}s load)")
+
+    return loaded
+
+
+async def release_models(pairs: list):
+    for provider, model in pairs:
+        try:
+            await get_provider(provider).release(model)
+        except Exception as e:
+            print(f"[Warmup] {provider}:{model} not released ({type(e).__name__}: {e})")
+
+
+@contextmanager
+def stage_residency(stage: str):
+    """
+    Stage hook: load the stage's models up front and hand over to the
+    next stage's models on the way out.
+    """
+
+    # Replayed runs never reach a provider
+    if not _flag("LLM_WARMUP", "1") or get_response_cache().read_only:
+        yield
+        return
+
+    following = next_stage(stage)
+    current = stage_models(stage)
+    upcoming = stage_models(following) if following else []
+
+    run_sync(warm_models(stage, current))
+    if upcoming and _flag("LLM_PREWARM_NEXT_STAGE"):
+        submit(warm_models(following, upcoming))
+
+    try:
+        yield
+    finally:
+        if _flag("LLM_RELEASE_UNUSED"):
+            run_sync(release_models([pair for pair in current if pair not in upcoming]))
+
+    # Only after a successful stage: a failed one should not wait for
+    # models that will not be used
+    if upcoming:
+        run_sync(warm_models(following, upcoming))
+
+
+add_stage_hook(stage_residency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the pipeline's models before the first stage.")
+    parser.add_argument("--stages", nargs="*", default=list(STAGES))
+    parser.add_argument("--keep-alive", help="Residency after loading, e.g. 1h (default: LLM_WARMUP_KEEP_ALIVE)")
+    args = parser.parse_args()
+
+    pairs = list(dict.fromkeys(pair for stage in args.stages for pair in stage_models(stage)))
+    run_sync(warm_models("warmup", pairs, args.keep_alive))
+
+
+if __name__ == "__main__":
+    main()
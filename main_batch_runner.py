@@ -0,0 +1,212 @@
+# main_batch_runner.py
+# Run:
+# python main_batch_runner.py --requirements data/requirements.jsonl --json-file data/Web_Dev_Only.json --start-node "Core Application & Web Stacks"
+# python main_batch_runner.py --requirements data/requirements.jsonl --json-file data/Web_Dev_Only.json --start-node "Core Application & Web Stacks" --workers 16 --lookahead 3 --output-dir outputs/batch
+
+import os
+import re
+import json
+import time
+import argparse
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from core.decision_tree import DecisionTree, load_decision_tree
+from core.stack_index import get_reuse_stats, get_stack_index, remember_enabled
+from llm.usage import get_usage_tracker, track_stage, write_usage_report
+from main_runner import LLMClient, build_clean_final_prompt, build_stack_meta, traverse
+
+# Stack selection for many requirements in one process. Every
+# traversal shares the compiled tree, the LLM client and the pooled
+# provider connections; llm/governor.py bounds how many requests reach
+# each provider, so --workers only needs to be large enough to keep it
+# busy.
+#
+# Input: JSONL, one requirement per line:
+#   {"id": "bakery", "prompt": "build a backend for online bakery shop"}
+# ("id" is optional and defaults to the line number.)
+#
+# Output, per requirement: <output-dir>/<id>/stack_meta.json and
+# final_prompt.txt (plus stack_graph.png with --render), and
+# <output-dir>/batch_summary.json with per-item status and throughput.
+
+
+def read_requirements(path: str) -> list[dict]:
+    items = []
+    seen = set()
+
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+
+            entry = json.loads(line)
+            prompt = (entry.get("prompt") or "").strip()
+            if not prompt:
+                raise ValueError(f"{path}:{number}: missing 'prompt'.")
+
+            item_id = re.sub(r"[^A-Za-z0-9._-]+", "_", str(entry.get("id", number))).strip("._") or str(number)
+            if item_id in seen:
+                raise ValueError(f"{path}:{number}: duplicate id '{item_id}'.")
+            seen.add(item_id)
+
+            items.append({"id": item_id, "prompt": prompt})
+
+    return items
+
+
+def select_stack(item: dict, tree: DecisionTree, start_node: str, llm: LLMClient,
+                 output_dir: str, lookahead: int | None, reuse: bool | None, render: bool,
+                 remember: bool = False) -> dict:
+    """
+    One requirement: traversal plus its output files. Failures are
+    returned in the result instead of stopping the batch.
+    """
+
+    start = time.perf_counter()
+    item_dir = os.path.join(output_dir, item["id"])
+
+    try:
+        tech_stack, recorder = traverse(tree, start_node, llm, item["prompt"], lookahead=lookahead, reuse=reuse)
+        if remember:
+            get_stack_index().add(item["prompt"], start_node, tech_stack, recorder.choice_rationales)
+
+        os.makedirs(item_dir, exist_ok=True)
+
+        with open(os.path.join(item_dir, "final_prompt.txt"), "w", encoding="utf-8") as f:
+            f.write(build_clean_final_prompt(item["prompt"], tech_stack, recorder))
+
+        with open(os.path.join(item_dir, "stack_meta.json"), "w", encoding="utf-8") as f:
+            json.dump(build_stack_meta(item["prompt"], tech_stack, recorder), f, indent=2)
+
+        if render:
+            recorder.render(os.path.join(item_dir, "stack_graph"))
+
+    except Exception as e:
+        print(f"[Batch] {item['id']} failed: {type(e).__name__}: {e}")
+        return {
+            "id": item["id"],
+            "status": "failed",
+            "error": f"{type(e).__name__}: {e}",
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+    seconds = time.perf_counter() - start
+    print(f"[Batch] {item['id']} done in {seconds:.1f}s: {' → '.join(tech_stack)}")
+
+    return {
+        "id": item["id"],
+        "status": "ok",
+        "tech_stack": tech_stack,
+        "seconds": round(seconds, 3),
+        "output_dir": item_dir,
+    }
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@track_stage("traversal")
+def run_batch(items: list[dict], tree: DecisionTree, start_node: str, output_dir: str,
+              workers: int = 8, lookahead: int | None = None, reuse: bool | None = None,
+              render: bool = False, remember: bool | None = None) -> dict:
+    """
+    Run every requirement's traversal on a shared pool of worker
+    threads and return the batch summary.
+    """
+
+    llm = LLMClient()
+    remember = remember_enabled(reuse) if remember is None else remember
+    started = time.perf_counter()
+
+    # Workers inherit the stage tag (and skip the per-stage warm-up,
+    # which already ran once for the batch)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch") as pool:
+        futures = [
+            pool.submit(
+                contextvars.copy_context().run,
+                select_stack, item, tree, start_node, llm, output_dir, lookahead, reuse, render, remember
+            )
+            for item in items
+        ]
+        results = [future.result() for future in futures]
+
+    wall = time.perf_counter() - started
+    done = [r["seconds"] for r in results if r["status"] == "ok"]
+    usage = get_usage_tracker().summary().get("traversal", {})
+
+    return {
+        "items": results,
+        "stats": {
+            "requirements": len(results),
+            "succeeded": len(done),
+            "failed": len(results) - len(done),
+            "workers": workers,
+            "wall_seconds": round(wall, 3),
+            "requirements_per_minute": round(len(done) / wall * 60, 2) if wall else 0.0,
+            "p50_seconds": round(_percentile(done, 0.5), 3),
+            "p95_seconds": round(_percentile(done, 0.95), 3),
+            "llm_calls": usage.get("calls", 0),
+            "llm_calls_per_requirement": round(usage.get("calls", 0) / len(results), 2) if results else 0.0,
+            "total_tokens": usage.get("total_tokens", 0),
+            "reuse": get_reuse_stats().stats(),
+        },
+    }
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requirements", required=True, help="JSONL file with one {\"id\", \"prompt\"} per line")
+    parser.add_argument("--json-file", required=True)
+    parser.add_argument("--start-node", required=True)
+    parser.add_argument("--output-dir", default="outputs/batch")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--lookahead", type=int, help="Levels chosen per LLM call (default: TRAVERSAL_LOOKAHEAD or 1)")
+    parser.add_argument("--reuse", action="store_true", default=None, help="Reuse paths of similar earlier requirements (default: STACK_REUSE)")
+    parser.add_argument("--remember", action="store_true", default=None, help="Add the selections to the reuse index (default: STACK_REMEMBER, implied by reuse)")
+    parser.add_argument("--render", action="store_true", help="Also render each stack graph")
+    args = parser.parse_args()
+
+    requirements = read_requirements(args.requirements)
+    decision_tree = load_decision_tree(args.json_file)
+
+    summary = run_batch(
+        requirements,
+        decision_tree,
+        args.start_node,
+        args.output_dir,
+        workers=args.workers,
+        lookahead=args.lookahead,
+        reuse=args.reuse,
+        render=args.render,
+        remember=args.remember
+    )
+
+    # Selections are remembered for similar requirements in later runs
+    if args.remember or remember_enabled(args.reuse):
+        get_stack_index().save()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = os.path.join(args.output_dir, "batch_summary.json")
+
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    stats = summary["stats"]
+    print(
+        f"\n[Batch] {stats['succeeded']}/{stats['requirements']} requirements in {stats['wall_seconds']}s "
+        f"({stats['requirements_per_minute']}/min, p50 {stats['p50_seconds']}s, p95 {stats['p95_seconds']}s, "
+        f"{stats['llm_calls_per_requirement']} calls each)"
+    )
+    print(f"Summary saved to: {summary_path}")
+
+    write_usage_report()
@@ -1,6 +1,7 @@
 # main_prune_runner.py
 import json
 from pruning.pruning_pipeline import run_pruning_pipeline
+from llm.usage import write_usage_report
 
 
 if __name__ == "__main__":
@@ -32,3 +33,5 @@ if __name__ == "__main__":
 
     print("\nPruning complete.")
     print("Pruned structure saved to data/pruned_structure.json")
+
+    write_usage_report()
@@ -4,16 +4,24 @@
 
 import os
 import json
+import math
+import asyncio
 import argparse
 from dataclasses import dataclass, field
-from typing import Any, List, Optional, Tuple
+from typing import List, Tuple
 
+from core.decision_tree import DecisionTree, load_decision_tree
 from core.langgraph_runner import LangGraphRecorder
-from core.llm_structured import StructuredLLM
-from core.schemas import NodeDecision
+from core.llm_structured import StructuredLLM, StructuredOutputError
+from core.option_ranker import shortlist_options, shortlist_size, tournament_chunk
+from core.schemas import NodeDecision, OptionRanking, PathDecision
+from core.stack_index import get_reuse_stats, get_stack_index, remember_enabled, reuse_enabled
 from dotenv import load_dotenv
 load_dotenv()
-from langsmith import traceable
+from llm.local_llama_client import estimate_tokens
+from llm.runtime import run_sync
+from llm.tracing import traceable
+from llm.usage import track_stage, usage_node, write_usage_report
 
 # ============================================================
 # LLM CLIENT
@@ -23,8 +31,11 @@ class LLMClient:
     def __init__(self, model: str = None):
         self.structured = StructuredLLM(model=model)
 
-    @traceable(name="Choose Option")
-    def choose_option(self, prompt: str, options: List[str]) -> NodeDecision:
+    def _option_request(self, prompt: str, options: List[str]):
+        """
+        Prompt and choice validator for picking one of options.
+        """
+
         if not options:
             raise ValueError("No options available for selection.")
 
@@ -48,89 +59,252 @@ class LLMClient:
         {{
           "choice": "exact_option_from_list",
           "rationale": "short explanation",
-          "purpose": "what this option enables"
+          "purpose": "what this option enables",
+          "confidence": 0.0 to 1.0 (how sure you are)
         }}
 
         The value of "choice" MUST be a string exactly matching one of the options above.
         Do NOT return a list.
         """
 
+        # Create lowercase lookup map
+        option_lookup = {opt.lower(): opt for opt in options}
+
+        # Robust semantic validation (case-insensitive match).
+        # An invalid choice from a small routed model escalates to the next one.
+        def validate_choice(response: NodeDecision) -> NodeDecision:
+            choice_value = response.choice
+
+            # If model returned list instead of string
+            if isinstance(choice_value, list):
+                if len(choice_value) == 1:
+                    choice_value = choice_value[0]
+                else:
+                    raise ValueError(
+                        f"Model returned multiple choices {choice_value}. Only one allowed."
+                    )
+
+            choice_value = str(choice_value).strip()
+
+            if choice_value.lower() not in option_lookup:
+                raise ValueError(
+                    f"Invalid choice '{choice_value}'. Must be one of {options}"
+                )
+
+            # Replace with canonical tree value
+            response.choice = option_lookup[choice_value.lower()]
+
+            return response
+
+        return formatted_prompt, validate_choice
+
+    @traceable(name="Choose Option")
+    def choose_option(self, prompt: str, options: List[str]) -> NodeDecision:
+        formatted_prompt, validate_choice = self._option_request(prompt, options)
+
         # response is a NodeDecision object returned by this function
         response: NodeDecision = self.structured.call(
             prompt=formatted_prompt,
-            schema=NodeDecision
+            schema=NodeDecision,
+            validate=validate_choice
+        )
+
+        return response
+
+    async def achoose_option(self, prompt: str, options: List[str]) -> NodeDecision:
+        formatted_prompt, validate_choice = self._option_request(prompt, options)
+
+        return await self.structured.acall(
+            prompt=formatted_prompt,
+            schema=NodeDecision,
+            validate=validate_choice
         )
 
-        # Robust semantic validation (case-insensitive match)
+    @traceable(name="Option Tournament")
+    def choose_option_tournament(self, context: str, options: List[str], chunk_size: int) -> Tuple[NodeDecision, str]:
+        """
+        Pick one of many options, best-ranked first, in rounds of
+        parallel calls over chunks of at most chunk_size options.
+        Returns the final decision and the prompt of the final round.
+        """
 
-        choice_value = response.choice
+        async def play(candidates: List[str]) -> Tuple[NodeDecision, str]:
+            prompt = option_prompt(context, candidates)
+            return await self.achoose_option(prompt, candidates), prompt
 
-        # If model returned list instead of string
-        if isinstance(choice_value, list):
-            if len(choice_value) == 1:
-                choice_value = choice_value[0]
-            else:
+        async def run() -> Tuple[NodeDecision, str]:
+            candidates = list(options)
+
+            while len(candidates) > chunk_size:
+                groups = math.ceil(len(candidates) / chunk_size)
+                # Interleaved so every chunk gets some of the best-ranked options
+                winners = await asyncio.gather(*(play(candidates[i::groups]) for i in range(groups)))
+                candidates = [decision.choice for decision, _ in winners]
+
+            return await play(candidates)
+
+        return run_sync(run())
+
+    async def arank_options(self, prompt: str, options: List[str], width: int) -> List[NodeDecision]:
+        """
+        Up to width of options, best first, each with its own rationale
+        and confidence. Unknown and repeated choices are dropped.
+        """
+
+        if not options:
+            raise ValueError("No options available for selection.")
+
+        options_text = "\n".join(f"- {opt}" for opt in options)
+
+        formatted_prompt = f"""
+        You are navigating a predefined decision tree.
+
+        Your task is NOT to generate a project structure.
+        Your task is ONLY to rank the best options from the provided list.
+
+        USER REQUIREMENT:
+        {prompt}
+
+        OPTIONS TO RANK (return the best {width}):
+
+        {options_text}
+
+        Return ONLY valid JSON in this exact format:
+
+        {{
+          "ranking": [
+            {{
+              "choice": "exact_option_from_list",
+              "rationale": "short explanation",
+              "purpose": "what this option enables",
+              "confidence": 0.0 to 1.0 (how well it fits)
+            }}
+          ]
+        }}
+
+        Best option first, at most {width} entries. Each "choice" MUST
+        exactly match one of the options above, and appear only once.
+        """
+
+        option_lookup = {opt.lower(): opt for opt in options}
+
+        def validate_ranking(response: OptionRanking) -> OptionRanking:
+            ranking = []
+            seen = set()
+
+            for decision in response.ranking:
+                choice = option_lookup.get(str(decision.choice).strip().lower())
+                if choice is None or choice in seen:
+                    continue
+                seen.add(choice)
+                decision.choice = choice
+                ranking.append(decision)
+
+            if not ranking:
                 raise ValueError(
-                    f"Model returned multiple choices {choice_value}. Only one allowed."
+                    f"No valid choice in ranking. Must be from {options}"
                 )
 
-        choice_value = str(choice_value).strip()
+            response.ranking = ranking[:width]
+            return response
 
-        # Create lowercase lookup map
-        option_lookup = {opt.lower(): opt for opt in options}
+        response: OptionRanking = await self.structured.acall(
+            prompt=formatted_prompt,
+            schema=OptionRanking,
+            validate=validate_ranking
+        )
 
-        if choice_value.lower() not in option_lookup:
-            raise ValueError(
-                f"Invalid choice '{choice_value}'. Must be one of {options}"
-            )
+        return response.ranking
 
-        # Replace with canonical tree value
-        response.choice = option_lookup[choice_value.lower()]
 
-        return response
+    @traceable(name="Choose Path")
+    def choose_path(
+            self,
+            prompt: str,
+            options_tree: str,
+            levels: int,
+            tree: DecisionTree,
+            node_id: int
+    ) -> Tuple[List[Tuple[int, NodeDecision]], bool]:
+        """
+        Pick up to `levels` consecutive options below node_id in one
+        call. Returns the hops that validate against the tree as
+        [(child id, decision)] and whether a later hop was rejected.
+        """
 
+        formatted_prompt = f"""
+        You are navigating a predefined decision tree.
 
-# ============================================================
-# TREE UTILITIES
-# ============================================================
+        Your task is ONLY to select a path through the options below,
+        one option per level, starting at the top level.
+
+        USER REQUIREMENT:
+        {prompt}
+
+        OPTIONS TREE (indentation shows sub-options; options at the
+        deepest level shown may have further sub-options):
+
+{options_tree}
+
+        Return ONLY valid JSON in this exact format:
+
+        {{
+          "steps": [
+            {{
+              "choice": "exact_option_name",
+              "rationale": "short explanation",
+              "purpose": "what this option enables",
+              "confidence": 0.0 to 1.0 (how sure you are)
+            }}
+          ]
+        }}
+
+        Give one step per level, at most {levels}. Each "choice" MUST
+        exactly match an option nested under the previous step's choice.
+        """
 
-def load_tree_from_file(filename: str) -> Any:
-    with open(filename, "r", encoding="utf-8") as f:
-        return json.load(f)
+        hops = []
+        rejected = []
 
+        # Keep the valid prefix; only an invalid first hop fails the answer
+        def validate_path(response: PathDecision) -> PathDecision:
+            hops.clear()
+            rejected.clear()
+            node = node_id
 
-def find_key_recursive(obj: Any, target_key: str) -> Optional[Tuple[str, Any]]:
-    if isinstance(obj, dict):
-        if target_key in obj:
-            return target_key, obj[target_key]
-        for k, v in obj.items():
-            res = find_key_recursive(v, target_key)
-            if res:
-                return res
-    elif isinstance(obj, list):
-        for item in obj:
-            res = find_key_recursive(item, target_key)
-            if res:
-                return res
-    return None
+            for step in response.steps[:levels]:
+                if tree.is_leaf(node):
+                    break
 
+                option_lookup = {}
+                for child in tree.children(node):
+                    option_lookup.setdefault(tree.names[child].lower(), child)
 
-def extract_children_from_value(value: Any) -> List[Tuple[str, Any]]:
-    children = []
+                child = option_lookup.get(step.choice.lower())
 
-    if isinstance(value, dict):
-        for k, v in value.items():
-            children.append((k, v))
+                if child is None:
+                    if not hops:
+                        raise ValueError(
+                            f"Invalid choice '{step.choice}'. Must be one of {tree.child_names(node)}"
+                        )
+                    rejected.append(step.choice)
+                    break
 
-    elif isinstance(value, list):
-        for i, item in enumerate(value):
-            if isinstance(item, dict) and len(item) == 1:
-                key = list(item.keys())[0]
-                children.append((key, item[key]))
-            else:
-                children.append((str(item), item))
+                step.choice = tree.names[child]
+                hops.append((child, step))
+                node = child
+
+            response.steps = [step for _, step in hops]
+            return response
+
+        self.structured.call(
+            prompt=formatted_prompt,
+            schema=PathDecision,
+            max_retries=0,
+            validate=validate_path
+        )
 
-    return children
+        return list(hops), bool(rejected)
 
 
 # ============================================================
@@ -141,101 +315,384 @@ def extract_children_from_value(value: Any) -> List[Tuple[str, Any]]:
 class BranchState:
     path: List[str]         # technology stack selected so far
     node_name: str          # current node name in the decision tree
-    node_value: Any         # The subtree under the current node
+    node_id: int            # id of the current node in the compiled tree
     prompt: str             # original user prompt
+    score: float = 0.0      # beam search: sum of log confidences of the choices so far
+    decisions: List[NodeDecision] = field(default_factory=list)     # beam search: decision per path entry
 
-@traceable(name="Decision Traversal")
-def traverse(tree: Any, start_node_name: str, llm: LLMClient, base_prompt: str):
 
-    found = find_key_recursive(tree, start_node_name)
-    if not found:
-        raise ValueError(f"Start node '{start_node_name}' not found.")
+def decision_context(base_prompt: str, branch: BranchState) -> str:
+    selected_stack_text = (
+        "None yet"
+        if not branch.path
+        else " → ".join(branch.path)
+    )
+
+    return f"""
+        User Requirement:
+        {base_prompt}
+
+        Selected Stack So Far:
+        {selected_stack_text}
+
+        Current Decision Node:
+        {branch.node_name}
+        """
+
+
+def option_prompt(context: str, options: List[str]) -> str:
+    return f"""{context}
+        Available Options:
+        {", ".join(options)}
+
+        Choose the single best option for the project.
+        """
 
-    start_name, start_value = found         # tuple unpacking
+
+def beam_width() -> int:
+    return max(1, int(os.getenv("TRAVERSAL_BEAM", "1")))
+
+
+def lookahead_depth() -> int:
+    return max(1, int(os.getenv("TRAVERSAL_LOOKAHEAD", "1")))
+
+
+def lookahead_max_tokens() -> int:
+    return int(os.getenv("TRAVERSAL_LOOKAHEAD_TOKENS", "1500"))
+
+
+def render_options_tree(tree: DecisionTree, node_id: int, depth: int, max_tokens: int) -> Tuple[str, int]:
+    """
+    Indented outline of the options below node_id, as many levels deep
+    (up to depth) as fits in max_tokens. Returns (outline, levels shown).
+    """
+
+    levels = depth
+
+    while True:
+        lines = []
+        stack = [(child, 0) for child in reversed(tree.children(node_id))]
+        shown = 1
+
+        while stack:
+            child, indent = stack.pop()
+            lines.append(f"{'  ' * indent}- {tree.names[child]}")
+            if indent + 1 < levels and not tree.is_leaf(child):
+                shown = max(shown, indent + 2)
+                stack.extend((grandchild, indent + 1) for grandchild in reversed(tree.children(child)))
+
+        outline = "\n".join(lines)
+        if levels == 1 or estimate_tokens(outline) <= max_tokens:
+            return outline, shown
+        levels -= 1
+
+
+@traceable(name="Decision Traversal")
+@track_stage("traversal")
+def traverse(
+        tree: DecisionTree,
+        start_node_name: str,
+        llm: LLMClient,
+        base_prompt: str,
+        lookahead: int | None = None,
+        reuse: bool | None = None
+):
+    """
+    Walk the tree from start_node_name to a leaf. With lookahead > 1
+    the model picks up to that many levels per call from an outline of
+    the subtree; a level whose choice does not validate is asked again
+    on its own. With reuse, the path of a similar earlier requirement is
+    followed and only its contested decisions are asked again (see
+    core/stack_index.py).
+    """
+
+    lookahead = lookahead or lookahead_depth()
+    reuse = reuse_enabled() if reuse is None else reuse
+    reuse_stats = get_reuse_stats()
+
+    start_id = tree.find(start_node_name)
+    if start_id is None:
+        raise ValueError(f"Start node '{start_node_name}' not found.")
 
     recorder = LangGraphRecorder()
 
     branch = BranchState(
         path=[],
-        node_name=start_name,
-        node_value=start_value,
+        node_name=start_node_name,
+        node_id=start_id,
         prompt=base_prompt.strip()
     )
 
     completed_path = []
+    single_level = False     # the last lookahead answer had an invalid hop
+
+    proposal = get_stack_index().propose(base_prompt, start_node_name, tree) if reuse else None
+    if proposal:
+        print(f"[StackReuse] Following '{proposal.stored.requirement}' (similarity {proposal.similarity:.2f})")
 
     while True:
         recorder.add_node(branch.node_name)
-        children = extract_children_from_value(branch.node_value)
-
-        if not children:
+        if tree.is_leaf(branch.node_id):
             recorder.mark_leaf(branch.node_name)
             completed_path = branch.path
             break
 
-        child_names = [c[0] for c in children]
+        child_names = tree.child_names(branch.node_id)
 
         # Build contextual prompt for this decision
-
-        selected_stack_text = (
-            "None yet"
-            if not branch.path
-            else " → ".join(branch.path)
+        context = decision_context(base_prompt, branch)
+
+        hops = None
+        stored_hop = None
+        level = len(branch.path)
+
+        if proposal and level < len(proposal.stored.hops):
+            stored_hop = proposal.stored.hops[level]
+            stored_id = tree.child_named(branch.node_id, stored_hop["choice"])
+
+            if stored_id is None:
+                # The tree changed since the path was stored
+                proposal = stored_hop = None
+            elif level not in proposal.contested:
+                reuse_stats.count("reused")
+                decision_prompt = (
+                    f"Reused from a similar requirement ({proposal.similarity:.2f}): "
+                    f"{proposal.stored.requirement}"
+                )
+                hops = [(stored_id, NodeDecision(
+                    choice=stored_hop["choice"],
+                    rationale=stored_hop["rationale"],
+                    purpose=stored_hop["purpose"]
+                ))]
+
+        outline, levels = (
+            render_options_tree(tree, branch.node_id, lookahead, lookahead_max_tokens())
+            if lookahead > 1 and not single_level and hops is None and stored_hop is None
+            and len(child_names) <= shortlist_size()
+            else ("", 1)
         )
+        single_level = False
 
-        decision_prompt = f"""
-        User Requirement:
-        {base_prompt}
+        if levels > 1:
+            decision_prompt = f"""{context}
+        Choose the best path of options for the project, up to {levels} levels deep.
+        """
+            try:
+                with usage_node("/".join([start_node_name] + branch.path)):
+                    hops, single_level = llm.choose_path(decision_prompt, outline, levels, tree, branch.node_id)
+            except (StructuredOutputError, ValueError) as e:
+                print(f"[Traversal] Lookahead at '{branch.node_name}' failed, choosing one level: {e}")
+
+        if hops is None:
+            # Also where a contested stored decision is asked again.
+            # Wide nodes only show the best-matching options.
+            wide = len(child_names) > shortlist_size()
+            candidates = shortlist_options(
+                tree,
+                branch.node_id,
+                " ".join([base_prompt, *branch.path]),
+                keep=(stored_hop["choice"],) if stored_hop else (),
+                ranked=wide
+            )
 
-        Selected Stack So Far:
-        {selected_stack_text}
+            with usage_node("/".join([start_node_name] + branch.path)):
+                if wide and len(candidates) > tournament_chunk():
+                    decision, decision_prompt = llm.choose_option_tournament(context, candidates, tournament_chunk())
+                else:
+                    if wide:
+                        # One prompt: show the shortlist in tree order
+                        shortlisted = set(candidates)
+                        candidates = [name for name in child_names if name in shortlisted]
+                    decision_prompt = option_prompt(context, candidates)
+                    decision = llm.choose_option(decision_prompt, candidates)
+
+            child_id = tree.child_named(branch.node_id, decision.choice)
+
+            if child_id is None:
+                raise RuntimeError("Internal traversal mismatch.")
+
+            if stored_hop is not None:
+                reuse_stats.count("revalidated")
+                if tree.names[child_id] != stored_hop["choice"]:
+                    # The stored path no longer applies below this level
+                    reuse_stats.count("diverged")
+                    proposal = None
+
+            hops = [(child_id, decision)]
+
+        for child_id, decision in hops:
+            child_name = tree.names[child_id]
+
+            recorder.add_choice_rationale(
+                parent_node=branch.node_name,
+                choice=child_name,
+                rationale=decision.rationale,
+                purpose=decision.purpose
+            )
 
-        Current Decision Node:
-        {branch.node_name}
+            recorder.add_prompt_to_node(branch.node_name, decision_prompt)
+            recorder.add_choice(branch.node_name, [child_name])
 
-        Available Options:
-        {", ".join(child_names)}
+            recorder.add_edge(branch.node_name, child_name)
 
-        Choose the single best option for the project.
-        """
+            recorder.add_prompt_to_edge(
+                branch.node_name,
+                child_name,
+                decision_prompt
+            )
+
+            branch = BranchState(
+                path=branch.path + [child_name],
+                node_name=child_name,
+                node_id=child_id,
+                prompt=base_prompt
+            )
 
-        decision = llm.choose_option(decision_prompt, child_names)
+    return completed_path, recorder
 
-        chosen_name = decision.choice
 
-        recorder.add_choice_rationale(
-            parent_node=branch.node_name,
-            choice=chosen_name,
-            rationale=decision.rationale,
-            purpose=decision.purpose
-        )
+# Lowest confidence a choice counts with, so one "0.0" does not sink a branch
+BEAM_MIN_CONFIDENCE = 0.01
 
-        recorder.add_prompt_to_node(branch.node_name, decision_prompt)
-        recorder.add_choice(branch.node_name, [chosen_name])
 
-        matched = next((c for c in children if c[0] == chosen_name), None)
+def _beam_score(branch: BranchState) -> float:
+    # Mean log confidence: finished short paths and longer ones compare fairly
+    return branch.score / len(branch.decisions) if branch.decisions else 0.0
 
-        if not matched:
-            raise RuntimeError("Internal traversal mismatch.")
 
-        child_name, child_value = matched
+@traceable(name="Beam Traversal")
+@track_stage("traversal")
+def beam_traverse(
+        tree: DecisionTree,
+        start_node_name: str,
+        llm: LLMClient,
+        base_prompt: str,
+        width: int | None = None
+) -> Tuple[List[dict], LangGraphRecorder]:
+    """
+    Beam search from start_node_name: keep the `width` best branches,
+    scored by the confidence of their choices. Each round expands every
+    open branch in parallel (one ranking call per branch), so wall time
+    grows with depth like a single traversal, not with width.
 
-        recorder.add_edge(branch.node_name, child_name)
+    Returns the finished stacks, best first, and a recorder holding
+    every explored branch; edges of pruned branches render dashed.
+    """
 
-        recorder.add_prompt_to_edge(
-            branch.node_name,
-            child_name,
-            decision_prompt
-        )
+    width = width or beam_width()
 
-        branch = BranchState(
-            path=branch.path + [child_name],
-            node_name=child_name,
-            node_value=child_value,
-            prompt=base_prompt
-        )
+    start_id = tree.find(start_node_name)
+    if start_id is None:
+        raise ValueError(f"Start node '{start_node_name}' not found.")
 
-    return completed_path, recorder
+    recorder = LangGraphRecorder()
+    recorder.add_node(start_node_name)
+
+    beam = [BranchState(
+        path=[],
+        node_name=start_node_name,
+        node_id=start_id,
+        prompt=base_prompt.strip()
+    )]
+
+    async def expand(branch: BranchState) -> Tuple[str, List[NodeDecision]]:
+        decision_prompt = f"""{decision_context(base_prompt, branch)}
+        Rank the options that fit the project best.
+        """
+        candidates = shortlist_options(tree, branch.node_id, " ".join([base_prompt, *branch.path]))
+
+        with usage_node("/".join([start_node_name] + branch.path)):
+            return decision_prompt, await llm.arank_options(decision_prompt, candidates, width)
+
+    async def expand_all(branches: List[BranchState]) -> list:
+        return await asyncio.gather(*(expand(b) for b in branches), return_exceptions=True)
+
+    while True:
+        open_branches = [b for b in beam if not tree.is_leaf(b.node_id)]
+        if not open_branches:
+            break
+
+        candidates = [b for b in beam if tree.is_leaf(b.node_id)]
+        errors = []
+
+        for branch, result in zip(open_branches, run_sync(expand_all(open_branches))):
+            if isinstance(result, BaseException):
+                # One failed expansion only costs its own branch
+                print(f"[Beam] Dropping branch '{' → '.join(branch.path) or branch.node_name}': {result}")
+                errors.append(result)
+                continue
+
+            decision_prompt, ranking = result
+            recorder.add_prompt_to_node(branch.node_name, decision_prompt)
+
+            for decision in ranking:
+                child_id = tree.child_named(branch.node_id, decision.choice)
+
+                if child_id is None:
+                    raise RuntimeError("Internal traversal mismatch.")
+
+                child_name = tree.names[child_id]
+
+                recorder.add_choice_rationale(
+                    parent_node=branch.node_name,
+                    choice=child_name,
+                    rationale=decision.rationale,
+                    purpose=decision.purpose
+                )
+                recorder.add_choice(branch.node_name, [child_name])
+                recorder.add_edge(branch.node_name, child_name)
+                recorder.add_prompt_to_edge(branch.node_name, child_name, decision_prompt)
+                if tree.is_leaf(child_id):
+                    recorder.mark_leaf(child_name)
+
+                confidence = 0.5 if decision.confidence is None else decision.confidence
+
+                candidates.append(BranchState(
+                    path=branch.path + [child_name],
+                    node_name=child_name,
+                    node_id=child_id,
+                    prompt=base_prompt,
+                    score=branch.score + math.log(max(confidence, BEAM_MIN_CONFIDENCE)),
+                    decisions=branch.decisions + [decision]
+                ))
+
+        if not candidates:
+            raise errors[0]
+
+        candidates.sort(key=_beam_score, reverse=True)
+        beam = candidates[:width]
+
+    beam.sort(key=_beam_score, reverse=True)
+
+    # Everything explored off the surviving paths was pruned
+    kept = set()
+    for branch in beam:
+        kept.update(zip([start_node_name] + branch.path, branch.path))
+    for edge in recorder.edges:
+        if edge not in kept:
+            recorder.mark_pruned(*edge)
+
+    alternatives = [
+        {
+            "rank": rank,
+            "tech_stack": branch.path,
+            "tech_stack_summary": " → ".join(branch.path),
+            # Geometric mean of the choice confidences
+            "score": round(math.exp(_beam_score(branch)), 3),
+            "choices": [
+                {
+                    "choice": decision.choice,
+                    "rationale": decision.rationale,
+                    "purpose": decision.purpose,
+                    "confidence": decision.confidence
+                }
+                for decision in branch.decisions
+            ]
+        }
+        for rank, branch in enumerate(beam, 1)
+    ]
+
+    return alternatives, recorder
 
 
 # ============================================================
@@ -271,6 +728,31 @@ def build_clean_final_prompt(initial_prompt, tech_stack, recorder):
     return prompt
 
 
+def build_stack_meta(initial_prompt, tech_stack, recorder) -> dict:
+
+    # Convert tuple keys to string keys for JSON safety
+    formatted_choices = {}
+
+    for (parent, choice), data in recorder.choice_rationales.items():
+        key = f"{parent} -> {choice}"
+        formatted_choices[key] = data
+
+    return {
+        "user_initial_prompt": initial_prompt,
+        "tech_stack": tech_stack,
+        "tech_stack_summary": " → ".join(tech_stack),
+        "technology_choices": formatted_choices,
+        "nodes": {
+            n: {
+                "is_leaf": recorder.nodes[n].is_leaf,
+                "choices": recorder.node_choices.get(n, [])     # Get the choices for node n. If the node does not exist, return an empty list [].
+            }
+            for n in recorder.nodes
+        },
+        "edges": recorder.edges
+    }
+
+
 # ============================================================
 # CLI
 # ============================================================
@@ -283,19 +765,43 @@ if __name__ == "__main__":
     parser.add_argument("--initial-prompt")
     parser.add_argument("--output-image", default="outputs/langgraph_output")
     parser.add_argument("--output-meta", default="data/stack_meta.json")
+    parser.add_argument("--lookahead", type=int, help="Levels chosen per LLM call (default: TRAVERSAL_LOOKAHEAD or 1)")
+    parser.add_argument("--reuse", action="store_true", default=None, help="Reuse the path of a similar earlier requirement (default: STACK_REUSE)")
+    parser.add_argument("--remember", action="store_true", help="Add this selection to the reuse index (default: STACK_REMEMBER, implied by reuse)")
+    parser.add_argument("--beam", type=int, help="Keep this many alternative stacks with beam search (default: TRAVERSAL_BEAM or 1)")
     args = parser.parse_args()          # reads the command line input
     if not args.initial_prompt or not args.initial_prompt.strip():
         args.initial_prompt = input("Enter initial prompt: ").strip()
 
-    tree = load_tree_from_file(args.json_file)
+    tree = load_decision_tree(args.json_file)
     llm = LLMClient()
 
-    tech_stack, recorder = traverse(
-        tree,
-        args.start_node,
-        llm,
-        args.initial_prompt
-    )
+    alternatives = None
+
+    if (args.beam or beam_width()) > 1:
+        alternatives, recorder = beam_traverse(
+            tree,
+            args.start_node,
+            llm,
+            args.initial_prompt,
+            width=args.beam
+        )
+        tech_stack = alternatives[0]["tech_stack"]
+    else:
+        tech_stack, recorder = traverse(
+            tree,
+            args.start_node,
+            llm,
+            args.initial_prompt,
+            lookahead=args.lookahead,
+            reuse=args.reuse
+        )
+
+    # Remember this selection for similar requirements later
+    if args.remember or remember_enabled(args.reuse):
+        stack_index = get_stack_index()
+        stack_index.add(args.initial_prompt, args.start_node, tech_stack, recorder.choice_rationales)
+        stack_index.save()
 
     image_dir = os.path.dirname(args.output_image)      # extracts the directory part of a path
     if image_dir:           # checks whether the directory string is not empty (the path is just a filename with no folder)
@@ -315,28 +821,9 @@ if __name__ == "__main__":
     with open("specs/final_prompt.txt", "w", encoding="utf-8") as f:
         f.write(final_prompt)
 
-    # Convert tuple keys to string keys for JSON safety
-    formatted_choices = {}
-
-    for (parent, choice), data in recorder.choice_rationales.items():
-        key = f"{parent} -> {choice}"
-        formatted_choices[key] = data
-
-    # Save meta JSON
-    meta = {
-        "user_initial_prompt": args.initial_prompt,
-        "tech_stack": tech_stack,
-        "tech_stack_summary": " → ".join(tech_stack),
-        "technology_choices": formatted_choices,
-        "nodes": {
-            n: {
-                "is_leaf": recorder.nodes[n].is_leaf,
-                "choices": recorder.node_choices.get(n, [])     # Get the choices for node n. If the node does not exist, return an empty list [].
-            }
-            for n in recorder.nodes
-        },
-        "edges": recorder.edges
-    }
+    meta = build_stack_meta(args.initial_prompt, tech_stack, recorder)
+    if alternatives:
+        meta["alternatives"] = alternatives
 
     os.makedirs(os.path.dirname(args.output_meta), exist_ok=True)
 
@@ -346,3 +833,8 @@ if __name__ == "__main__":
     print("\nFINAL PROMPT SAVED TO specs/final_prompt.txt")
     print(f"Graph saved to: {outpath}")
     print(f"Meta saved to: {args.output_meta}")
+
+    for alternative in (alternatives or [])[1:]:
+        print(f"Alternative {alternative['rank']} ({alternative['score']}): {alternative['tech_stack_summary']}")
+
+    write_usage_report()
@@ -5,8 +5,11 @@ from .structure_utils import (find_shallowest_terminal_folder_depth, trim_tree_t
 from .pruning_session import PruningSession
 from .decision_tracker import DecisionTracker
 from .tree_pruner import prune_tree
+from llm.deadlines import BUDGET_ERRORS
+from llm.usage import get_usage_tracker, track_stage
 
 
+@track_stage("pruning")
 def run_pruning_pipeline(tree, user_requirement, tech_stack):
 
     tree_copy = copy.deepcopy(tree)
@@ -25,11 +28,20 @@ def run_pruning_pipeline(tree, user_requirement, tech_stack):
 
     session = PruningSession(system_context)
     tracker = DecisionTracker()
+    degraded = {}
 
     # STEP 5 — evaluate one by one
     for node in prunable_nodes:
 
-        decision = session.evaluate_leaf(node, tracker.all())
+        try:
+            decision = session.evaluate_leaf(node, tracker.all())
+        except BUDGET_ERRORS as e:
+            # Out of time or tokens: keeping a node is always safe
+            print(f"Budget exhausted, keeping without evaluation: {node.full_path} ({e})")
+            get_usage_tracker().mark_degraded("pruning", str(e), [node.full_path])
+            degraded[node.full_path] = f"Kept without evaluation: {e}"
+            tracker.add(node.full_path, "KEEP", f"Kept without evaluation: {e}", node.mandatory)
+            continue
 
         if node.mandatory.lower() == "yes":
             final_decision = "KEEP"
@@ -41,4 +53,19 @@ def run_pruning_pipeline(tree, user_requirement, tech_stack):
     # STEP 6 — prune
     pruned_tree = prune_tree(tree_copy, tracker.all())
 
+    if pruned_tree and degraded:
+        _mark_degraded(pruned_tree, degraded)
+
     return pruned_tree, tracker.all()
+
+
+def _mark_degraded(node, degraded):
+    """
+    Note in the pruned structure which nodes were kept unevaluated.
+    """
+
+    if node.get("full_path") in degraded:
+        node["degraded"] = degraded[node["full_path"]]
+
+    for child in node.get("children", []):
+        _mark_degraded(child, degraded)
@@ -2,6 +2,7 @@
 
 from core.llm_structured import StructuredLLM
 from core.schemas import PruneDecision
+from llm.usage import usage_node
 
 
 class PruningSession:
@@ -33,8 +34,9 @@ class PruningSession:
         for p in leaf_meta.parents:
             prompt += f"- {p.name}: {p.description}\n"
 
-        return self.llm.call(
-            prompt=prompt,
-            schema=PruneDecision,
-            system_context= self.system_context
-        )
+        with usage_node(leaf_meta.full_path):
+            return self.llm.call(
+                prompt=prompt,
+                schema=PruneDecision,
+                system_context= self.system_context
+            )
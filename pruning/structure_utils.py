@@ -166,7 +166,8 @@ Return ONLY valid JSON:
 
 {{
   "decision": "KEEP or PRUNE",
-  "reason": "short explanation"
+  "reason": "short explanation",
+  "confidence": 0.0 to 1.0 (how sure you are)
 }}
 
 Do NOT output markdown.
@@ -20,6 +20,9 @@ echo Starting pipeline from phase: %START_PHASE%
 echo ==========================================
 echo.
 
+:: Load the models up front so stages do not pay for it
+python -m llm.warmup
+
 :: ==========================================
 :: STACK SELECTION
 :: ==========================================
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+import core.llm_structured as llm_structured
+from llm.fake_server import generate_answer
+
+
+class FakeLLM:
+    """
+    Stands in for acall_llm behind StructuredLLM and records every call.
+
+    Answers like the fake server (generate_answer) unless a test sets
+    respond(prompt, **kwargs); delay makes each call wait, so calls
+    overlap and max_in_flight shows how many ran at once.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.respond = lambda prompt, **kwargs: generate_answer(prompt)[0]
+        self.delay = 0.0
+
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def prompts(self) -> list:
+        return [prompt for prompt, _ in self.calls]
+
+    async def __call__(self, prompt, **kwargs):
+        self.calls.append((prompt, kwargs))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            return self.respond(prompt, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    # Warm-up would try to reach a real provider between stages
+    monkeypatch.setenv("LLM_WARMUP", "0")
+    fake = FakeLLM()
+    monkeypatch.setattr(llm_structured, "acall_llm", fake)
+    return fake
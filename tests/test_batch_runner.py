@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+import main_batch_runner
+from core.decision_tree import load_decision_tree
+from core.stack_index import StackIndex
+from llm.fake_server import generate_answer
+from main_batch_runner import read_requirements, run_batch
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_batch_writes_one_directory_per_requirement(fake_llm, monkeypatch, tmp_path):
+    monkeypatch.setenv("DECISION_TREE_CACHE_DIR", str(tmp_path / "cache"))
+
+    def respond(prompt, **kwargs):
+        if "broken" in prompt:
+            raise RuntimeError("provider down")
+        return generate_answer(prompt)[0]
+
+    fake_llm.respond = respond
+    monkeypatch.delenv("STACK_REUSE", raising=False)
+    monkeypatch.delenv("STACK_REMEMBER", raising=False)
+    index = StackIndex()
+    monkeypatch.setattr(main_batch_runner, "get_stack_index", lambda: index)
+
+    source = tmp_path / "requirements.jsonl"
+    source.write_text("\n".join(json.dumps(entry) for entry in [
+        {"id": "bakery shop", "prompt": "build a backend for online bakery shop"},
+        {"prompt": "a static portfolio site"},
+        {"id": "bad", "prompt": "broken requirement"},
+    ]), encoding="utf-8")
+
+    items = read_requirements(str(source))
+    assert [item["id"] for item in items] == ["bakery_shop", "2", "bad"]
+
+    tree = load_decision_tree(os.path.join(ROOT, "data", "Web_Dev_Only.json"))
+    summary = run_batch(items, tree, "Core Application & Web Stacks", str(tmp_path / "out"), workers=3)
+
+    status = {item["id"]: item["status"] for item in summary["items"]}
+    assert status == {"bakery_shop": "ok", "2": "ok", "bad": "failed"}
+    assert summary["stats"]["succeeded"] == 2
+
+    with open(tmp_path / "out" / "bakery_shop" / "stack_meta.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    assert meta["user_initial_prompt"] == "build a backend for online bakery shop"
+    assert meta["tech_stack"] == summary["items"][0]["tech_stack"]
+    assert (tmp_path / "out" / "2" / "final_prompt.txt").exists()
+
+    # Without reuse or remember, the reuse index is left alone
+    assert index.entries == []
+
+
+def test_duplicate_ids_are_rejected(tmp_path):
+    source = tmp_path / "requirements.jsonl"
+    source.write_text('{"id": "a", "prompt": "x"}\n{"id": "a", "prompt": "y"}\n', encoding="utf-8")
+
+    with pytest.raises(ValueError, match="duplicate id"):
+        read_requirements(str(source))
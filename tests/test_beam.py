@@ -0,0 +1,88 @@
+import json
+
+from core.decision_tree import DecisionTree
+from llm.fake_server import generate_answer
+from llm.runtime import run_sync
+from main_runner import LLMClient, beam_traverse, traverse
+
+TREE = {
+    "Root": {
+        "Backend": {
+            "Python": ["Django", "Flask", "FastAPI"],
+            "JavaScript": ["Express", "NestJS"],
+        },
+        "Frontend": {
+            "React": ["Next.js", "Vite"],
+            "Vue": ["Nuxt"],
+        },
+    }
+}
+
+PROMPT = "a Python backend with FastAPI"
+
+
+def test_beam_returns_ranked_alternatives(fake_llm):
+    tree = DecisionTree.compile(TREE)
+
+    alternatives, recorder = beam_traverse(tree, "Root", LLMClient(), PROMPT, width=3)
+
+    assert len(alternatives) == 3
+    assert [a["rank"] for a in alternatives] == [1, 2, 3]
+    assert alternatives[0]["tech_stack"] == ["Backend", "Python", "FastAPI"]
+    assert len({tuple(a["tech_stack"]) for a in alternatives}) == 3
+    assert all(tree.is_leaf(tree.node_at(["Root", *a["tech_stack"]])) for a in alternatives)
+
+    scores = [a["score"] for a in alternatives]
+    assert scores == sorted(scores, reverse=True)
+    assert all(c["rationale"] for a in alternatives for c in a["choices"])
+
+    # Width 1 is the greedy traversal
+    greedy, _ = traverse(tree, "Root", LLMClient(), PROMPT)
+    assert greedy == alternatives[0]["tech_stack"]
+
+    # Every explored edge is recorded; the ones off the kept paths are pruned
+    assert ("Root", "Frontend") in recorder.edges
+    assert ("Root", "Frontend") in recorder.pruned_edges
+    assert ("Python", "FastAPI") not in recorder.pruned_edges
+
+
+def test_branches_expand_in_parallel(fake_llm):
+    fake_llm.delay = 0.01
+    tree = DecisionTree.compile(TREE)
+
+    beam_traverse(tree, "Root", LLMClient(), PROMPT, width=3)
+
+    # Root, then both kept second-level branches, then up to three at once
+    assert len(fake_llm.calls) == 1 + 2 + 3
+    assert fake_llm.max_in_flight == 3
+
+
+def test_failed_expansion_drops_only_its_branch(fake_llm):
+    def respond(prompt, **kwargs):
+        if "Current Decision Node:\n        JavaScript" in prompt:
+            return "not json"
+        return generate_answer(prompt)[0]
+
+    fake_llm.respond = respond
+    tree = DecisionTree.compile(TREE)
+
+    alternatives, _ = beam_traverse(tree, "Root", LLMClient(), PROMPT, width=2)
+
+    assert [a["tech_stack"] for a in alternatives] == [
+        ["Backend", "Python", "FastAPI"],
+        ["Backend", "Python", "Django"],
+    ]
+
+
+def test_ranking_drops_unknown_and_repeated_choices(fake_llm):
+    answer = json.dumps({"ranking": [
+        {"choice": "flask", "rationale": "r", "purpose": "p", "confidence": 0.8},
+        {"choice": "Rails", "rationale": "r", "purpose": "p", "confidence": 0.7},
+        {"choice": "Flask", "rationale": "r", "purpose": "p", "confidence": 0.6},
+        {"choice": "Django", "rationale": "r", "purpose": "p", "confidence": 0.5},
+    ]})
+    fake_llm.respond = lambda prompt, **kwargs: answer
+
+    ranking = run_sync(LLMClient().arank_options("web app", ["Django", "Flask", "FastAPI"], 3))
+
+    assert [d.choice for d in ranking] == ["Flask", "Django"]
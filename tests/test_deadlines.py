@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import llm.local_llama_client as client
+from llm.deadlines import DeadlineExceeded, StageTimeExceeded, call_timeout, check_time_budget, run_with_deadline
+from llm.providers import LLMResult, Provider, register_provider
+from llm.response_cache import ResponseCache
+from llm.usage import UsageTracker, usage_stage
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_slow_call_is_cancelled(monkeypatch):
+    monkeypatch.setenv("LLM_CALL_TIMEOUT", "0.05")
+    cancelled = []
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run_with_deadline(hang(), "untagged"))
+
+    assert cancelled == [True]
+
+
+def test_call_timeout_is_opt_in(monkeypatch):
+    monkeypatch.delenv("LLM_CALL_TIMEOUT", raising=False)
+    assert call_timeout() is None
+
+    monkeypatch.setenv("LLM_CALL_TIMEOUT", "30")
+    assert call_timeout() == 30.0
+
+
+def test_stage_time_budget(monkeypatch):
+    monkeypatch.setenv("LLM_TIME_BUDGET_DEADLINETEST", "0")
+
+    with usage_stage("deadlinetest"):
+        with pytest.raises(StageTimeExceeded):
+            check_time_budget("deadlinetest")
+
+    check_time_budget("untagged")
+
+
+def test_call_llm_raises_instead_of_hanging(monkeypatch, tmp_path):
+    class HangingProvider(Provider):
+        name = "hanging"
+
+        def default_model(self):
+            return "hanging-model"
+
+        async def acomplete(self, messages, model, extra):
+            await asyncio.sleep(10)
+            return LLMResult(text="too late")
+
+    register_provider("hanging", HangingProvider)
+    monkeypatch.setenv("LLM_PROVIDER", "hanging")
+    monkeypatch.setenv("LLM_CALL_TIMEOUT", "0.1")
+    monkeypatch.setattr(client, "get_response_cache", lambda: ResponseCache(str(tmp_path / "c.sqlite"), mode="off"))
+
+    with pytest.raises(DeadlineExceeded):
+        client.call_llm("hello")
+
+
+def test_pruning_keeps_nodes_when_out_of_time(monkeypatch):
+    from pruning import pruning_pipeline
+    from pruning.pruning_session import PruningSession
+
+    def out_of_time(self, leaf_meta, previous_decisions=None):
+        raise StageTimeExceeded("Stage 'pruning' used up its time budget of 1s.")
+
+    tracker = UsageTracker()
+    monkeypatch.setenv("LLM_WARMUP", "0")
+    monkeypatch.setattr(PruningSession, "evaluate_leaf", out_of_time)
+    monkeypatch.setattr(pruning_pipeline, "get_usage_tracker", lambda: tracker)
+
+    with open(os.path.join(ROOT, "data", "folder_structure.json"), encoding="utf-8") as f:
+        tree = json.load(f)
+
+    pruned, decisions = pruning_pipeline.run_pruning_pipeline(tree, "A web app", "React")
+
+    assert decisions and all(d["decision"] == "KEEP" for d in decisions.values())
+    assert pruned is not None
+
+    degraded = tracker.summary()["pruning"]["degraded"]
+    assert sorted(decisions) == degraded["items"]
+
+    # The pruned structure itself says which nodes were not evaluated
+    marked = []
+
+    def walk(node):
+        if "degraded" in node:
+            marked.append(node["full_path"])
+        for child in node.get("children", []):
+            walk(child)
+
+    walk(pruned)
+    # (folders left without children are dropped from the structure)
+    assert marked and set(marked) <= set(decisions)
+
+
+def test_global_and_blueprint_fall_back_when_out_of_time(monkeypatch, tmp_path):
+    import yaml
+
+    import core.global_blueprint_yaml_builder as blueprint_builder
+    import core.global_description_builder as description_builder
+    from core.llm_structured import StructuredLLM
+
+    def out_of_time(*args, **kwargs):
+        raise DeadlineExceeded("LLM call exceeded its 1s deadline.")
+
+    tracker = UsageTracker()
+    monkeypatch.setenv("LLM_WARMUP", "0")
+    monkeypatch.setattr(description_builder, "call_llm", out_of_time)
+    monkeypatch.setattr(StructuredLLM, "call", out_of_time)
+    monkeypatch.setattr(description_builder, "get_usage_tracker", lambda: tracker)
+    monkeypatch.setattr(blueprint_builder, "get_usage_tracker", lambda: tracker)
+
+    meta = tmp_path / "meta.json"
+    meta.write_text(json.dumps({"user_initial_prompt": "a bakery shop", "tech_stack_summary": "Python → FastAPI"}))
+    pruned = tmp_path / "pruned.json"
+    pruned.write_text(json.dumps({"name": "app", "children": []}))
+
+    description = tmp_path / "global.md"
+    description_builder.build_global_description(str(pruned), str(meta), str(description))
+    assert "Not generated" in description.read_text() and "Python → FastAPI" in description.read_text()
+
+    blueprint_path = tmp_path / "blueprint.yaml"
+    blueprint_builder.build_project_blueprint(str(description), str(meta), str(blueprint_path))
+    blueprint = yaml.safe_load(blueprint_path.read_text())
+    assert "deadline" in blueprint["degraded"]
+    assert [d["name"] for d in blueprint["dependencies"]["external"]] == ["Python", "FastAPI"]
+
+    summary = tracker.summary()
+    assert summary["global"]["degraded"]["items"] == [str(description)]
+    assert summary["blueprint"]["degraded"]["items"] == [str(blueprint_path)]
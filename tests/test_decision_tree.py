@@ -0,0 +1,90 @@
+import json
+import os
+
+from core.decision_tree import DecisionTree, load_decision_tree
+from core.schemas import NodeDecision
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MIXED = {
+    "Stacks": {
+        "Web": {
+            "Frontend": ["React", "Vue"],
+            "Backend": [{"Node.js": ["Express", "Fastify"]}, "Go"],
+        },
+        "Mobile": {"Frontend": ["Flutter"]},
+    }
+}
+
+
+def test_compiled_tree_normalizes_mixed_shapes():
+    tree = DecisionTree.compile(MIXED)
+
+    web = tree.find("Web")
+    assert tree.child_names(web) == ["Frontend", "Backend"]
+
+    backend = tree.child_named(web, "Backend")
+    assert tree.child_names(backend) == ["Node.js", "Go"]
+    assert tree.child_names(tree.find("Node.js")) == ["Express", "Fastify"]
+    assert tree.is_leaf(tree.child_named(backend, "Go"))
+
+    # First match of a repeated name is the shallowest one under the first branch
+    assert tree.path(tree.find("Frontend")) == ("Stacks", "Web", "Frontend")
+    assert tree.node_at(("Stacks", "Mobile", "Frontend")) == tree.child_named(tree.find("Mobile"), "Frontend")
+
+    # Plain list items are options, not start nodes
+    assert tree.find("React") is None
+
+    assert tree.child_named(web, "Mobile") is None
+    duplicates = DecisionTree.compile({"Root": ["a", "a"]})
+    assert duplicates.child_named(duplicates.find("Root"), "a") == duplicates.first_child[duplicates.find("Root")]
+
+
+def test_cache_is_reused_until_the_source_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("DECISION_TREE_CACHE_DIR", str(tmp_path / "cache"))
+    source = tmp_path / "tree.json"
+    source.write_text(json.dumps(MIXED), encoding="utf-8")
+
+    first = load_decision_tree(str(source))
+    assert len(os.listdir(tmp_path / "cache")) == 1
+    cached = load_decision_tree(str(source))
+    assert cached.names == first.names
+    assert cached.child_named(cached.find("Web"), "Backend") == first.child_named(first.find("Web"), "Backend")
+
+    data_only = {"Stacks": {"Data": ["Spark"]}}
+    source.write_text(json.dumps(data_only), encoding="utf-8")
+
+    changed = load_decision_tree(str(source))
+    assert changed.source_hash != first.source_hash
+    assert changed.child_names(changed.find("Data")) == ["Spark"]
+    # The stale compilation was replaced
+    assert len(os.listdir(tmp_path / "cache")) == 1
+
+
+def test_same_named_trees_keep_separate_caches(tmp_path, monkeypatch):
+    monkeypatch.setenv("DECISION_TREE_CACHE_DIR", str(tmp_path / "cache"))
+
+    for folder, tree in (("a", MIXED), ("b", {"Stacks": {"Data": ["Spark"]}})):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "tree.json").write_text(json.dumps(tree), encoding="utf-8")
+        load_decision_tree(str(tmp_path / folder / "tree.json"))
+
+    assert len(os.listdir(tmp_path / "cache")) == 2
+    assert load_decision_tree(str(tmp_path / "a" / "tree.json")).find("Web") is not None
+
+
+def test_traverse_walks_the_compiled_tree(tmp_path, monkeypatch):
+    from main_runner import traverse
+
+    monkeypatch.setenv("DECISION_TREE_CACHE_DIR", str(tmp_path))
+
+    class FirstOption:
+        def choose_option(self, prompt, options):
+            return NodeDecision(choice=options[0], rationale="first", purpose="test", confidence=1.0)
+
+    tree = load_decision_tree(os.path.join(ROOT, "data", "Web_Dev_Only.json"))
+    path, recorder = traverse(tree, "Core Application & Web Stacks", FirstOption(), "A web app")
+
+    assert path[:2] == ["Web Development", "Frontend"]
+    assert tree.node_at(("Core Application & Web Stacks", *path)) is not None
+    assert recorder.nodes[path[-1]].is_leaf
@@ -0,0 +1,81 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from core.schemas import NodeDecision, PruneDecision
+from core.schemas_project_blueprint import ProjectBlueprint
+from llm.fake_server import FakeLLMServer, FakeServerConfig, LatencyModel, generate_answer
+
+FAST = LatencyModel(ttft=0.0, tokens_per_second=0.0)
+
+
+def post(url, payload):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.read().decode("utf-8")
+
+
+def test_rule_based_answers_match_schemas():
+    answer, structured = generate_answer(
+        "USER REQUIREMENT:\nbuild a python backend\n\nAVAILABLE OPTIONS (choose exactly one):\n\n- Node.js\n- Python\n"
+    )
+    decision = NodeDecision.model_validate_json(answer)
+    assert structured and decision.choice == "Python"
+
+    answer, _ = generate_answer("Leaf Node Metadata\nFull Path: a/b.ts\nMandatory: yes")
+    assert PruneDecision.model_validate_json(answer).decision == "KEEP"
+
+    answer, _ = generate_answer('Return JSON in EXACTLY this structure: {"project_meta": {}}')
+    ProjectBlueprint.model_validate_json(answer)
+
+
+def test_ollama_chat_and_streaming():
+    with FakeLLMServer(config=FakeServerConfig(latency=FAST, chatter=False)) as server:
+        body = json.loads(post(server.url + "/api/chat", {
+            "model": "mistral",
+            "stream": False,
+            "messages": [{"role": "user", "content": "Leaf Node Metadata\nFull Path: x\nMandatory: yes"}],
+        }))
+        assert body["done"] and body["eval_count"] > 0
+        PruneDecision.model_validate_json(body["message"]["content"])
+
+        lines = post(server.url + "/api/chat", {
+            "model": "mistral",
+            "messages": [{"role": "user", "content": "Leaf Node Metadata\nFull Path: x\nMandatory: yes"}],
+        }).strip().splitlines()
+        parts = [json.loads(line) for line in lines]
+        assert parts[-1]["done"]
+        PruneDecision.model_validate_json("".join(p["message"]["content"] for p in parts))
+
+
+def test_openai_chat_reports_cached_prefix():
+    with FakeLLMServer(config=FakeServerConfig(latency=FAST)) as server:
+        payload = {
+            "model": "fake",
+            "messages": [
+                {"role": "system", "content": "shared context " * 50},
+                {"role": "user", "content": "hello"},
+            ],
+        }
+        first = json.loads(post(server.url + "/v1/chat/completions", payload))
+        second = json.loads(post(server.url + "/v1/chat/completions", payload))
+
+        assert first["usage"]["prompt_tokens_details"]["cached_tokens"] == 0
+        assert second["usage"]["prompt_tokens_details"]["cached_tokens"] > 0
+
+
+def test_error_injection():
+    config = FakeServerConfig(latency=FAST, error_rate=1.0, error_status=429)
+
+    with FakeLLMServer(config=config) as server:
+        with pytest.raises(urllib.error.HTTPError) as info:
+            post(server.url + "/api/chat", {"model": "m", "stream": False, "messages": []})
+
+        assert info.value.code == 429
+        assert server.stats["errors"] == 1
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from llm.governor import Governor, TokenBucket, is_retryable, status_code_of
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class Result:
+    completion_tokens = 10
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(rate=10.0, capacity=10.0)
+    bucket.tokens = 0
+
+    assert bucket.wait_time(5) == pytest.approx(0.5, abs=0.05)
+    assert TokenBucket(rate=0, capacity=0).wait_time(100) == 0.0
+
+
+def test_status_code_parsing():
+    assert status_code_of(RateLimited()) == 429
+    assert status_code_of(Exception("[503] Service Unavailable")) == 503
+    assert status_code_of(ValueError("bad")) is None
+
+    assert is_retryable(RateLimited())
+    assert is_retryable(ConnectionError())
+    assert not is_retryable(Exception("[401] Unauthorized"))
+
+
+def test_additive_increase_and_multiplicative_decrease():
+    governor = Governor("test", initial_concurrency=2, max_concurrency=8)
+
+    for _ in range(20):
+        governor.on_success(0.1, 10)
+    assert governor.limit > 2
+
+    before = governor.limit
+    governor.on_error(retryable=True)
+    assert governor.limit == pytest.approx(max(1, before * 0.5))
+
+
+def test_retries_then_succeeds_and_respects_limit():
+    governor = Governor("test", initial_concurrency=2, max_concurrency=2, backoff_base=0.001)
+    attempts = 0
+    active = 0
+    peak = 0
+
+    async def flaky():
+        nonlocal attempts, active, peak
+        attempts += 1
+        active += 1
+        peak = max(peak, active)
+        try:
+            await asyncio.sleep(0.001)
+            if attempts % 3 == 0:
+                raise RateLimited()
+            return Result()
+        finally:
+            active -= 1
+
+    async def main():
+        return await asyncio.gather(*(governor.run(flaky) for _ in range(10)))
+
+    results = asyncio.run(main())
+
+    assert len(results) == 10
+    assert peak <= 2
+    assert governor.stats()["retries"] > 0
+    assert governor.stats()["in_flight"] == 0
+
+
+def test_non_retryable_error_raises_immediately():
+    governor = Governor("test")
+    calls = 0
+
+    async def broken():
+        nonlocal calls
+        calls += 1
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(governor.run(broken))
+
+    assert calls == 1
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+import llm.local_llama_client as client
+from llm.fake_server import FakeLLMServer, FakeServerConfig, LatencyModel
+from llm.hedging import CircuitBreaker, HedgedRace
+from llm.response_cache import ResponseCache
+
+
+def test_slow_primary_is_hedged():
+    async def slow(name):
+        await asyncio.sleep(1)
+        return "primary"
+
+    async def fast(name):
+        return "alternate"
+
+    race = HedgedRace()
+    assert asyncio.run(race.run(slow, fast, hedge_after=0.05)) == "alternate"
+    assert race.winner == "alternate"
+
+
+def test_fast_primary_is_not_hedged():
+    started = []
+
+    async def fast(name):
+        started.append(name)
+        return "primary"
+
+    async def streamed(name):
+        started.append(name)
+        race.claim(name)
+        return "streamed"
+
+    async def alternate(name):
+        started.append(name)
+        return "alternate"
+
+    race = HedgedRace()
+    assert asyncio.run(race.run(fast, alternate, hedge_after=0.5)) == "primary"
+
+    race = HedgedRace()
+    assert asyncio.run(race.run(streamed, alternate, hedge_after=0.5)) == "streamed"
+
+    assert started == ["primary", "primary"]
+
+
+def test_failed_primary_fails_over():
+    async def broken(name):
+        raise ConnectionError("down")
+
+    async def healthy(name):
+        return "ok"
+
+    assert asyncio.run(HedgedRace().run(broken, healthy)) == "ok"
+    # Also when it fails before the hedge delay
+    assert asyncio.run(HedgedRace().run(broken, healthy, hedge_after=0.5)) == "ok"
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(HedgedRace().run(broken))
+
+
+def test_first_stream_claims_the_race():
+    chunks = []
+
+    def attempt(delay, text):
+        async def run(name):
+            await asyncio.sleep(delay)
+            if race.claim(name):
+                chunks.append(text)
+            await asyncio.sleep(0.05)
+            return text
+        return run
+
+    race = HedgedRace()
+    assert asyncio.run(race.run(attempt(0.2, "slow"), attempt(0.0, "fast"), hedge_after=0.01)) == "fast"
+    assert chunks == ["fast"]
+
+
+def test_breaker_opens_and_recovers(monkeypatch):
+    breaker = CircuitBreaker("ollama", failure_threshold=2, cooldown=0.0)
+
+    breaker.on_failure()
+    assert breaker.allow()
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.on_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_call_llm_fails_over_to_second_provider(monkeypatch, tmp_path):
+    fast = LatencyModel(ttft=0.0, tokens_per_second=0.0)
+    failing = FakeServerConfig(latency=fast, error_rate=1.0, error_status=503)
+
+    with FakeLLMServer(config=failing) as primary, FakeLLMServer(config=FakeServerConfig(latency=fast)) as backup:
+        monkeypatch.setenv("LLM_PROVIDER", "ollama")
+        monkeypatch.setattr(client, "get_response_cache", lambda: ResponseCache(str(tmp_path / "c.sqlite"), mode="off"))
+        monkeypatch.setenv("OLLAMA_HOST", primary.url)
+        monkeypatch.setenv("OLLAMA_MAX_RETRIES", "0")
+        monkeypatch.setenv("NVIDIA_BASE_URL", backup.url + "/v1")
+        monkeypatch.setenv("NVIDIA_API_KEY", "fake")
+        monkeypatch.setenv("LLM_FALLBACK_PROVIDER", "nvidia")
+        monkeypatch.setenv("LLM_FALLBACK_MODEL", "failover-test-backup")
+
+        text = client.call_llm("Leaf Node Metadata\nFull Path: a\nMandatory: yes", model="failover-test-primary")
+
+        assert '"KEEP"' in text
+        assert primary.stats["errors"] == 1
+        assert backup.stats["requests"] >= 1
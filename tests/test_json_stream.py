@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from core.json_stream import (
+    IncrementalJSONParser,
+    JSONExtractionError,
+    SchemaPrefixError,
+    extract_json_object,
+    iter_json_objects,
+    validate_json,
+)
+from core.schemas import NodeDecision, PruneDecision
+
+
+def feed_all(parser, chunks):
+    for i, chunk in enumerate(chunks):
+        if parser.feed(chunk):
+            return i
+    return None
+
+
+def test_stops_at_closing_brace_and_skips_chatter():
+    parser = IncrementalJSONParser()
+    chunks = ["Here you go:\n```json\n{\"choice\": ", "\"NestJS\", \"nested\": {\"a\": [1, 2]}", "}", "\n```\nHope this helps {!}"]
+
+    assert feed_all(parser, chunks) == 2
+    assert parser.complete
+    assert json.loads(parser.text) == {"choice": "NestJS", "nested": {"a": [1, 2]}}
+
+
+def test_braces_and_escapes_inside_strings():
+    parser = IncrementalJSONParser()
+    parser.feed('{"reason": "uses } and { and \\" quotes", ')
+
+    assert not parser.complete
+
+    parser.feed('"decision": "KEEP"}')
+    assert json.loads(parser.text)["reason"] == 'uses } and { and " quotes'
+
+
+def test_schema_violation_aborts_before_object_closes():
+    parser = IncrementalJSONParser(PruneDecision)
+
+    with pytest.raises(SchemaPrefixError):
+        parser.feed('{"decision": "MAYBE", "reason": "')
+
+    assert not parser.complete
+
+
+def test_wrong_type_aborts():
+    parser = IncrementalJSONParser(NodeDecision)
+
+    with pytest.raises(SchemaPrefixError):
+        parser.feed('{"choice": ["React", "Vue"], ')
+
+
+def test_valid_prefix_passes():
+    parser = IncrementalJSONParser(PruneDecision)
+
+    assert parser.feed('{"decision": "keep", "reason": "needed", "extra": 1}')
+
+
+def test_schema_member_and_close_in_later_chunk():
+    parser = IncrementalJSONParser(PruneDecision)
+
+    assert not parser.feed('{"decision": "KEEP"')
+    assert parser.feed(', "reason": "x"} trailing')
+
+    assert json.loads(parser.text) == {"decision": "KEEP", "reason": "x"}
+    assert parser.result is not None and parser.result.reason == "x"
+
+
+def test_extract_picks_first_valid_object():
+    text = 'Use {braces} like this: {"decision": "maybe"} or rather {"decision": "keep", "reason": "a } b"} {x}'
+
+    assert extract_json_object(text, PruneDecision).reason == "a } b"
+    assert [*iter_json_objects('{"a": {"b": "}"}} and {"c": 1}')] == ['{"a": {"b": "}"}}', '{"c": 1}']
+
+
+def test_extract_reports_first_rejected_object():
+    with pytest.raises(JSONExtractionError) as info:
+        extract_json_object('prose {"decision": "maybe"} more {"decision": 1}', PruneDecision)
+
+    assert info.value.candidate == '{"decision": "maybe"}'
+
+    with pytest.raises(JSONExtractionError) as info:
+        extract_json_object("no json here", PruneDecision)
+
+    assert info.value.candidate is None
+
+
+def test_strings_split_across_chunks():
+    parser = IncrementalJSONParser(PruneDecision)
+    text = '{"reason": "a \\"}\\" b, {c}", "decision": "keep"} trailing {'
+
+    chunks = [text[i:i + 3] for i in range(0, len(text), 3)]
+
+    assert feed_all(parser, chunks) is not None
+    assert parser.text == text[:text.index("} trailing") + 1]
+    assert parser.value().reason == 'a "}" b, {c}'
+
+
+def test_completed_invalid_object_is_repairable():
+    parser = IncrementalJSONParser(NodeDecision)
+
+    assert parser.feed('{"choice": "React", "rationale": "fits"}')
+
+    with pytest.raises(JSONExtractionError) as info:
+        parser.value()
+
+    assert info.value.candidate == '{"choice": "React", "rationale": "fits"}'
+
+
+def test_validate_json_modes():
+    assert validate_json('{"decision": "keep"}', PruneDecision).decision == "KEEP"
+    assert validate_json('Sure: ```json\n{"decision": "prune"}\n```', PruneDecision, mode="lenient").decision == "PRUNE"
+
+    # Partial: missing or unfinished fields are fine, wrong ones are not
+    assert validate_json('{"choice": "React", "rati', NodeDecision, mode="partial") is None
+    assert validate_json('{"decision": "keep", "reason": "nee', PruneDecision, mode="partial").decision == "KEEP"
+
+    with pytest.raises(ValueError):
+        validate_json('{"decision": "maybe", "reason": "x', PruneDecision, mode="partial")
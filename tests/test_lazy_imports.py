@@ -0,0 +1,38 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from llm.tracing import traceable
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_stage_imports_do_not_load_provider_sdks():
+    code = (
+        "import sys, main_prune_runner, core.node_description_builder; "
+        "print([m for m in ('ollama', 'httpx', 'llama_cpp', 'langsmith') if m in sys.modules])"
+    )
+    env = {**os.environ, "PYTHONPATH": ROOT, "LANGSMITH_TRACING": "false"}
+
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+    assert out.stdout.strip() == "[]"
+
+
+def test_traceable_without_tracing_calls_through(monkeypatch):
+    monkeypatch.delenv("LANGSMITH_TRACING", raising=False)
+    monkeypatch.delenv("LANGCHAIN_TRACING_V2", raising=False)
+
+    class Client:
+        @traceable(name="Sync")
+        def call(self, x):
+            return x + 1
+
+        @traceable(name="Async")
+        async def acall(self, x):
+            return x + 2
+
+    assert Client().call(1) == 2
+    assert asyncio.run(Client().acall(1)) == 3
+    assert Client.call.__name__ == "call"
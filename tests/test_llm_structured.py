@@ -0,0 +1,53 @@
+from core.llm_structured import StructuredLLM, structured_stats
+from core.schemas import PruneDecision
+
+
+def test_schema_is_sent_and_fallback_is_counted(fake_llm):
+    outputs = iter([
+        '{"decision": "KEEP"}',
+        'Sure! Here it is: {"decision": "PRUNE", "reason": "unused"}',
+    ])
+
+    fake_llm.respond = lambda prompt, **kwargs: next(outputs)
+    llm = StructuredLLM(model="m", stream=False)
+    before = structured_stats()
+
+    first = llm.call("Leaf", PruneDecision)
+    second = llm.call("Leaf", PruneDecision)
+    seen = [kwargs["json_schema"] for _, kwargs in fake_llm.calls]
+
+    assert seen[0]["title"] == "PruneDecision"
+    assert "decision" in seen[0]["properties"]
+    assert first.reason == "No reason provided by model."
+    assert second.decision == "PRUNE"
+
+    after = structured_stats()
+    assert after["direct"] - before.get("direct", 0) == 1
+    assert after["fallback"] - before.get("fallback", 0) == 1
+
+
+def test_constrained_decoding_can_be_disabled(fake_llm):
+    fake_llm.respond = lambda prompt, **kwargs: '{"decision": "KEEP", "reason": "r"}'
+
+    StructuredLLM(model="m", stream=False, constrained=False).call("Leaf", PruneDecision)
+
+    assert [kwargs["json_schema"] for _, kwargs in fake_llm.calls] == [None]
+
+
+def test_invalid_object_is_repaired_with_a_short_prompt(fake_llm):
+    outputs = iter([
+        '{"decision": "MAYBE", "reason": "unsure"}',
+        '{"decision": "KEEP", "reason": "unsure"}',
+    ])
+
+    fake_llm.respond = lambda prompt, **kwargs: next(outputs)
+
+    result = StructuredLLM(model="m", stream=False).call(
+        "Leaf", PruneDecision, system_context="large shared context " * 100
+    )
+
+    assert result.decision == "KEEP"
+    repair_prompt, repair_kwargs = fake_llm.calls[1]
+    repair_system = repair_kwargs["system"]
+    assert '"MAYBE"' in repair_prompt and "KEEP or PRUNE" in repair_prompt
+    assert "large shared context" not in repair_prompt + repair_system
@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from core.decision_tree import DecisionTree, load_decision_tree
+from llm.fake_server import generate_answer
+from main_runner import LLMClient, render_options_tree, traverse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PROMPT = "build a backend for online bakery shop"
+
+
+@pytest.fixture
+def tree_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("DECISION_TREE_CACHE_DIR", str(tmp_path))
+
+
+def test_outline_shrinks_to_the_token_cap():
+    tree = DecisionTree.compile({"Root": {"A": {"A1": ["x", "y"]}, "B": ["b1", "b2"]}})
+    root = tree.find("Root")
+
+    outline, levels = render_options_tree(tree, root, 3, 1000)
+    assert levels == 3
+    assert outline.splitlines() == ["- A", "  - A1", "    - x", "    - y", "- B", "  - b1", "  - b2"]
+
+    outline, levels = render_options_tree(tree, root, 3, 6)
+    assert levels == 1
+    assert outline == "- A\n- B"
+
+
+def test_lookahead_takes_the_same_path_in_fewer_calls(fake_llm, tree_cache):
+    tree = load_decision_tree(os.path.join(ROOT, "data", "Web_Dev_Only.json"))
+    start = "Core Application & Web Stacks"
+
+    single, _ = traverse(tree, start, LLMClient(), PROMPT, lookahead=1)
+    single_calls = len(fake_llm.calls)
+    fake_llm.calls.clear()
+
+    path, recorder = traverse(tree, start, LLMClient(), PROMPT, lookahead=3)
+
+    assert path == single
+    assert len(fake_llm.calls) <= -(-single_calls // 3) + 1
+    assert recorder.nodes[path[-1]].is_leaf
+    assert [choice for (_, choice) in recorder.choice_rationales] == path
+
+
+def test_invalid_hop_falls_back_to_one_level(fake_llm):
+    tree = DecisionTree.compile({
+        "Root": {"Web": {"Frontend": {"React": ["Vite", "Next.js"], "Vue": ["Nuxt"]}}, "Mobile": ["Flutter"]}
+    })
+
+    def respond(prompt, **kwargs):
+        if "OPTIONS TREE" in prompt and len(fake_llm.calls) == 1:
+            step = {"rationale": "r", "purpose": "p", "confidence": 0.9}
+            return json.dumps({"steps": [{"choice": "web", **step}, {"choice": "Backend", **step}]})
+        return generate_answer(prompt)[0]
+
+    fake_llm.respond = respond
+
+    path, _ = traverse(tree, "Root", LLMClient(), "A web app with React", lookahead=3)
+
+    assert path == ["Web", "Frontend", "React", "Vite"]
+    # The valid hop was kept; the rejected level was asked on its own
+    assert ["OPTIONS TREE" in p for p in fake_llm.prompts] == [True, False, True]
@@ -0,0 +1,59 @@
+import re
+
+from core.decision_tree import DecisionTree
+from core.option_ranker import rank_options, shortlist_options
+from main_runner import LLMClient, traverse
+
+WIDE = {
+    "Root": {
+        "Hosting": [f"Provider {i}" for i in range(300)] + ["Netlify", {"Node.js": ["Express", "Fastify"]}],
+    }
+}
+
+
+def test_bm25_ranks_matching_options_first():
+    tree = DecisionTree.compile(WIDE)
+    hosting = tree.find("Hosting")
+
+    ranked = rank_options(tree, hosting, "static site on Netlify")
+    assert tree.names[ranked[0]] == "Netlify"
+
+    # Sub-option names count for their parent
+    ranked = rank_options(tree, hosting, "an Express API")
+    assert tree.names[ranked[0]] == "Node.js"
+
+
+def test_shortlist_is_bounded_and_keeps_tree_order(monkeypatch):
+    monkeypatch.setenv("OPTION_SHORTLIST_K", "5")
+    tree = DecisionTree.compile(WIDE)
+    hosting = tree.find("Hosting")
+
+    shortlist = shortlist_options(tree, hosting, "Netlify", keep=("Provider 7",))
+
+    assert len(shortlist) == 6
+    assert "Netlify" in shortlist and "Provider 7" in shortlist
+    assert shortlist.index("Provider 7") < shortlist.index("Netlify")
+
+    ranked = shortlist_options(tree, hosting, "Netlify", keep=("Provider 7",), ranked=True)
+    assert ranked[0] == "Netlify" and ranked[-1] == "Provider 7"
+    assert set(ranked) == set(shortlist)
+
+    narrow = DecisionTree.compile({"Root": ["a", "b"]})
+    assert shortlist_options(narrow, narrow.find("Root"), "b") == ["a", "b"]
+
+
+def test_tournament_keeps_every_prompt_small(fake_llm, monkeypatch):
+    monkeypatch.setenv("OPTION_SHORTLIST_K", "24")
+    monkeypatch.setenv("OPTION_TOURNAMENT_CHUNK", "8")
+    tree = DecisionTree.compile(WIDE)
+    path, _ = traverse(tree, "Root", LLMClient(), "Deploy the static site on Netlify", lookahead=1)
+
+    option_counts = [
+        len(re.findall(r"^\s*- ", prompt.split("AVAILABLE OPTIONS", 1)[1], re.MULTILINE))
+        for prompt in fake_llm.prompts
+    ]
+
+    assert path == ["Hosting", "Netlify"]
+    # Root (1 option), then 3 parallel chunks of 8 and a final of 3
+    assert option_counts[0] == 1
+    assert sorted(option_counts[1:]) == [3, 8, 8, 8]
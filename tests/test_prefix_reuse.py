@@ -0,0 +1,102 @@
+import json
+
+import core.node_description_builder as node_builder
+from core.llm_structured import StructuredLLM
+from core.schemas import NodeDecision
+from llm.prefix_reuse import PrefixReuseTracker
+from llm.usage import UsageRecord, UsageTracker
+
+
+def test_provider_reported_reuse():
+    tracker = PrefixReuseTracker()
+
+    assert tracker.record("gpt", "system", "prompt", cached_tokens=80, prompt_tokens=100) == 80
+    assert tracker.record("gpt", None, "prompt", prompt_tokens=50) == 0
+
+    assert tracker.stats()["reused_prefix_tokens"] == 80
+    assert tracker.stats()["prompt_tokens"] == 150
+
+
+def test_estimated_reuse_after_a_cold_call():
+    tracker = PrefixReuseTracker()
+    system = "s" * 400
+    prompt = "p" * 400
+
+    # Cold: all 200 tokens evaluated, calibrates 4 chars per token
+    assert tracker.record("mistral", system, prompt, evaluated_tokens=200) == 0
+
+    # Warm: only the 100 prompt tokens were evaluated again
+    assert tracker.record("mistral", system, prompt, evaluated_tokens=100) == 100
+
+    # Never more than the prefix itself
+    assert tracker.record("mistral", system, prompt, evaluated_tokens=0) == 100
+
+    # A different prefix is cold again
+    assert tracker.record("mistral", "other", prompt, evaluated_tokens=101) == 0
+
+
+def test_reused_tokens_are_summed_per_stage():
+    tracker = UsageTracker()
+
+    for reused in (0, 30, 50):
+        tracker.record(UsageRecord(
+            stage="nodes", node=None, provider="ollama", model="mistral",
+            prompt_tokens=100, completion_tokens=10, estimated=False, seconds=0.1,
+            reused_prefix_tokens=reused
+        ))
+
+    assert tracker.summary()["nodes"]["reused_prefix_tokens"] == 80
+
+
+def test_structured_calls_share_the_system_prefix(fake_llm):
+    llm = StructuredLLM()
+
+    for options in (["React", "Vue"], ["Django", "Flask"]):
+        prompt = "AVAILABLE OPTIONS (choose exactly one):\n" + "\n".join(f"- {o}" for o in options)
+        llm.call(prompt, NodeDecision, system_context="You pick technologies.")
+
+    systems = [kwargs["system"] for _, kwargs in fake_llm.calls]
+
+    assert systems[0] == systems[1]
+    assert systems[0].startswith("You pick technologies.")
+    assert "React" not in systems[0]
+
+
+def test_node_descriptions_share_one_system_prompt(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_WARMUP", "0")
+    calls = []
+
+    async def fake_acall_llm(prompt, system=None, **kwargs):
+        calls.append((prompt, system))
+        return "# doc"
+
+    monkeypatch.setattr(node_builder, "acall_llm", fake_acall_llm)
+
+    structure = {
+        "name": "app", "type": "folder", "full_path": "app",
+        "children": [
+            {"name": "main.py", "type": "file", "full_path": "app/main.py"},
+            {"name": "db.py", "type": "file", "full_path": "app/db.py"},
+        ],
+    }
+    (tmp_path / "pruned.json").write_text(json.dumps(structure))
+    (tmp_path / "meta.json").write_text(json.dumps({
+        "user_initial_prompt": "a bakery shop",
+        "tech_stack_summary": "Python → FastAPI",
+    }))
+    (tmp_path / "global.md").write_text("Layered architecture.")
+
+    node_builder.build_node_descriptions(
+        str(tmp_path / "pruned.json"),
+        str(tmp_path / "meta.json"),
+        str(tmp_path / "global.md"),
+        str(tmp_path / "out")
+    )
+
+    assert len(calls) == 3
+    assert len({system for _, system in calls}) == 1
+    system = calls[0][1]
+    assert "a bakery shop" in system and "Layered architecture." in system
+    # Node-specific text stays in the user message
+    assert all("app/main.py" not in system for _, system in calls)
+    assert any("app/main.py" in prompt for prompt, _ in calls)
@@ -0,0 +1,64 @@
+import llm.local_llama_client as client
+from llm.profiles import GenerationProfile, context_size, profile_for
+from llm.providers import LLMResult, Provider, get_provider, register_provider
+from llm.response_cache import ResponseCache
+from llm.usage import usage_stage
+
+
+def test_schema_profile_wins_over_stage():
+    assert profile_for("PruneDecision", "nodes").max_tokens == 192
+    assert profile_for("UnknownSchema", "nodes").max_tokens == 2048
+    assert profile_for(None, "untagged") == profile_for()
+
+
+def test_env_override_merges_into_profile(monkeypatch):
+    monkeypatch.setenv("LLM_PROFILE_PRUNEDECISION", '{"max_tokens": 64, "stop": ["\\n\\n"]}')
+
+    profile = profile_for("PruneDecision")
+
+    assert profile.max_tokens == 64
+    assert profile.stop == ("\n\n",)
+    assert profile.temperature == 0.0
+
+
+def test_context_size_is_bucketed(monkeypatch):
+    monkeypatch.delenv("LLM_NUM_CTX_MIN", raising=False)
+    monkeypatch.delenv("LLM_NUM_CTX_MAX", raising=False)
+    small = GenerationProfile(max_tokens=192)
+
+    assert context_size(300, small) == 2048
+    assert context_size(3000, small) == 4096
+    assert context_size(10 ** 6, small) == 32768
+
+
+def test_provider_options():
+    profile = GenerationProfile(max_tokens=128, temperature=0.0, stop=("END",))
+
+    ollama = get_provider("ollama").profile_params(profile, 100)
+    assert ollama == {"options": {"num_predict": 128, "temperature": 0.0, "stop": ["END"], "num_ctx": 2048}}
+
+    openai = get_provider("openai").profile_params(profile, 100)
+    assert openai == {"max_tokens": 128, "temperature": 0.0, "stop": ["END"]}
+
+
+def test_call_llm_applies_stage_profile(monkeypatch, tmp_path):
+    seen = []
+
+    class RecordingProvider(Provider):
+        name = "recording"
+
+        def default_model(self):
+            return "recording-model"
+
+        async def acomplete(self, messages, model, extra):
+            seen.append(extra)
+            return LLMResult(text="ok", prompt_tokens=1, completion_tokens=1)
+
+    register_provider("recording", RecordingProvider)
+    monkeypatch.setenv("LLM_PROVIDER", "recording")
+    monkeypatch.setattr(client, "get_response_cache", lambda: ResponseCache(str(tmp_path / "c.sqlite"), mode="off"))
+
+    with usage_stage("nodes"):
+        client.call_llm("describe the node")
+
+    assert seen == [{"max_tokens": 2048}]
@@ -0,0 +1,75 @@
+import pytest
+
+import llm.local_llama_client as client
+from llm.fake_server import FakeLLMServer, FakeServerConfig, LatencyModel
+from llm.providers import LLMResult, Provider, get_provider, register_provider, resolve_provider
+from llm.response_cache import ResponseCache
+from llm.usage import usage_stage
+
+PROMPT = "Leaf Node Metadata\nFull Path: a\nMandatory: yes"
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    fast = LatencyModel(ttft=0.0, tokens_per_second=0.0)
+    monkeypatch.setattr(client, "get_response_cache", lambda: ResponseCache(str(tmp_path / "c.sqlite"), mode="off"))
+
+    with FakeLLMServer(config=FakeServerConfig(latency=fast)) as fake:
+        monkeypatch.setenv("OPENAI_BASE_URL", fake.url + "/v1")
+        yield fake
+
+
+def test_stage_provider_overrides_default(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "ollama")
+    monkeypatch.setenv("LLM_PROVIDER_PRUNING", "openai")
+
+    assert resolve_provider("traversal") == "ollama"
+    with usage_stage("pruning"):
+        assert resolve_provider() == "openai"
+
+
+def test_openai_compatible_complete_and_stream(server):
+    provider = get_provider("openai")
+    messages = [{"role": "user", "content": PROMPT}]
+
+    result = provider.complete(messages, "openai-test")
+    assert '"KEEP"' in result.text
+    assert result.prompt_tokens and result.completion_tokens
+
+    chunks = []
+    streamed = provider.stream(messages, "openai-test", lambda text: chunks.append(text) and False)
+    assert streamed.text == result.text == "".join(chunks)
+    assert streamed.completion_tokens == result.completion_tokens
+
+
+def test_call_llm_uses_stage_provider(monkeypatch, server):
+    monkeypatch.setenv("LLM_PROVIDER", "ollama")
+    monkeypatch.setenv("LLM_PROVIDER_PRUNING", "openai")
+
+    with usage_stage("pruning"):
+        text = client.call_llm(PROMPT, model="stage-provider-test")
+
+    assert '"KEEP"' in text
+    assert server.stats["requests"] == 1
+
+
+def test_registered_provider_is_used(monkeypatch, tmp_path):
+    class EchoProvider(Provider):
+        name = "echo"
+
+        def default_model(self):
+            return "echo-model"
+
+        async def acomplete(self, messages, model, extra):
+            return LLMResult(text=f"{model}: {messages[-1]['content']}", prompt_tokens=1, completion_tokens=1)
+
+    register_provider("echo", EchoProvider)
+    monkeypatch.setenv("LLM_PROVIDER", "echo")
+    monkeypatch.setattr(client, "get_response_cache", lambda: ResponseCache(str(tmp_path / "c.sqlite"), mode="off"))
+
+    assert client.call_llm("hello") == "echo-model: hello"
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError, match="Unknown LLM_PROVIDER"):
+        get_provider("no-such-backend")
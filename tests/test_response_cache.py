@@ -0,0 +1,87 @@
+import os
+import time
+
+import pytest
+
+from llm.response_cache import ResponseCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return ResponseCache(os.path.join(tmp_path, "cache.sqlite"), **kwargs)
+
+
+def test_key_depends_on_every_component():
+    base = ResponseCache.make_key("ollama", "mistral", {"temperature": 0}, "hello")
+
+    assert base == ResponseCache.make_key("ollama", "mistral", {"temperature": 0}, "hello")
+    assert base != ResponseCache.make_key("nvidia", "mistral", {"temperature": 0}, "hello")
+    assert base != ResponseCache.make_key("ollama", "llama3", {"temperature": 0}, "hello")
+    assert base != ResponseCache.make_key("ollama", "mistral", {"temperature": 1}, "hello")
+    assert base != ResponseCache.make_key("ollama", "mistral", {"temperature": 0}, "hello!")
+
+
+def test_hit_and_miss_counters(tmp_path):
+    cache = make_cache(tmp_path)
+
+    assert cache.get("k") is None
+    cache.put("k", "response")
+    assert cache.get("k") == "response"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["writes"] == 1
+
+
+def test_persists_across_instances(tmp_path):
+    make_cache(tmp_path).put("k", "response")
+    assert make_cache(tmp_path).get("k") == "response"
+
+
+def test_replay_mode_is_read_only(tmp_path):
+    make_cache(tmp_path).put("k", "response")
+
+    replay = make_cache(tmp_path, mode="replay")
+    replay.put("other", "ignored")
+
+    assert replay.get("k") == "response"
+    assert replay.get("other") is None
+
+
+def test_age_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_age_seconds=60)
+    cache.put("k", "response")
+
+    cache._conn.execute("UPDATE responses SET created_at = ?", (time.time() - 120,))
+
+    assert cache.get("k") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=25)
+
+    cache.put("a", "x" * 10)
+    time.sleep(0.01)
+    cache.put("b", "y" * 10)
+    time.sleep(0.01)
+    cache.get("a")          # "b" is now least recently used
+    time.sleep(0.01)
+    cache.put("c", "z" * 10)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_off_mode_stores_nothing(tmp_path):
+    cache = make_cache(tmp_path, mode="off")
+    cache.put("k", "response")
+
+    assert cache.get("k") is None
+    assert not os.path.exists(os.path.join(tmp_path, "cache.sqlite"))
+
+
+def test_unknown_mode_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        make_cache(tmp_path, mode="sometimes")
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from core.llm_structured import StructuredLLM
+from core.schemas import NodeDecision, PruneDecision
+from llm.routing import resolve_route
+
+
+def fake_models(fake_llm, answers):
+    calls = []
+
+    def respond(prompt, *, model, **kwargs):
+        calls.append(model)
+        return json.dumps(answers[model])
+
+    fake_llm.respond = respond
+    return calls
+
+
+def test_resolve_route(monkeypatch):
+    monkeypatch.delenv("LLM_ROUTE_SCHEMA_PRUNEDECISION", raising=False)
+    monkeypatch.delenv("LLM_ROUTE_STAGE_PRUNING", raising=False)
+    monkeypatch.setenv("OLLAMA_SMALL_MODEL", "small")
+
+    assert resolve_route("PruneDecision", "pruning", "big", "ollama") == ["small", "big"]
+    assert resolve_route("ProjectBlueprint", "blueprint", "big", "ollama") == ["big"]
+
+    monkeypatch.setenv("LLM_ROUTE_STAGE_PRUNING", "tiny,big")
+    assert resolve_route("PruneDecision", "pruning", "big", "ollama") == ["tiny", "big"]
+
+    monkeypatch.setenv("LLM_ROUTE_SCHEMA_PRUNEDECISION", "big")
+    assert resolve_route("PruneDecision", "pruning", "big", "ollama") == ["big"]
+
+
+def test_small_model_answer_is_kept(fake_llm, monkeypatch):
+    monkeypatch.setenv("LLM_ROUTE_SCHEMA_PRUNEDECISION", "small,big")
+    calls = fake_models(fake_llm, {
+        "small": {"decision": "keep", "reason": "needed", "confidence": 0.9},
+    })
+
+    result = StructuredLLM(stream=False).call("Leaf", PruneDecision)
+
+    assert result.decision == "KEEP"
+    assert calls == ["small"]
+
+
+def test_escalates_on_low_confidence_and_invalid_choice(fake_llm, monkeypatch):
+    monkeypatch.setenv("LLM_ROUTE_SCHEMA_PRUNEDECISION", "small,big")
+    calls = fake_models(fake_llm, {
+        "small": {"decision": "PRUNE", "reason": "unsure", "confidence": 20},
+        "big": {"decision": "KEEP", "reason": "needed", "confidence": 0.95},
+    })
+
+    assert StructuredLLM(stream=False).call("Leaf", PruneDecision).decision == "KEEP"
+    assert calls == ["small", "big"]
+
+    monkeypatch.setenv("LLM_ROUTE_SCHEMA_NODEDECISION", "small,big")
+    calls = fake_models(fake_llm, {
+        "small": {"choice": "Ruby", "rationale": "r", "purpose": "p"},
+        "big": {"choice": "python", "rationale": "r", "purpose": "p"},
+    })
+
+    def validate(decision):
+        if decision.choice.lower() != "python":
+            raise ValueError("invalid choice")
+        decision.choice = "Python"
+        return decision
+
+    result = StructuredLLM(stream=False).call("Pick", NodeDecision, validate=validate)
+
+    assert result.choice == "Python"
+    assert calls == ["small", "big"]
+
+
+def test_explicit_model_is_not_routed(fake_llm, monkeypatch):
+    monkeypatch.setenv("LLM_ROUTE_SCHEMA_PRUNEDECISION", "small,big")
+    calls = fake_models(fake_llm, {
+        "pinned": {"decision": "KEEP", "reason": "r", "confidence": 0.1},
+    })
+
+    StructuredLLM(model="pinned", stream=False).call("Leaf", PruneDecision)
+
+    assert calls == ["pinned"]
+
+
+def test_last_model_failure_raises(fake_llm, monkeypatch):
+    monkeypatch.setenv("LLM_ROUTE_SCHEMA_PRUNEDECISION", "small,big")
+    fake_models(fake_llm, {
+        "small": {"decision": "MAYBE", "reason": "r"},
+        "big": {"decision": "MAYBE", "reason": "r"},
+    })
+
+    with pytest.raises(RuntimeError):
+        StructuredLLM(stream=False).call("Leaf", PruneDecision, max_retries=0)
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import llm.local_llama_client as client
+from core.llm_structured import StructuredLLM
+from core.schemas import NodeDecision
+from llm.client_pool import get_http_client, pooled_clients
+from llm.fake_server import FakeLLMServer, FakeServerConfig, LatencyModel, generate_answer
+from llm.response_cache import ResponseCache
+from llm.runtime import on_llm_loop, run_on_llm_loop, run_sync
+from llm.usage import current_node, current_stage, usage_node, usage_stage
+
+
+async def where():
+    return threading.current_thread().name, current_stage(), current_node()
+
+
+def test_tags_reach_the_loop_from_sync_code_and_other_loops():
+    with usage_stage("pruning"), usage_node("src/app.ts"):
+        assert run_sync(where()) == ("llm-event-loop", "pruning", "src/app.ts")
+
+        # A caller with its own event loop (e.g. asyncio.run in a builder)
+        assert asyncio.run(run_on_llm_loop(where())) == ("llm-event-loop", "pruning", "src/app.ts")
+
+    assert current_stage() == "untagged"
+
+
+def test_run_sync_from_worker_threads_keeps_each_threads_tags():
+    def work(i):
+        with usage_stage("nodes"), usage_node(f"file_{i}.py"):
+            return run_sync(where())[2]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(work, range(16))) == [f"file_{i}.py" for i in range(16)]
+
+
+def test_loop_thread_must_await_instead_of_blocking():
+    async def inner():
+        return "ok"
+
+    async def on_loop():
+        assert on_llm_loop()
+        # Blocking here would deadlock the loop, so it is refused
+        coro = inner()
+        with pytest.raises(RuntimeError):
+            run_sync(coro)
+        # Awaiting on the loop itself runs in place
+        return await run_on_llm_loop(inner())
+
+    assert run_sync(on_loop()) == "ok"
+
+
+def test_structured_acall_from_a_foreign_loop(fake_llm):
+    loops = []
+
+    def respond(prompt, **kwargs):
+        loops.append(on_llm_loop())
+        return generate_answer(prompt)[0]
+
+    fake_llm.respond = respond
+    prompt = "AVAILABLE OPTIONS (choose exactly one):\n- React\n- Vue"
+
+    result = asyncio.run(StructuredLLM().acall(prompt, NodeDecision))
+    assert result.choice == "React"
+    assert loops == [True]
+
+
+def test_one_pooled_client_serves_every_call(monkeypatch, tmp_path):
+    fast = LatencyModel(ttft=0.0, tokens_per_second=0.0)
+
+    with FakeLLMServer(config=FakeServerConfig(latency=fast)) as server:
+        base_url = server.url + "/v1"
+        monkeypatch.setenv("LLM_PROVIDER", "nvidia")
+        monkeypatch.setenv("NVIDIA_BASE_URL", base_url)
+        monkeypatch.setenv("NVIDIA_API_KEY", "pool-test")
+        monkeypatch.setattr(client, "get_response_cache", lambda: ResponseCache(str(tmp_path / "c.sqlite"), mode="off"))
+
+        client.call_llm("first prompt", model="pool-test")
+        pooled = get_http_client(base_url, "pool-test")
+
+        client.call_llm("second prompt", model="pool-test")
+        # acall_llm from another event loop goes through the same client
+        asyncio.run(client.acall_llm("third prompt", model="pool-test"))
+
+        assert get_http_client(base_url, "pool-test") is pooled
+        assert [key for key in pooled_clients() if key[:2] == ("http", base_url)] == [("http", base_url, "pool-test")]
+        assert server.stats["requests"] == 3
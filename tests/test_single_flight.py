@@ -0,0 +1,67 @@
+import asyncio
+
+from core.llm_structured import StructuredLLM
+from core.schemas import PruneDecision
+from llm.runtime import run_sync
+from llm.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    flights = SingleFlight("test")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert runs == [1]
+    assert [r for r, _ in results] == ["answer"] * 5
+    assert [shared for _, shared in results].count(False) == 1
+    assert flights.stats()["shared"] == 4 and flights.in_flight() == 0
+
+
+def test_errors_reach_every_caller_and_cancel_is_isolated():
+    flights = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        results = await asyncio.gather(
+            flights.do("bad", fail), flights.do("bad", fail), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+
+        first = asyncio.ensure_future(flights.do("slow", slow))
+        second = asyncio.ensure_future(flights.do("slow", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == ("done", True)
+
+    asyncio.run(main())
+
+
+def test_structured_calls_are_deduplicated(fake_llm):
+    fake_llm.delay = 0.05
+    fake_llm.respond = lambda prompt, **kwargs: '{"decision": "KEEP", "reason": "shared"}'
+    llm = StructuredLLM(model="m", stream=False)
+
+    async def main():
+        return await asyncio.gather(*(llm.acall("README.md", PruneDecision) for _ in range(4)))
+
+    results = run_sync(main())
+
+    assert len(fake_llm.calls) == 1
+    assert all(r.decision == "KEEP" for r in results)
+    assert len({id(r) for r in results}) == 4
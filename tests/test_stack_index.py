@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+import main_runner
+from core.decision_tree import load_decision_tree
+from core.stack_index import StackIndex, contested_levels, remember_enabled
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+START = "Core Application & Web Stacks"
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setenv("DECISION_TREE_CACHE_DIR", str(tmp_path))
+    return load_decision_tree(os.path.join(ROOT, "data", "Web_Dev_Only.json"))
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = StackIndex(str(tmp_path / "index.json"))
+    assert index.add_stack_meta(os.path.join(ROOT, "data", "stack_meta.json"))
+    monkeypatch.setattr(main_runner, "get_stack_index", lambda: index)
+    return index
+
+
+def test_similar_requirements_match(index, tmp_path):
+    stored, similarity = index.most_similar("backend for an online bakery store", START)
+    assert stored.requirement == "build a backend for online bakery shop"
+    assert similarity > 0.6
+
+    assert index.most_similar("mobile game with leaderboards", START)[1] < 0.2
+
+    index.save()
+    assert len(StackIndex(str(tmp_path / "index.json")).entries) == 1
+
+
+def test_only_contradicted_levels_are_contested(index, tree):
+    stored = index.entries[0]
+
+    assert contested_levels(tree, stored, "build a backend for online bakery shop") == set()
+    # "Python" names a sibling of JavaScript/TypeScript; nothing else is contradicted
+    level = [hop["choice"] for hop in stored.hops].index("JavaScript/TypeScript")
+    assert contested_levels(tree, stored, "online bakery shop backend in Python") == {level}
+
+
+def test_traverse_reuses_the_stored_path(index, tree, fake_llm, monkeypatch):
+    monkeypatch.setenv("STACK_REUSE_THRESHOLD", "0.5")
+    stored = [hop["choice"] for hop in index.entries[0].hops]
+
+    path, recorder = main_runner.traverse(tree, START, main_runner.LLMClient(), "backend for online bakery shops", reuse=True)
+
+    assert path == stored
+    assert fake_llm.calls == []
+    assert recorder.choice_rationales[(START, stored[0])]["rationale"]
+
+
+def test_contested_decision_is_asked_again(index, tree, fake_llm, monkeypatch):
+    monkeypatch.setenv("STACK_REUSE_THRESHOLD", "0.3")
+
+    path, _ = main_runner.traverse(tree, START, main_runner.LLMClient(), "online bakery shop backend in Python", reuse=True)
+
+    stored = [hop["choice"] for hop in index.entries[0].hops]
+    level = stored.index("JavaScript/TypeScript")
+
+    # Reused up to the contested level, then asked from there on
+    assert path[:level] == stored[:level]
+    assert path[level] == "Python"
+    assert len(fake_llm.calls) == len(path) - level
+
+
+def test_only_reuse_or_remember_adds_to_the_index(monkeypatch):
+    monkeypatch.delenv("STACK_REUSE", raising=False)
+    monkeypatch.delenv("STACK_REMEMBER", raising=False)
+
+    assert not remember_enabled()
+    assert remember_enabled(True)
+
+    monkeypatch.setenv("STACK_REMEMBER", "1")
+    assert remember_enabled(False)
+
+    monkeypatch.delenv("STACK_REMEMBER")
+    monkeypatch.setenv("STACK_REUSE", "1")
+    assert remember_enabled()
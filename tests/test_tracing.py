@@ -0,0 +1,82 @@
+import json
+import threading
+
+from llm import tracing
+from llm.tracing import JSONLSink, TraceSink, configure_tracing, summarize, traceable
+
+
+@traceable(name="Outer")
+def outer(prompt):
+    return inner(prompt) + "!"
+
+
+@traceable(name="Inner")
+def inner(prompt):
+    return prompt.upper()
+
+
+def read_spans(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_nested_spans_are_buffered_and_truncated(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    sink = JSONLSink(str(path), batch_size=100, flush_interval=60)
+    configure_tracing([sink], max_chars=20)
+
+    try:
+        outer("x" * 5000)
+        assert not path.exists()        # still buffered
+        sink.flush()
+    finally:
+        configure_tracing([])
+
+    spans = read_spans(path)
+    child, parent = spans
+
+    assert [s["name"] for s in spans] == ["Inner", "Outer"]
+    assert child["parent_run_id"] == parent["id"] and child["trace_id"] == parent["id"]
+    assert child["dotted_order"].startswith(parent["dotted_order"] + ".")
+    assert len(json.dumps(parent)) < 1500
+    assert "5000 chars" in parent["inputs"]["prompt"]
+
+
+def test_batches_are_written_off_the_span_thread():
+    written = []
+
+    class RecordingSink(TraceSink):
+        def write(self, batch):
+            written.append((threading.current_thread(), len(batch)))
+
+    sink = RecordingSink(batch_size=2, flush_interval=60)
+    configure_tracing([sink])
+
+    try:
+        outer("hello")      # two spans: one full batch
+        sink.flush()
+    finally:
+        configure_tracing([])
+
+    assert [n for _, n in written] == [2]
+    assert written[0][0] is not threading.current_thread()
+
+
+def test_head_sampling_drops_whole_traces(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    sink = JSONLSink(str(path))
+    configure_tracing([sink], sample_rate=0.0)
+
+    try:
+        before = tracing.tracing_stats()["spans"]
+        outer("hello")
+        sink.flush()
+    finally:
+        configure_tracing([])
+
+    assert tracing.tracing_stats()["spans"] == before
+    assert not path.exists()
+
+
+def test_hash_mode():
+    digest = summarize({"prompt": "secret prompt"}, mode="hash")["prompt"]
+    assert digest["chars"] == 13 and len(digest["sha256"]) == 16
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from core.decision_tree import DecisionTree
+from llm.fake_server import generate_answer
+from llm.runtime import run_sync
+from llm.usage import (
+    BudgetExceeded,
+    UsageRecord,
+    UsageTracker,
+    current_node,
+    current_stage,
+    track_stage,
+    usage_node,
+    write_usage_report,
+)
+from main_runner import LLMClient, traverse
+
+
+def record(stage, tokens, node=None):
+    return UsageRecord(
+        stage=stage,
+        node=node,
+        provider="ollama",
+        model="mistral",
+        prompt_tokens=tokens,
+        completion_tokens=0,
+        estimated=False,
+        seconds=0.5,
+    )
+
+
+def test_tags_reach_the_llm_loop():
+    async def read_tags():
+        return current_stage(), current_node()
+
+    @track_stage("pruning")
+    def run():
+        with usage_node("src/app.ts"):
+            return run_sync(read_tags())
+
+    assert run() == ("pruning", "src/app.ts")
+    assert current_stage() == "untagged"
+
+
+def test_budgets(capsys):
+    tracker = UsageTracker(budgets={"nodes": {"soft": 100, "hard": 200}})
+
+    tracker.record(record("nodes", 150))
+    assert "soft token budget" in capsys.readouterr().out
+    tracker.check_budget("nodes")
+
+    tracker.record(record("nodes", 50))
+    with pytest.raises(BudgetExceeded):
+        tracker.check_budget("nodes")
+
+    tracker.check_budget("pruning")
+
+
+def test_report_merges_stages_across_runs(tmp_path):
+    path = tmp_path / "usage.json"
+
+    first = UsageTracker(prices={"mistral": {"prompt": 1.0, "completion": 2.0}})
+    first.record(record("traversal", 1000, node="Backend"))
+    write_usage_report(str(path), tracker=first)
+
+    second = UsageTracker()
+    second.record(record("pruning", 10))
+    second.record(record("pruning", 20))
+    report = write_usage_report(str(path), tracker=second)
+
+    assert json.loads(path.read_text()) == report
+    assert report["stages"]["traversal"]["nodes"]["Backend"]["tokens"] == 1000
+    assert report["stages"]["traversal"]["cost_usd"] == pytest.approx(0.001)
+    assert report["stages"]["pruning"]["calls"] == 2
+    assert report["totals"]["prompt_tokens"] == 1030
+
+
+def test_traversal_node_tags_follow_the_path(fake_llm):
+    tags = []
+
+    def respond(prompt, **kwargs):
+        tags.append(current_node())
+        return generate_answer(prompt)[0]
+
+    fake_llm.respond = respond
+
+    tree = DecisionTree.compile({"Root": {"Backend": {"Node.js": ["Express"]}}})
+    traverse(tree, "Root", LLMClient(), "an Express backend", lookahead=1)
+
+    assert tags == ["Root", "Root/Backend", "Root/Backend/Node.js"]
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+import llm.warmup as warmup
+from llm.providers import LLMResult, Provider, register_provider
+from llm.usage import UsageRecord, UsageTracker, track_stage
+
+
+class ResidentProvider(Provider):
+    name = "resident"
+    events = []
+
+    def default_model(self):
+        return "resident-model"
+
+    async def warm(self, model, keep_alive=None):
+        self.events.append(("warm", model, keep_alive))
+        return 2.5
+
+    async def release(self, model):
+        self.events.append(("release", model))
+
+    async def acomplete(self, messages, model, extra):
+        return LLMResult(text="ok")
+
+
+def test_stage_warms_its_models_and_the_next_stage(monkeypatch):
+    register_provider("resident", ResidentProvider)
+    ResidentProvider.events = []
+    tracker = UsageTracker()
+    monkeypatch.setenv("LLM_PROVIDER", "resident")
+    monkeypatch.setenv("LLM_PROVIDER_GLOBAL", "resident")
+    monkeypatch.setenv("RESIDENT_SMALL_MODEL", "resident-small")
+    monkeypatch.setenv("LLM_RELEASE_UNUSED", "1")
+    monkeypatch.setattr(warmup, "get_usage_tracker", lambda: tracker)
+
+    @track_stage("pruning")
+    def run():
+        ResidentProvider.events.append(("stage",))
+
+    run()
+
+    assert ResidentProvider.events == [
+        ("warm", "resident-small", None),
+        ("warm", "resident-model", None),
+        ("stage",),
+        # global only uses the default model
+        ("release", "resident-small"),
+        ("warm", "resident-model", None),
+    ]
+
+    summary = tracker.summary()
+    assert summary["pruning"]["warmups"] == 2
+    assert summary["pruning"]["load_seconds"] == 5.0
+    assert summary["global"]["warmups"] == 1
+
+
+def test_failed_stage_does_not_warm_the_next_one(monkeypatch):
+    register_provider("resident", ResidentProvider)
+    ResidentProvider.events = []
+    monkeypatch.setenv("LLM_PROVIDER", "resident")
+    monkeypatch.setenv("LLM_PROVIDER_GLOBAL", "resident")
+    monkeypatch.setenv("RESIDENT_SMALL_MODEL", "resident-small")
+    monkeypatch.setattr(warmup, "get_usage_tracker", lambda: UsageTracker())
+
+    @track_stage("pruning")
+    def run():
+        raise RuntimeError("stage failed")
+
+    with pytest.raises(RuntimeError):
+        run()
+
+    # Only the failed stage's own models were loaded
+    assert ResidentProvider.events == [
+        ("warm", "resident-small", None),
+        ("warm", "resident-model", None),
+    ]
+
+
+def test_warmup_errors_do_not_fail_the_stage(monkeypatch, capsys):
+    class BrokenProvider(Provider):
+        name = "broken"
+
+        def default_model(self):
+            return "broken-model"
+
+        async def warm(self, model, keep_alive=None):
+            raise ConnectionError("refused")
+
+    register_provider("broken", BrokenProvider)
+
+    loaded = asyncio.run(warmup.warm_models("nodes", [("broken", "broken-model")]))
+
+    assert loaded == {}
+    assert "not loaded" in capsys.readouterr().out
+
+
+def test_load_time_is_reported_apart_from_inference():
+    tracker = UsageTracker()
+    tracker.record(UsageRecord(
+        stage="nodes", node=None, provider="ollama", model="mistral",
+        prompt_tokens=10, completion_tokens=10, estimated=False,
+        seconds=4.0, load_seconds=3.0,
+    ))
+    tracker.record_load("nodes", "ollama", "mistral", 1.5)
+
+    nodes = tracker.summary()["nodes"]
+
+    assert nodes["seconds"] == 4.0
+    assert nodes["inference_seconds"] == 1.0
+    assert nodes["load_seconds"] == 4.5